@@ -0,0 +1,211 @@
+import unittest
+
+import mock
+
+from tornado import gen, testing
+
+import tredis
+from tredis import client
+
+from . import base
+
+
+class CacheTests(base.AsyncTestCase):
+
+    CACHE_SIZE = 10
+
+    def get_client(self):
+        return tredis.Client(
+            [{'host': self.redis_host,
+              'port': self.redis_port,
+              'db': self.redis_db}],
+            auto_connect=self.AUTO_CONNECT, cache_size=self.CACHE_SIZE,
+            on_close=mock.Mock(), pool_min_size=2, pool_max_size=2)
+
+    @gen.coroutine
+    def wait_for_tracking(self):
+        info = yield self.client.info('server')
+        version = tuple(int(v) for v in info['redis_version'].split('.')[:2])
+        if version < (6, 0):
+            raise unittest.SkipTest('CLIENT TRACKING requires Redis 6.0')
+        for _attempt in range(50):
+            if self.client._tracking:
+                return
+            yield gen.sleep(0.1)
+
+    @gen.coroutine
+    def wait_for_eviction(self, key):
+        for _attempt in range(50):
+            if key not in self.client._cache._entries:
+                return
+            yield gen.sleep(0.1)
+
+    @testing.gen_test
+    def test_cached_reply_does_not_use_the_network(self):
+        yield self.wait_for_tracking()
+        key, value = self.uuid4(2)
+        yield self.expiring_set(key, value)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value)
+        with mock.patch.object(self.client._connection, 'execute') as execute:
+            result = yield self.client.get(key)
+            execute.assert_not_called()
+        self.assertEqual(result, value)
+
+    @testing.gen_test
+    def test_cached_replies_are_formatted(self):
+        yield self.wait_for_tracking()
+        key, field, value = self.uuid4(3)
+        yield self.client.hset(key, field, value)
+        yield self.client.expire(key, 5)
+        for _offset in range(2):
+            result = yield self.client.hgetall(key)
+            self.assertDictEqual(result, {field: value})
+            result = yield self.client.hget(key, field)
+            self.assertEqual(result, value)
+        self.assertEqual(len(self.client._cache._entries[key]), 2)
+
+    @testing.gen_test
+    def test_writes_by_another_client_invalidate_the_key(self):
+        yield self.wait_for_tracking()
+        key, value1, value2 = self.uuid4(3)
+        yield self.expiring_set(key, value1)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value1)
+        other = tredis.Client([{'host': self.redis_host,
+                                'port': self.redis_port,
+                                'db': self.redis_db}])
+        yield other.set(key, value2, 5)
+        other.close()
+        yield self.wait_for_eviction(key)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value2)
+
+    @testing.gen_test
+    def test_writes_invalidate_the_key_immediately(self):
+        yield self.wait_for_tracking()
+        key, value1, value2 = self.uuid4(3)
+        yield self.expiring_set(key, value1)
+        yield self.client.get(key)
+        self.client.set(key, value2, 5)
+        self.assertNotIn(key, self.client._cache._entries)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value2)
+
+    @testing.gen_test
+    def test_invalidation_while_in_flight_is_not_cached(self):
+        yield self.wait_for_tracking()
+        key, value = self.uuid4(2)
+        yield self.expiring_set(key, value)
+        future = self.client.get(key)
+        self.client._on_invalidations(
+            [[b'message', client.TRACKING_INVALIDATE_CHANNEL, [key]]])
+        result = yield future
+        self.assertEqual(result, value)
+        self.assertNotIn(key, self.client._cache._entries)
+
+    @testing.gen_test
+    def test_least_recently_used_keys_are_evicted(self):
+        yield self.wait_for_tracking()
+        keys = self.uuid4(self.CACHE_SIZE + 1)
+        for key in keys:
+            yield self.client.get(key)
+        self.assertEqual(len(self.client._cache), self.CACHE_SIZE)
+        self.assertNotIn(keys[0], self.client._cache._entries)
+        yield self.client.get(keys[1])
+        yield self.client.get(keys[0])
+        self.assertIn(keys[1], self.client._cache._entries)
+        self.assertNotIn(keys[2], self.client._cache._entries)
+
+    @testing.gen_test
+    def test_cache_is_cleared_when_the_tracker_closes(self):
+        yield self.wait_for_tracking()
+        key = self.uuid4()
+        yield self.client.get(key)
+        previous = self.client._tracker
+        previous.close()
+        for _attempt in range(50):
+            if not self.client._tracking:
+                break
+            yield gen.sleep(0.01)
+        self.assertFalse(self.client._tracking)
+        self.assertEqual(len(self.client._cache), 0)
+        yield self.wait_for_tracking()
+        self.assertIsNot(self.client._tracker, previous)
+
+    @testing.gen_test
+    def test_cache_is_cleared_when_a_data_connection_closes(self):
+        yield self.wait_for_tracking()
+        key, value1, value2 = self.uuid4(3)
+        yield self.expiring_set(key, value1)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value1)
+        connection = self.client._connection.connections[0]
+        client_id = yield self.client._execute_on_node(
+            connection, [b'CLIENT', b'ID'])
+        other = tredis.Client([{'host': self.redis_host,
+                                'port': self.redis_port,
+                                'db': self.redis_db}])
+        yield other._execute([b'CLIENT', b'KILL', b'ID',
+                              str(client_id).encode('ascii')])
+        for _attempt in range(50):
+            if not connection.connected:
+                break
+            yield gen.sleep(0.01)
+        self.assertNotIn(key, self.client._cache._entries)
+        yield other.set(key, value2, 5)
+        other.close()
+        yield self.wait_for_tracking()
+        result = yield self.client.get(key)
+        self.assertEqual(result, value2)
+
+    @testing.gen_test
+    def test_new_connections_are_tracked_during_setup(self):
+        yield self.wait_for_tracking()
+        connection = self.client._connection._add_connection()
+        yield connection.connect()
+        result = yield self.client._execute_on_node(
+            connection, [b'CLIENT', b'INFO'])
+        self.assertIn(b'flags=t', result)
+
+    @testing.gen_test
+    def test_cached_replies_are_kept_by_database(self):
+        yield self.wait_for_tracking()
+        key, value = self.uuid4(2)
+        yield self.expiring_set(key, value)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value)
+        yield self.client.select(self.redis_db + 1)
+        result = yield self.client.get(key)
+        self.assertIsNone(result)
+        result = yield self.client.get(key)
+        self.assertIsNone(result)
+        yield self.client.select(self.redis_db)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value)
+
+    @testing.gen_test
+    def test_rejected_tracking_disables_the_cache(self):
+        yield self.wait_for_tracking()
+        command = client.Command(
+            self.client._build_command([b'CLIENT', b'TRACKING', b'INVALID']),
+            None, b'OK', None)
+        with mock.patch.object(self.client, '_tracking_command',
+                               return_value=command):
+            self.client._start_tracking()
+            for _attempt in range(50):
+                if self.client._cache is None:
+                    break
+                yield gen.sleep(0.01)
+        self.assertIsNone(self.client._cache)
+        self.assertFalse(self.client._tracking)
+        key, value = self.uuid4(2)
+        yield self.expiring_set(key, value)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value)
+
+    def test_clustering_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            tredis.Client([{'host': '127.0.0.1', 'port': 6379}],
+                          clustering=True, auto_connect=False,
+                          cache_size=10)
@@ -1,12 +1,50 @@
+# -*- coding: utf-8 -*-
+import contextlib
 import os
+import socket
+import unittest
 
-from tornado import gen, testing
+import mock
+from tornado import concurrent, gen, testing
+
+import tredis
+from tredis import client
+from tredis import cluster
+from tredis import exceptions
 
 from . import base
 
+KEY_SLOTS = [
+    (b'123456789', 12739),
+    (b'foo', 12182),
+    (b'bar', 5061),
+    (b'{user1000}.following', 3443),
+    (b'{user1000}.followers', 3443),
+    (b'foo{}{bar}', 8363),
+    (b'foo{{bar}}zap', 4015),
+    (b'foo{bar}{zap}', 5061),
+    (b'{}', 15257),
+    (b'{', 4092),
+    (b'}{tag}', 8338),
+    (b'', 0),
+    (u'\u2708', 855),
+    (12345, 5228)
+]
+"""Key and hash slot pairs as returned by ``CLUSTER KEYSLOT``"""
+
 os.environ['ASYNC_TEST_TIMEOUT'] = '10'
 
 
+def node_command(port, *args):
+    """Send a command directly to a cluster node, returning the reply line"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    with contextlib.closing(s):
+        s.connect((os.environ['REDIS_HOST'], port))
+        s.send(' '.join(['{}'.format(arg) for arg in args]).encode('ascii') +
+               b'\r\n')
+        return s.recv(4096).decode('ascii').strip()
+
+
 class ClusterTests(base.AsyncTestCase):
 
     CLUSTERING = True
@@ -29,3 +67,927 @@ class ClusterTests(base.AsyncTestCase):
         for node in results:
             values.append((node.ip, node.port))
         self.assertListEqual(sorted(values), expectation)
+
+    @testing.gen_test()
+    def test_cluster_slots_against_cluster(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        results = yield self.client.cluster_slots()
+        self.assertEqual(sum(s.end - s.start + 1 for s in results), 16384)
+        self.assertListEqual(
+            sorted(set(s.master.port for s in results)),
+            [int(os.environ['NODE1_PORT']), int(os.environ['NODE2_PORT']),
+             int(os.environ['NODE3_PORT'])])
+        for slot in results:
+            self.assertIsInstance(slot, cluster.ClusterSlot)
+            self.assertIsInstance(slot.master, cluster.ClusterSlotNode)
+
+    @testing.gen_test()
+    def test_discovery_assigns_slots_to_connections(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        results = yield self.client.cluster_slots()
+        for slot in results:
+            name = '{}:{}'.format(slot.master.ip, slot.master.port)
+            self.assertIn((slot.start, slot.end),
+                          self.client._cluster[name].slots)
+
+    @testing.gen_test()
+    def test_moved_updates_slot_table(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        key = self.uuid4()
+        slot = cluster.key_slot(key)
+        expectation = self.client._slot_table[slot]
+        wrong = (expectation + 1) % len(self.client._slot_nodes)
+        self.client._slot_table[slot] = wrong
+        result = yield self.client.set(key, key, 10)
+        self.assertTrue(result)
+        self.assertEqual(self.client._slot_table[slot], expectation)
+
+    @testing.gen_test()
+    def test_ask_redirects_to_importing_node(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        key = self.uuid4()
+        slot = cluster.key_slot(key)
+        source = self.client._slot_nodes[self.client._slot_table[slot]]
+        target = [node for node in self.client._slot_nodes
+                  if node is not source][0]
+        source_id = node_command(source.port, 'CLUSTER', 'MYID')[1:]
+        target_id = node_command(target.port, 'CLUSTER', 'MYID')[1:]
+        node_command(target.port, 'CLUSTER', 'SETSLOT', slot, 'IMPORTING',
+                     source_id)
+        node_command(source.port, 'CLUSTER', 'SETSLOT', slot, 'MIGRATING',
+                     target_id)
+        try:
+            result = yield self.client.set(key, key, 10)
+            self.assertTrue(result)
+            value = yield self.client.get(key)
+            self.assertEqual(value, key)
+            result = yield self.client.delete(key)
+            self.assertTrue(result)
+            self.assertIs(
+                self.client._slot_nodes[self.client._slot_table[slot]],
+                source)
+        finally:
+            node_command(source.port, 'CLUSTER', 'SETSLOT', slot, 'STABLE')
+            node_command(target.port, 'CLUSTER', 'SETSLOT', slot, 'STABLE')
+
+    @testing.gen_test()
+    def test_key_slot_matches_cluster_key_slot(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        for key, _slot in KEY_SLOTS:
+            result = yield self.client.cluster_key_slot(key)
+            self.assertEqual(cluster.key_slot(key), result,
+                             'Slot mismatch for {!r}'.format(key))
+
+    @testing.gen_test()
+    def test_cluster_connections_have_their_own_readers(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        readers = [c.reader for pool in self.client._cluster.values()
+                   for c in pool.connections]
+        self.assertEqual(len(readers), len(set(id(r) for r in readers)))
+
+    @testing.gen_test()
+    def test_concurrent_commands_across_nodes(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        keys = [self.uuid4() for _offset in range(0, 100)]
+        results = yield [self.client.set(key, key, 10) for key in keys]
+        self.assertTrue(all(results))
+        values = yield [self.client.get(key) for key in keys]
+        self.assertListEqual(values, keys)
+
+    @testing.gen_test()
+    def test_mset_and_mget_across_slots(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        keys = list(self.uuid4(50))
+        self.assertGreater(len(set(cluster.key_slot(k) for k in keys)), 1)
+        result = yield self.client.mset(dict((k, k) for k in keys))
+        self.assertTrue(result)
+        missing = self.uuid4()
+        values = yield self.client.mget(*(keys + [missing]))
+        self.assertListEqual(values, keys + [None])
+        result = yield self.client.delete(*keys)
+        self.assertTrue(result)
+
+    @testing.gen_test()
+    def test_delete_across_slots_returns_count(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        keys = self.uuid4(10)
+        yield [self.client.set(key, key, 10) for key in keys[:5]]
+        result = yield self.client.delete(*keys)
+        self.assertEqual(result, 5)
+
+    @testing.gen_test()
+    def test_scan_iter_returns_keys_from_every_node(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        prefix = self.uuid4()
+        keys = [prefix + b'-' + key for key in self.uuid4(50)]
+        yield self.client.mset(dict((k, k) for k in keys))
+        nodes = set(self.client._slot_table[cluster.key_slot(k)]
+                    for k in keys)
+        self.assertGreater(len(nodes), 1)
+        iterator = self.client.scan_iter(prefix + b'-*', count=10)
+        values = []
+        while not iterator.done():
+            batch = yield iterator.next()
+            values.extend(batch)
+        self.assertSetEqual(set(values), set(keys))
+        yield self.client.delete(*keys)
+
+    @testing.gen_test()
+    def test_scan_iter_bounds_concurrency(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        iterator = self.client.scan_iter(count=10, concurrency=1)
+        while not iterator.done():
+            yield iterator.next()
+            self.assertLessEqual(iterator._running, 1)
+
+    @testing.gen_test()
+    def test_dbsize_and_keys_are_aggregated(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        prefix = self.uuid4()
+        keys = [prefix + b'-' + key for key in self.uuid4(20)]
+        yield self.client.mset(dict((k, k) for k in keys))
+        result = yield self.client.keys(prefix + b'-*')
+        self.assertSetEqual(set(result), set(keys))
+        expectation = 0
+        for port in ('NODE1_PORT', 'NODE2_PORT', 'NODE3_PORT'):
+            expectation += int(
+                node_command(int(os.environ[port]), 'DBSIZE')[1:])
+        result = yield self.client.dbsize()
+        self.assertGreaterEqual(result, len(keys))
+        self.assertLessEqual(result, expectation)
+        yield self.client.delete(*keys)
+
+    @testing.gen_test()
+    def test_info_is_returned_for_every_node(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        result = yield self.client.info('server')
+        self.assertSetEqual(set(result.keys()), set(self.client._cluster))
+        for name, info in result.items():
+            self.assertEqual(info['tcp_port'], int(name.split(':')[1]))
+
+    @testing.gen_test()
+    def test_script_load_is_broadcast(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        sha1 = yield self.client.script_load('return 1')
+        for conn in self.client._cluster.values():
+            self.assertEqual(node_command(conn.port, 'SCRIPT', 'EXISTS',
+                                          sha1.decode('ascii')),
+                             '*1\r\n:1')
+        result = yield self.client.script_exists(sha1, b'0' * 40)
+        self.assertListEqual(result, [1, 0])
+
+    @testing.gen_test()
+    def test_published_messages_are_received(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        channel, message = self.uuid4(2)
+        subscription = yield self.client.subscribe(channel)
+        result = yield self.client.publish(channel, message)
+        self.assertEqual(result, 1)
+        messages = yield subscription.next()
+        self.assertEqual(messages[0].message, message)
+
+    @testing.gen_test()
+    def test_lazy_cluster_connect(self):
+        redis_client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port}],
+            clustering=True, auto_connect=False,
+            cluster_connect=client.CLUSTER_CONNECT_LAZY)
+        yield redis_client.connect()
+        self.assertTrue(redis_client.ready)
+        self.assertEqual(len(redis_client._cluster), 3)
+        self.assertListEqual(
+            [c.name for c in redis_client._cluster.values() if c.connected],
+            ['{}:{}'.format(self.redis_host, self.redis_port)])
+        keys = list(self.uuid4(20))
+        result = yield redis_client.mset(dict((k, k) for k in keys))
+        self.assertTrue(result)
+        values = yield redis_client.mget(*keys)
+        self.assertListEqual(values, keys)
+        self.assertTrue(
+            all(c.connected for c in redis_client._cluster.values()))
+        yield redis_client.delete(*keys)
+        redis_client.close()
+
+    @testing.gen_test()
+    def test_commands_continue_when_a_node_connection_closes(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        node = self.client._slot_nodes[0]
+        node.connections[0]._stream.close()
+        while node.connected:
+            yield gen.sleep(0.01)
+        self.assertTrue(self.client._connected.is_set())
+        keys = list(self.uuid4(20))
+        result = yield self.client.mset(dict((k, k) for k in keys))
+        self.assertTrue(result)
+        values = yield self.client.mget(*keys)
+        self.assertListEqual(values, keys)
+        self.assertTrue(node.connected)
+        yield self.client.delete(*keys)
+
+    @testing.gen_test()
+    def test_commands_are_routed_by_their_keys(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        tag = self.uuid4().decode('ascii')
+        key1, key2, key3 = ['{{{}}}{}'.format(tag, i) for i in range(3)]
+        with mock.patch.object(self.client, '_on_cluster_data_moved') as moved:
+            result = yield self.client.eval(
+                "return redis.call('set', KEYS[1], ARGV[1])", [key1], ['1'])
+            self.assertEqual(result, b'OK')
+            yield self.client.set(key2, '2', 10)
+            result = yield self.client.bitop(tredis.BITOP_OR, key3,
+                                              key1, key2)
+            self.assertEqual(result, 1)
+            yield self.client.sadd(key1 + 's', 'a')
+            result = yield self.client.sinterstore(key3 + 's', key1 + 's')
+            self.assertEqual(result, 1)
+            moved.assert_not_called()
+        yield self.client.delete(key1, key2, key3, key1 + 's', key3 + 's')
+
+    @testing.gen_test()
+    def test_command_info_fetches_key_positions(self):
+        redis_client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port}],
+            clustering=True, auto_connect=False, command_info=True)
+        yield redis_client.connect()
+        while redis_client._key_positions is cluster.KEY_POSITIONS:
+            yield gen.sleep(0.01)
+        self.assertEqual(redis_client._key_positions[b'GET'], 1)
+        self.assertEqual(redis_client._key_positions[b'LASTSAVE'], 0)
+        self.assertEqual(redis_client._key_positions[b'BITOP'], 2)
+        self.assertNotIn(b'ZUNIONSTORE', redis_client._key_positions)
+        self.assertEqual(
+            cluster.command_key([b'ZUNIONSTORE', b'dest', b'2', b'a', b'b'],
+                                redis_client._key_positions), b'dest')
+        redis_client.close()
+
+    @testing.gen_test()
+    def test_pipeline_writes_once_per_node(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        keys = list(self.uuid4(30))
+        yield self.client.mset(dict((k, k) for k in keys))
+        nodes = self.client._slot_nodes
+        pipeline = self.client.pipeline()
+        for key in keys:
+            pipeline.get(key)
+        pipeline.mget(*keys)
+        streams = [node.connections[0]._stream for node in nodes]
+        patches = [mock.patch.object(stream, 'write', wraps=stream.write)
+                   for stream in streams]
+        writes = [patch.start() for patch in patches]
+        try:
+            results = yield pipeline.execute()
+        finally:
+            for patch in patches:
+                patch.stop()
+        self.assertListEqual(results, keys + [keys])
+        for write in writes:
+            self.assertLessEqual(write.call_count, 2)
+        yield self.client.delete(*keys)
+
+    @testing.gen_test()
+    def test_pipeline_retries_moved_commands(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        key1, key2 = self.uuid4(2)
+        slot = cluster.key_slot(key1)
+        expectation = self.client._slot_table[slot]
+        wrong = (expectation + 1) % len(self.client._slot_nodes)
+        self.client._slot_table[slot] = wrong
+        pipeline = self.client.pipeline()
+        pipeline.set(key1, key1, 10)
+        pipeline.set(key2, key2, 10)
+        pipeline.get(key1)
+        pipeline.get(key2)
+        results = yield pipeline.execute()
+        self.assertListEqual(results, [True, True, key1, key2])
+        self.assertEqual(self.client._slot_table[slot], expectation)
+
+    @testing.gen_test()
+    def test_cluster_readonly_and_readwrite(self):
+        while not self.client.ready:
+            yield gen.sleep(0.01)
+        result = yield self.client.cluster_readonly()
+        self.assertTrue(result)
+        result = yield self.client.cluster_readwrite()
+        self.assertTrue(result)
+
+    @testing.gen_test()
+    def test_replica_preferred_without_replicas_uses_masters(self):
+        redis_client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port}],
+            clustering=True, auto_connect=False,
+            read_from=client.READ_FROM_REPLICA_PREFERRED)
+        yield redis_client.connect()
+        key = self.uuid4()
+        result = yield redis_client.set(key, key, 10)
+        self.assertTrue(result)
+        value = yield redis_client.get(key)
+        self.assertEqual(value, key)
+        redis_client.close()
+
+
+class SlotTableTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = tredis.Client([{'host': 'localhost', 'port': 6379}],
+                                    clustering=True, auto_connect=False)
+        self.node1 = mock.Mock(slots=[(0, 5460)])
+        self.node2 = mock.Mock(slots=[(5461, 10922), (16000, 16383)])
+        self.node3 = mock.Mock(slots=[(10923, 15999)])
+        self.replica = mock.Mock(slots=[])
+        self.client._cluster = {'10.0.0.1:6379': self.node1,
+                                '10.0.0.2:6379': self.node2,
+                                '10.0.0.3:6379': self.node3,
+                                '10.0.0.4:6379': self.replica}
+        self.client._build_slot_table()
+
+    def test_slot_table_maps_each_slot(self):
+        for slot, node in [(0, self.node1), (5460, self.node1),
+                           (5461, self.node2), (10922, self.node2),
+                           (10923, self.node3), (15999, self.node3),
+                           (16000, self.node2), (16383, self.node2)]:
+            self.assertIs(
+                self.client._slot_nodes[self.client._slot_table[slot]], node)
+
+    def test_slot_table_excludes_nodes_without_slots(self):
+        self.assertNotIn(self.replica, self.client._slot_nodes)
+
+    def test_unassigned_slots(self):
+        self.node3.slots = []
+        self.client._build_slot_table()
+        self.assertEqual(self.client._slot_table[12000],
+                         client.UNASSIGNED_SLOT)
+
+    def test_pick_cluster_host_uses_slot_table(self):
+        self.assertIs(self.client._pick_cluster_host([b'GET', b'foo']),
+                      self.node3)
+
+    def test_pick_cluster_host_uses_hash_tags(self):
+        self.assertIs(
+            self.client._pick_cluster_host([b'GET', b'{bar}.foo']),
+            self.node1)
+
+
+class RedirectTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = tredis.Client([{'host': 'localhost', 'port': 6379}],
+                                    clustering=True, auto_connect=False)
+        self.node1 = mock.Mock(slots=[(0, 8191)])
+        self.node2 = mock.Mock(slots=[(8192, 16383)])
+        self.client._cluster = {'10.0.0.1:6379': self.node1,
+                                '10.0.0.2:6379': self.node2}
+        self.client._build_slot_table()
+        self.client._refresh_cluster_topology = mock.Mock()
+        self.command = client.Command(b'', self.node1, None, None)
+        self.future = concurrent.Future()
+
+    def test_moved_updates_slot_and_executes_on_target(self):
+        with mock.patch('tredis.common.split_connection_host_port',
+                        return_value=('10.0.0.2', 6379)):
+            self.client._on_cluster_data_moved('MOVED 100 10.0.0.2:6379',
+                                               self.command, self.future)
+        self.assertIs(self.client._slot_nodes[self.client._slot_table[100]],
+                      self.node2)
+        self.assertIs(self.client._slot_nodes[self.client._slot_table[101]],
+                      self.node1)
+        self.node2.execute.assert_called_once_with(
+            self.command._replace(connection=self.node2), self.future)
+        self.client._refresh_cluster_topology.assert_not_called()
+
+    def test_moved_to_unknown_node_creates_connection(self):
+        node3 = mock.Mock(slots=[])
+
+        def create(host, port, slots):
+            self.client._cluster['{}:{}'.format(host, port)] = node3
+
+        self.client._create_cluster_connection = mock.Mock(side_effect=create)
+        with mock.patch('tredis.common.split_connection_host_port',
+                        return_value=('10.0.0.3', 6379)):
+            self.client._on_cluster_data_moved('MOVED 100 10.0.0.3:6379',
+                                               self.command, self.future)
+        self.client._create_cluster_connection.assert_called_once_with(
+            '10.0.0.3', 6379, [])
+        self.assertIs(self.client._slot_nodes[self.client._slot_table[100]],
+                      node3)
+        node3.execute.assert_called_once_with(mock.ANY, self.future)
+
+    def test_redirect_spike_triggers_refresh(self):
+        with mock.patch('tredis.common.split_connection_host_port',
+                        return_value=('10.0.0.2', 6379)):
+            for slot in range(0, client.REDIRECT_REFRESH_THRESHOLD):
+                self.client._on_cluster_data_moved(
+                    'MOVED {} 10.0.0.2:6379'.format(slot), self.command,
+                    concurrent.Future())
+        self.client._refresh_cluster_topology.assert_called_once_with()
+
+    def test_ask_sends_asking_without_updating_slot(self):
+        with mock.patch('tredis.common.split_connection_host_port',
+                        return_value=('10.0.0.2', 6379)):
+            self.client._on_cluster_data_ask('ASK 100 10.0.0.2:6379',
+                                             self.command, self.future)
+        self.assertIs(self.client._slot_nodes[self.client._slot_table[100]],
+                      self.node1)
+        commands = self.node2.execute_many.call_args[0][0]
+        self.assertEqual(commands[0][0].command, b'*1\r\n$6\r\nASKING\r\n')
+        self.assertEqual(commands[1],
+                         (self.command._replace(connection=self.node2),
+                          self.future))
+
+
+class DiscoveryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = tredis.Client([{'host': 'localhost', 'port': 6379}],
+                                    clustering=True, auto_connect=False)
+        self.client._create_cluster_connection = mock.Mock()
+        self.master = mock.Mock(slots=[])
+        self.client._cluster = {'10.0.0.1:6379': self.master}
+        master1 = cluster.ClusterSlotNode('10.0.0.1', 6379, 'a')
+        master2 = cluster.ClusterSlotNode('10.0.0.2', 6379, 'b')
+        replica = cluster.ClusterSlotNode('10.0.0.3', 6379, 'c')
+        future = concurrent.Future()
+        future.set_result([
+            cluster.ClusterSlot(0, 100, master1, [replica]),
+            cluster.ClusterSlot(101, 16383, master2, []),
+            cluster.ClusterSlot(200, 300, master1, [replica])])
+        self.client._on_cluster_discovery(future)
+
+    def test_existing_connection_slots_are_updated(self):
+        self.master.set_slots.assert_called_once_with([(0, 100), (200, 300)])
+        self.master.set_read_only.assert_called_once_with(False)
+
+    def test_new_nodes_are_connected(self):
+        self.client._create_cluster_connection.assert_has_calls([
+            mock.call('10.0.0.3', 6379, [], True),
+            mock.call('10.0.0.2', 6379, [(101, 16383)], False)])
+
+
+class TopologyRefreshTests(unittest.TestCase):
+
+    def setUp(self):
+        self.io_loop = mock.Mock()
+        self.client = tredis.Client([{'host': 'localhost', 'port': 6379}],
+                                    clustering=True, auto_connect=False,
+                                    io_loop=self.io_loop)
+        self.client._create_cluster_connection = mock.Mock()
+        self.master = mock.Mock(slots=[(0, 16383)], outstanding=0)
+        self.dropped = mock.Mock(slots=[], outstanding=0)
+        self.client._cluster = {'10.0.0.1:6379': self.master,
+                                '10.0.0.9:6379': self.dropped}
+
+    def discover(self):
+        future = concurrent.Future()
+        future.set_result([
+            cluster.ClusterSlot(0, 16383,
+                                cluster.ClusterSlotNode('10.0.0.1', 6379,
+                                                        'a'), [])])
+        self.client._on_cluster_discovery(future)
+
+    def test_dropped_node_is_removed_and_closed(self):
+        self.discover()
+        self.assertNotIn('10.0.0.9:6379', self.client._cluster)
+        self.assertListEqual(self.client._slot_nodes, [self.master])
+        self.dropped.close.assert_called_once_with()
+
+    def test_dropped_node_with_outstanding_commands_is_closed_later(self):
+        self.dropped.outstanding = 2
+        self.discover()
+        self.dropped.close.assert_not_called()
+        self.io_loop.call_later.assert_called_once_with(
+            client.DROPPED_NODE_CLOSE_DELAY,
+            self.client._close_when_idle, self.dropped)
+
+    def test_periodic_refresh_is_started_once(self):
+        self.client._cluster_refresh_interval = 10
+        with mock.patch('tornado.ioloop.PeriodicCallback') as periodic:
+            self.discover()
+            self.discover()
+            periodic.assert_called_once_with(
+                self.client._refresh_cluster_topology, 10000, self.io_loop)
+            periodic.return_value.start.assert_called_once_with()
+
+    def test_close_stops_periodic_refresh(self):
+        self.client._cluster_refresh_interval = 10
+        with mock.patch('tornado.ioloop.PeriodicCallback') as periodic:
+            self.discover()
+            self.client._connected.set()
+            self.client.close()
+            periodic.return_value.stop.assert_called_once_with()
+        self.assertIsNone(self.client._cluster_refresh)
+
+    def test_no_periodic_refresh_by_default(self):
+        with mock.patch('tornado.ioloop.PeriodicCallback') as periodic:
+            self.discover()
+            periodic.assert_not_called()
+
+
+class CrossSlotTests(unittest.TestCase):
+
+    def test_group_by_slot(self):
+        groups = client.Client._group_by_slot(
+            [b'MGET', '{a}1', 'b', '{a}2', 'b'])
+        self.assertListEqual(groups, [([0, 2], ['{a}1', '{a}2']),
+                                      ([1, 3], ['b', 'b'])])
+
+    def test_group_by_slot_keeps_values_with_keys(self):
+        groups = client.Client._group_by_slot(
+            [b'MSET', '{a}1', 1, 'b', 2, '{a}2', 3])
+        self.assertListEqual(groups, [([0, 2], ['{a}1', 1, '{a}2', 3]),
+                                      ([1], ['b', 2])])
+
+
+class BroadcastTests(unittest.TestCase):
+
+    def test_broadcast_policy(self):
+        self.assertEqual(
+            client.Client._broadcast_policy([b'SCRIPT', b'LOAD', b'x']),
+            client.BROADCAST_COMMANDS[b'SCRIPT LOAD'])
+        self.assertEqual(client.Client._broadcast_policy([b'DBSIZE']),
+                         client.BROADCAST_COMMANDS[b'DBSIZE'])
+        self.assertIsNone(client.Client._broadcast_policy([b'GET', b'x']))
+
+    def test_aggregate_all(self):
+        self.assertListEqual(
+            client._aggregate_all([('a', [1, 1, 0]), ('b', [1, 0, 0])]),
+            [1, 0, 0])
+
+    def test_aggregate_concatenate(self):
+        self.assertListEqual(
+            client._aggregate_concatenate([('a', [b'1']), ('b', [b'2'])]),
+            [b'1', b'2'])
+
+    def test_aggregate_sum(self):
+        self.assertEqual(client._aggregate_sum([('a', 1), ('b', 2)]), 3)
+
+
+class ClusterConnectTests(unittest.TestCase):
+
+    def create_client(self, cluster_connect):
+        return tredis.Client([{'host': 'localhost', 'port': 6379}],
+                             clustering=True, auto_connect=False,
+                             cluster_connect=cluster_connect)
+
+    def test_invalid_cluster_connect_raises(self):
+        with self.assertRaises(ValueError):
+            self.create_client('some')
+
+    def test_connect_all(self):
+        redis_client = self.create_client(client.CLUSTER_CONNECT_ALL)
+        self.assertTrue(redis_client._connect_on_discovery(False))
+        self.assertTrue(redis_client._connect_on_discovery(True))
+
+    def test_connect_masters(self):
+        redis_client = self.create_client(client.CLUSTER_CONNECT_MASTERS)
+        self.assertTrue(redis_client._connect_on_discovery(False))
+        self.assertFalse(redis_client._connect_on_discovery(True))
+
+    def test_connect_lazy(self):
+        redis_client = self.create_client(client.CLUSTER_CONNECT_LAZY)
+        self.assertFalse(redis_client._connect_on_discovery(False))
+        self.assertFalse(redis_client._connect_on_discovery(True))
+
+    def test_ready_ignores_unconnected_replicas(self):
+        redis_client = self.create_client(client.CLUSTER_CONNECT_MASTERS)
+        redis_client._cluster = {
+            '10.0.0.1:6379': mock.Mock(connected=True, read_only=False),
+            '10.0.0.2:6379': mock.Mock(connected=False, read_only=True)}
+        self.assertTrue(redis_client.ready)
+        redis_client._cluster['10.0.0.1:6379'].connected = False
+        self.assertFalse(redis_client.ready)
+
+    def test_discovery_marks_lazy_client_connected(self):
+        redis_client = self.create_client(client.CLUSTER_CONNECT_LAZY)
+        redis_client._cluster = {
+            '10.0.0.1:6379': mock.Mock(connected=True, read_only=False,
+                                       slots=[])}
+        future = concurrent.Future()
+        future.set_result([
+            cluster.ClusterSlot(
+                0, 16383, cluster.ClusterSlotNode('10.0.0.2', 6379, 'b'),
+                [])])
+        with mock.patch('tredis.client._ConnectionPool.connect') as connect:
+            redis_client._on_cluster_discovery(future)
+            connect.assert_not_called()
+        self.assertTrue(redis_client._connected.is_set())
+        self.assertTrue(redis_client._connect_future.result())
+
+
+class PartialAvailabilityTests(unittest.TestCase):
+
+    def setUp(self):
+        self.on_close = mock.Mock()
+        self.client = tredis.Client([{'host': 'localhost', 'port': 6379}],
+                                    clustering=True, auto_connect=False,
+                                    on_close=self.on_close)
+        self.client._discovery = True
+        self.client._connected.set()
+        self.client._refresh_cluster_topology = mock.Mock()
+        self.node1 = mock.Mock(connected=True, read_only=False)
+        self.node2 = mock.Mock(connected=False, read_only=False)
+        self.client._cluster = {'10.0.0.1:6379': self.node1,
+                                '10.0.0.2:6379': self.node2}
+
+    def test_node_close_does_not_block_other_nodes(self):
+        self.client._on_closed()
+        self.assertTrue(self.client._connected.is_set())
+        self.client._refresh_cluster_topology.assert_called_once_with()
+        self.on_close.assert_not_called()
+
+    def test_close_of_last_node_closes_client(self):
+        self.node1.connected = False
+        self.client._on_closed()
+        self.assertFalse(self.client._connected.is_set())
+        self.on_close.assert_called_once_with()
+
+    def test_ready_when_some_nodes_fail_to_connect(self):
+        self.client._connected.clear()
+        self.client._connecting_nodes = {'10.0.0.1:6379', '10.0.0.2:6379'}
+        failed = concurrent.Future()
+        failed.set_exception(exceptions.ConnectError('refused'))
+        self.client._on_cluster_node_connected('10.0.0.2:6379', failed)
+        self.assertFalse(self.client._connected.is_set())
+        connected = concurrent.Future()
+        connected.set_result(self.node1)
+        self.client._on_cluster_node_connected('10.0.0.1:6379', connected)
+        self.assertTrue(self.client._connected.is_set())
+        self.assertTrue(self.client._connect_future.result())
+
+    def test_connect_fails_when_no_nodes_connect(self):
+        self.client._connected.clear()
+        self.node1.connected = False
+        self.client._connecting_nodes = {'10.0.0.1:6379'}
+        failed = concurrent.Future()
+        failed.set_exception(exceptions.ConnectError('refused'))
+        self.client._on_cluster_node_connected('10.0.0.1:6379', failed)
+        self.assertFalse(self.client._connected.is_set())
+        with self.assertRaises(exceptions.ConnectionError):
+            self.client._connect_future.result()
+
+    def test_unrouted_commands_use_a_connected_node(self):
+        self.node1.connected = False
+        self.node2.connected = True
+        self.assertIs(self.client._pick_cluster_host([b'CLUSTER', b'SLOTS']),
+                      self.node2)
+
+
+class ScanIteratorTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(ScanIteratorTests, self).setUp()
+        self.client = tredis.Client([{'host': 'localhost', 'port': 6379}],
+                                    clustering=True, auto_connect=False,
+                                    io_loop=self.io_loop)
+        self.client._connected.set()
+        self.futures = []
+        self.client._execute_on_node = mock.Mock(
+            side_effect=self.execute_on_node)
+        self.client._slot_nodes = ['node1', 'node2', 'node3']
+
+    def execute_on_node(self, node, command, format_callback):
+        future = concurrent.Future()
+        self.futures.append((node, command[1], future))
+        return future
+
+    @testing.gen_test
+    def test_scans_are_bounded_by_concurrency(self):
+        iterator = self.client.scan_iter(concurrency=2)
+        next_future = iterator.next()
+        yield gen.moment
+        self.assertListEqual([(n, c) for n, c, _f in self.futures],
+                             [('node1', b'0'), ('node2', b'0')])
+        self.futures[0][2].set_result((5, [b'a']))
+        batch = yield next_future
+        self.assertListEqual(batch, [b'a'])
+        self.assertListEqual([(n, c) for n, c, _f in self.futures[2:]],
+                             [('node3', b'0')])
+
+    @testing.gen_test
+    def test_iteration_completes_when_cursors_return_to_zero(self):
+        iterator = self.client.scan_iter()
+        next_future = iterator.next()
+        yield gen.moment
+        for _node, _cursor, future in self.futures:
+            future.set_result((0, []))
+        batch = yield next_future
+        self.assertListEqual(batch, [])
+        self.assertTrue(iterator.done())
+
+    @testing.gen_test
+    def test_errors_are_raised(self):
+        iterator = self.client.scan_iter()
+        next_future = iterator.next()
+        yield gen.moment
+        self.futures[0][2].set_exception(exceptions.RedisError('error'))
+        with self.assertRaises(exceptions.RedisError):
+            yield next_future
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            self.client.scan_iter(concurrency=0)
+
+
+class ReadFromTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = self.create_client(client.READ_FROM_REPLICA)
+
+    def create_client(self, read_from):
+        redis_client = tredis.Client(
+            [{'host': 'localhost', 'port': 6379}], clustering=True,
+            auto_connect=False, read_from=read_from)
+
+        def create_cluster_connection(host, port, slots, read_only):
+            conn = mock.Mock(slots=slots, read_only=read_only, outstanding=0)
+            conn.name = '{}:{}'.format(host, port)
+            redis_client._cluster[conn.name] = conn
+            return conn
+
+        redis_client._create_cluster_connection = mock.Mock(
+            side_effect=create_cluster_connection)
+        redis_client._cluster = {}
+        future = concurrent.Future()
+        future.set_result([
+            cluster.ClusterSlot(
+                0, 8191, cluster.ClusterSlotNode('10.0.0.1', 6379, 'a'),
+                [cluster.ClusterSlotNode('10.0.0.3', 6379, 'c')]),
+            cluster.ClusterSlot(
+                8192, 16383, cluster.ClusterSlotNode('10.0.0.2', 6379, 'b'),
+                [])])
+        redis_client._on_cluster_discovery(future)
+        self.master1 = redis_client._cluster['10.0.0.1:6379']
+        self.master2 = redis_client._cluster['10.0.0.2:6379']
+        self.replica = redis_client._cluster['10.0.0.3:6379']
+        return redis_client
+
+    @staticmethod
+    def key_for_slot(start, end):
+        offset = 0
+        while not start <= cluster.key_slot('key-{}'.format(offset)) <= end:
+            offset += 1
+        return 'key-{}'.format(offset)
+
+    def test_invalid_read_from_raises(self):
+        with self.assertRaises(ValueError):
+            tredis.Client([{'host': 'localhost', 'port': 6379}],
+                          clustering=True, auto_connect=False,
+                          read_from='secondary')
+
+    def test_replicas_are_mapped_to_masters(self):
+        index = self.client._slot_table[0]
+        self.assertIs(self.client._slot_nodes[index], self.master1)
+        self.assertListEqual(self.client._slot_replicas[index],
+                             [self.replica])
+
+    def test_reads_use_replica(self):
+        key = self.key_for_slot(0, 8191)
+        self.assertIs(self.client._pick_cluster_host([b'GET', key]),
+                      self.replica)
+        self.assertIs(self.client._pick_cluster_host([b'SMEMBERS', key]),
+                      self.replica)
+
+    def test_writes_use_master(self):
+        key = self.key_for_slot(0, 8191)
+        self.assertIs(self.client._pick_cluster_host([b'SET', key, 1]),
+                      self.master1)
+
+    def test_replica_raises_without_replicas(self):
+        key = self.key_for_slot(8192, 16383)
+        with self.assertRaises(exceptions.ConnectionError):
+            self.client._pick_cluster_host([b'GET', key])
+
+    def test_replica_preferred_uses_master_without_replicas(self):
+        self.client = self.create_client(client.READ_FROM_REPLICA_PREFERRED)
+        key = self.key_for_slot(8192, 16383)
+        self.assertIs(self.client._pick_cluster_host([b'GET', key]),
+                      self.master2)
+
+    def test_master_reads_use_master(self):
+        self.client = self.create_client(client.READ_FROM_MASTER)
+        key = self.key_for_slot(0, 8191)
+        self.assertIs(self.client._pick_cluster_host([b'GET', key]),
+                      self.master1)
+
+    def test_nearest_uses_least_busy_node(self):
+        self.client = self.create_client(client.READ_FROM_NEAREST)
+        key = self.key_for_slot(0, 8191)
+        self.master1.outstanding = 5
+        self.assertIs(self.client._pick_cluster_host([b'GET', key]),
+                      self.replica)
+        self.replica.outstanding = 10
+        self.assertIs(self.client._pick_cluster_host([b'GET', key]),
+                      self.master1)
+
+    def test_readonly_issued_on_replica_connections(self):
+        connection = mock.Mock(read_only=True)
+        self.client._setup_connection(connection)
+        connection.setup.assert_called_once_with(
+            client.Command(b'*1\r\n$8\r\nREADONLY\r\n', connection, None,
+                           None), mock.ANY)
+
+    def test_readonly_not_issued_on_master_connections(self):
+        connection = mock.Mock(read_only=False)
+        future = self.client._setup_connection(connection)
+        self.assertTrue(future.result())
+        connection.setup.assert_not_called()
+
+    def test_readonly_not_issued_for_master_policy(self):
+        self.client = self.create_client(client.READ_FROM_MASTER)
+        connection = mock.Mock(read_only=True)
+        future = self.client._setup_connection(connection)
+        self.assertTrue(future.result())
+        connection.setup.assert_not_called()
+
+
+class CommandKeyTests(unittest.TestCase):
+
+    def test_first_argument_is_the_default(self):
+        self.assertEqual(cluster.command_key([b'GET', b'foo']), b'foo')
+        self.assertEqual(cluster.command_key([b'SINTERSTORE', b'dest',
+                                              b'foo']), b'dest')
+
+    def test_commands_without_keys(self):
+        self.assertIsNone(cluster.command_key([b'PING']))
+        self.assertIsNone(cluster.command_key([b'CLUSTER', b'SLOTS']))
+        self.assertIsNone(cluster.command_key([b'SCAN', b'0']))
+
+    def test_bitop_and_object(self):
+        self.assertEqual(
+            cluster.command_key([b'BITOP', b'AND', b'dest', b'foo']), b'dest')
+        self.assertEqual(
+            cluster.command_key([b'OBJECT', b'ENCODING', b'foo']), b'foo')
+
+    def test_eval(self):
+        self.assertEqual(
+            cluster.command_key([b'EVAL', b'return 1', '1', b'foo', b'arg']),
+            b'foo')
+        self.assertEqual(
+            cluster.command_key([b'EVALSHA', b'abc', '1', b'foo']), b'foo')
+        self.assertIsNone(
+            cluster.command_key([b'EVAL', b'return 1', '0', b'arg']))
+
+    def test_migrate(self):
+        self.assertEqual(
+            cluster.command_key([b'MIGRATE', b'host', b'6379', b'foo', b'0',
+                                 b'1000']), b'foo')
+        self.assertEqual(
+            cluster.command_key([b'MIGRATE', b'host', b'6379', b'', b'0',
+                                 b'1000', b'KEYS', b'foo', b'bar']), b'foo')
+
+    def test_custom_positions(self):
+        self.assertIsNone(cluster.command_key([b'LASTSAVE', b'x'],
+                                              {b'LASTSAVE': 0}))
+
+    def test_command_names_are_case_insensitive(self):
+        self.assertEqual(
+            cluster.command_key(['bitop', b'AND', b'dest', b'foo']), b'dest')
+
+
+class KeySlotTests(unittest.TestCase):
+
+    def test_key_slot_values(self):
+        for key, slot in KEY_SLOTS:
+            self.assertEqual(cluster.key_slot(key), slot,
+                             'Slot mismatch for {!r}'.format(key))
+
+    def test_str_and_bytes_keys_hash_the_same(self):
+        self.assertEqual(cluster.key_slot('foo'), cluster.key_slot(b'foo'))
+
+    def test_key_slot_is_cached(self):
+        key = self.id().encode('ascii')
+        with mock.patch('tredis.cluster._calculate_key_slot',
+                        return_value=42) as calculate:
+            self.assertEqual(cluster.key_slot(key), 42)
+            self.assertEqual(cluster.key_slot(key), 42)
+            calculate.assert_called_once_with(key)
+
+    def test_key_slot_cache_is_bounded(self):
+        for offset in range(0, cluster.KEY_SLOT_CACHE_SIZE + 10):
+            cluster.key_slot('key-{}'.format(offset))
+        self.assertEqual(len(cluster._key_slot_cache),
+                         cluster.KEY_SLOT_CACHE_SIZE)
+        self.assertNotIn(b'key-0', cluster._key_slot_cache)
+
+    def test_key_slot_cache_is_keyed_on_the_encoded_key(self):
+        self.assertEqual(cluster.key_slot('1'), 9842)
+        self.assertEqual(cluster.key_slot(1), 9842)
+        self.assertEqual(cluster.key_slot(1.0), 8495)
+        self.assertEqual(cluster.key_slot(True), cluster.key_slot(b'True'))
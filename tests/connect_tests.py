@@ -4,10 +4,12 @@ import re
 import mock
 import uuid
 
+from tornado import concurrent
 from tornado import testing
 from tornado import gen
 
 import tredis
+from tredis import client as tredis_client
 from tredis import exceptions
 
 from . import base
@@ -59,7 +61,7 @@ class ConnectTestCase(base.AsyncTestCase):
     @testing.gen_test
     def test_close_invokes_iostream_close(self):
         yield self.client.set('foo', 'bar', 1)  # Establish the connection
-        stream = self.client._connection._stream
+        stream = self.client._connection.connections[0]._stream
         with mock.patch.object(stream, 'close') as close:
             self.client.close()
             close.assert_called_once_with()
@@ -96,7 +98,224 @@ class ConnectTestCase(base.AsyncTestCase):
         self.assertTrue(result1)
         self.assertTrue(result2)
 
+    @testing.gen_test
+    def test_concurrent_commands_are_pipelined(self):
+        yield self.client.set('foo', 'bar', 10)  # Establish the connection
+        keys = [self.uuid4() for _offset in range(0, 200)]
+        futures = [self.client.set(key, key, 10) for key in keys]
+        yield gen.moment
+        self.assertGreater(len(self.client._connection.connections[0].pending), 1)
+        results = yield futures
+        self.assertTrue(all(results))
+        values = yield [self.client.get(key) for key in keys]
+        self.assertListEqual(values, keys)
+
+    @testing.gen_test
+    def test_commands_in_same_iteration_are_coalesced(self):
+        yield self.client.set('foo', 'bar', 10)  # Establish the connection
+        stream = self.client._connection.connections[0]._stream
+        keys = [self.uuid4() for _offset in range(0, 100)]
+        with mock.patch.object(stream, 'write', wraps=stream.write) as write:
+            results = yield [self.client.set(key, key, 10) for key in keys]
+            write.assert_called_once_with(mock.ANY)
+        self.assertTrue(all(results))
+
+    @testing.gen_test
+    def test_max_batch_commands_bounds_writes(self):
+        client = tredis.Client([{'host': self.redis_host,
+                                 'port': self.redis_port,
+                                 'db': self.redis_db}],
+                               max_batch_commands=10)
+        yield client.set('foo', 'bar', 10)  # Establish the connection
+        stream = client._connection.connections[0]._stream
+        keys = [self.uuid4() for _offset in range(0, 100)]
+        with mock.patch.object(stream, 'write', wraps=stream.write) as write:
+            results = yield [client.set(key, key, 10) for key in keys]
+            self.assertEqual(write.call_count, 10)
+        self.assertTrue(all(results))
+        client.close()
+
+    @testing.gen_test
+    def test_max_batch_bytes_bounds_writes(self):
+        client = tredis.Client([{'host': self.redis_host,
+                                 'port': self.redis_port,
+                                 'db': self.redis_db}],
+                               max_batch_bytes=1024)
+        yield client.set('foo', 'bar', 10)  # Establish the connection
+        stream = client._connection.connections[0]._stream
+        key, small = self.uuid4(2)
+        large = b'x' * 4096
+        with mock.patch.object(stream, 'write', wraps=stream.write) as write:
+            results = yield [client.set(key, small, 10),
+                             client.set(key, large, 10),
+                             client.get(key)]
+            self.assertEqual(write.call_count, 3)
+        self.assertListEqual(results, [True, True, large])
+        client.close()
+
     @testing.gen_test
     def test_close_unopened_client(self):
         with self.assertRaises(exceptions.ConnectionError):
             self.client.close()
+
+
+class ConnectionReadLoopTestCase(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(ConnectionReadLoopTestCase, self).setUp()
+        self.on_response = mock.Mock()
+        self.connection = tredis_client._Connection(
+            'localhost', 6379, 0, self.on_response, mock.Mock(), self.io_loop)
+
+    def test_all_buffered_replies_are_dispatched(self):
+        self.connection.pending.extend([('c1', 'f1'), ('c2', 'f2'),
+                                        ('c3', 'f3')])
+        self.connection._on_data(b'+OK\r\n:1\r\n$3\r\nfoo\r\n')
+        self.on_response.assert_has_calls([
+            mock.call('c1', 'f1', b'OK'),
+            mock.call('c2', 'f2', 1),
+            mock.call('c3', 'f3', b'foo')])
+        self.assertEqual(len(self.connection.pending), 0)
+
+    def test_partial_replies_wait_for_more_data(self):
+        self.connection.pending.extend([('c1', 'f1'), ('c2', 'f2')])
+        self.connection._on_data(b'+OK\r\n$3\r\nf')
+        self.on_response.assert_called_once_with('c1', 'f1', b'OK')
+        self.connection._on_data(b'oo\r\n')
+        self.on_response.assert_called_with('c2', 'f2', b'foo')
+        self.assertEqual(len(self.connection.pending), 0)
+
+    def test_close_discards_partial_replies(self):
+        future = concurrent.Future()
+        self.connection.pending.append((mock.Mock(), future))
+        self.connection._on_data(b'$3\r\nf')
+        self.connection._on_closed()
+        self.assertIsNotNone(future.exception())
+        self.connection.pending.append(('c1', 'f1'))
+        self.connection._on_data(b'+OK\r\n')
+        self.on_response.assert_called_once_with('c1', 'f1', b'OK')
+
+    def test_close_fails_pending_commands(self):
+        future = concurrent.Future()
+        self.connection.pending.append((mock.Mock(), future))
+        self.connection._on_closed()
+        self.assertIsInstance(future.exception(), exceptions.ConnectionError)
+
+
+class ConnectionPoolTestCase(base.AsyncTestCase):
+
+    def get_client(self):
+        return tredis.Client(
+            [{'host': self.redis_host,
+              'port': self.redis_port,
+              'db': self.redis_db}],
+            auto_connect=self.AUTO_CONNECT,
+            pool_min_size=2,
+            pool_max_size=4,
+            pool_idle_timeout=0.1)
+
+    def test_invalid_pool_size_raises(self):
+        with self.assertRaises(ValueError):
+            tredis.Client([{'host': self.redis_host,
+                            'port': self.redis_port}],
+                          auto_connect=False,
+                          pool_min_size=2,
+                          pool_max_size=1)
+
+    @testing.gen_test
+    def test_min_size_connections_are_opened(self):
+        yield self.client.set('foo', 'bar', 10)
+        pool = self.client._connection
+        self.assertEqual(len(pool.connections), 2)
+        self.assertTrue(all(c.connected for c in pool.connections))
+
+    @testing.gen_test
+    def test_pool_grows_to_max_size_under_load(self):
+        yield self.client.set('foo', 'bar', 10)
+        pool = self.client._connection
+        keys = [self.uuid4() for _offset in range(0, 20)]
+        futures = [self.client.set(key, key, 10) for key in keys]
+        self.assertEqual(len(pool.connections), 4)
+        results = yield futures
+        self.assertTrue(all(results))
+        values = yield [self.client.get(key) for key in keys]
+        self.assertListEqual(values, keys)
+
+    @testing.gen_test
+    def test_new_connections_select_database(self):
+        key, value = self.uuid4(2)
+        yield self.client.set(key, value, 10)
+        futures = [self.client.get(key) for _offset in range(0, 20)]
+        self.assertEqual(len(self.client._connection.connections), 4)
+        results = yield futures
+        self.assertListEqual(results, [value] * 20)
+
+    @testing.gen_test
+    def test_least_outstanding_connection_is_used(self):
+        yield self.client.set('foo', 'bar', 10)
+        pool = self.client._connection
+        first = self.client.get('foo')
+        second = self.client.get('foo')
+        self.assertEqual(pool.connections[0].outstanding, 1)
+        self.assertEqual(pool.connections[1].outstanding, 1)
+        yield [first, second]
+
+    @testing.gen_test
+    def test_batches_awaiting_connect_are_outstanding(self):
+        connection = tredis_client._Connection(
+            self.redis_host, self.redis_port, self.redis_db,
+            self.client._on_response, mock.Mock(), self.io_loop)
+        futures = [concurrent.Future() for _offset in range(0, 3)]
+        connection.execute_many([
+            (tredis_client.Command(b'*1\r\n$4\r\nPING\r\n', connection,
+                                   b'PONG', None), future)
+            for future in futures])
+        self.assertEqual(connection.outstanding, 3)
+        results = yield futures
+        self.assertListEqual(results, [True] * 3)
+        self.assertEqual(connection.outstanding, 0)
+        connection.close()
+
+    @testing.gen_test
+    def test_commands_wait_for_the_connection_setup(self):
+        setup = concurrent.Future()
+        connection = tredis_client._Connection(
+            self.redis_host, self.redis_port, self.redis_db,
+            self.client._on_response, mock.Mock(), self.io_loop,
+            on_connect=lambda _connection: setup)
+        connect_future = connection.connect()
+        while not connection.connected:
+            yield gen.sleep(0.01)
+        future = concurrent.Future()
+        connection.execute(
+            tredis_client.Command(b'*1\r\n$4\r\nPING\r\n', connection,
+                                  b'PONG', None), future)
+        yield gen.sleep(0.05)
+        self.assertFalse(future.done())
+        self.assertEqual(len(connection.pending), 0)
+        self.assertEqual(connection.outstanding, 1)
+        setup.set_result(True)
+        yield connect_future
+        result = yield future
+        self.assertTrue(result)
+        connection.close()
+
+    @testing.gen_test
+    def test_idle_connections_are_closed(self):
+        yield self.client.set('foo', 'bar', 10)
+        pool = self.client._connection
+        yield [self.client.get('foo') for _offset in range(0, 20)]
+        self.assertEqual(len(pool.connections), 4)
+        yield gen.sleep(0.3)
+        self.assertEqual(len(pool.connections), 2)
+        result = yield self.client.get('foo')
+        self.assertEqual(result, b'bar')
+
+    @testing.gen_test
+    def test_select_changes_database_on_all_connections(self):
+        yield self.client.set('foo', 'bar', 10)
+        yield self.client.select(self.redis_db + 1)
+        pool = self.client._connection
+        self.assertTrue(all(c.database == self.redis_db + 1
+                            for c in pool.connections))
+        yield self.client.select(self.redis_db)
@@ -1,20 +1,29 @@
 # -*- coding: utf-8 -*-
+import sys
 import unittest
 
 from tredis import crc16
 
 
+VALUES = [
+    (b'123456789', 0x31c3),
+    (b'Tornado is a Python web framework and asynchronous '
+     b'networking library, originally developed at FriendFeed.', 0x5a2a),
+    (b'\xe2\x9c\x88', 0x8357)]
+
+
 class CRC16TestCase(unittest.TestCase):
 
     def test_for_expected_values(self):
-        for offset, (value, expectation) in enumerate([
-                (b'123456789', 0x31c3),
-                (b'Tornado is a Python web framework and asynchronous '
-                 b'networking library, originally developed at FriendFeed.',
-                 0x5a2a),
-                (b'\xe2\x9c\x88', 0x8357)]):
+        for offset, (value, expectation) in enumerate(VALUES):
             result = crc16.crc16(value)
             self.assertEqual(
                 result, expectation,
                 'Offset {} did not match (0x{:x} != 0x{:x})'.format(
                     offset, result, expectation))
+
+    def test_pure_python_fallback_for_expected_values(self):
+        method = (crc16._py2_crc16 if sys.version_info < (3, 0, 0)
+                  else crc16._py3_crc16)
+        for value, expectation in VALUES:
+            self.assertEqual(method(value), expectation)
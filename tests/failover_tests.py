@@ -2,6 +2,8 @@ import os
 
 from tornado import testing
 
+import tredis
+
 from . import base
 
 
@@ -28,3 +30,29 @@ class FailoverTests(base.AsyncTestCase):
         redis_addr = (self.client._connection.host,
                       self.client._connection.port)
         self.assertNotEqual(redis_addr, expectation)
+
+    @testing.gen_test
+    def test_that_concurrent_writes_are_queued_during_failover(self):
+        yield self.client.connect()
+        keys = self.uuid4(10)
+        results = yield [self.client.hset(key, key, key) for key in keys]
+        self.assertListEqual(results, [1] * 10)
+        self.assertNotEqual(self.client._connection.port, self.redis_port)
+        self.assertFalse(self.client._failing_over)
+        results = yield [self.client.hget(key, key) for key in keys]
+        self.assertListEqual(results, list(keys))
+
+    @testing.gen_test
+    def test_that_commands_beyond_the_failover_queue_size_fail(self):
+        self.client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port,
+              'db': self.redis_db}], auto_connect=False,
+            failover_queue_size=1)
+        yield self.client.connect()
+        key, field, value = self.uuid4(3)
+        futures = [self.client.hset(key, field, value) for _i in range(3)]
+        result = yield futures[0]
+        self.assertEqual(result, 1)
+        for future in futures[1:]:
+            with self.assertRaises(tredis.ConnectionError):
+                yield future
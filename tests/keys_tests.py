@@ -321,6 +321,22 @@ class KeyCommandTests(base.AsyncTestCase):
             result = yield self.client.delete(key)
             self.assertTrue(result)
 
+    @testing.gen_test
+    def test_scan_iter(self):
+        prefix = self.uuid4()
+        keys = [prefix + b'-' + key for key in self.uuid4(25)]
+        for key in keys:
+            result = yield self.expiring_set(key, key)
+            self.assertTrue(result)
+        iterator = self.client.scan_iter(prefix + b'-*', count=5)
+        values = []
+        while not iterator.done():
+            batch = yield iterator.next()
+            values.extend(batch)
+        self.assertSetEqual(set(values), set(keys))
+        result = yield self.client.delete(*keys)
+        self.assertTrue(result)
+
     @testing.gen_test
     def test_scan_with_pattern(self):
         yield self.client.select(5)
@@ -0,0 +1,84 @@
+import mock
+
+from tornado import testing
+
+from tredis import exceptions
+
+from . import base
+
+
+class PipelineTests(base.AsyncTestCase):
+
+    @testing.gen_test
+    def test_pipeline_returns_results_in_order(self):
+        key1, key2, value1, value2 = self.uuid4(4)
+        pipeline = self.client.pipeline()
+        pipeline.set(key1, value1, 10)
+        pipeline.set(key2, value2, 10)
+        pipeline.get(key1)
+        pipeline.get(key2)
+        pipeline.exists(key1)
+        self.assertEqual(len(pipeline), 5)
+        results = yield pipeline.execute()
+        self.assertListEqual(results, [True, True, value1, value2, True])
+        self.assertEqual(len(pipeline), 0)
+
+    @testing.gen_test
+    def test_pipeline_applies_format_callbacks(self):
+        key, field, value = self.uuid4(3)
+        pipeline = self.client.pipeline()
+        pipeline.hset(key, field, value)
+        pipeline.hgetall(key)
+        pipeline.expire(key, 10)
+        results = yield pipeline.execute()
+        self.assertListEqual(results, [1, {field: value}, True])
+
+    @testing.gen_test
+    def test_pipeline_command_futures_resolve(self):
+        key, value = self.uuid4(2)
+        pipeline = self.client.pipeline()
+        set_future = pipeline.set(key, value, 10)
+        get_future = pipeline.get(key)
+        self.assertFalse(get_future.done())
+        yield pipeline.execute()
+        self.assertTrue(set_future.result())
+        self.assertEqual(get_future.result(), value)
+
+    @testing.gen_test
+    def test_pipeline_uses_a_single_write(self):
+        key, value = self.uuid4(2)
+        yield self.client.set(key, value, 10)  # Establish the connection
+        pipeline = self.client.pipeline()
+        for _offset in range(0, 25):
+            pipeline.get(key)
+        stream = self.client._connection.connections[0]._stream
+        with mock.patch.object(stream, 'write', wraps=stream.write) as write:
+            results = yield pipeline.execute()
+            write.assert_called_once_with(mock.ANY)
+        self.assertListEqual(results, [value] * 25)
+
+    @testing.gen_test
+    def test_empty_pipeline_returns_empty_list(self):
+        results = yield self.client.pipeline().execute()
+        self.assertListEqual(results, [])
+
+    @testing.gen_test
+    def test_pipeline_raises_first_error(self):
+        key, value = self.uuid4(2)
+        pipeline = self.client.pipeline()
+        pipeline.set(key, value, 10)
+        pipeline.hget(key, value)
+        get_future = pipeline.get(key)
+        with self.assertRaises(exceptions.RedisError):
+            yield pipeline.execute()
+        self.assertEqual(get_future.result(), value)
+
+    @testing.gen_test
+    def test_pipeline_select_and_quit_raise(self):
+        pipeline = self.client.pipeline()
+        with self.assertRaises(exceptions.TRedisException):
+            yield pipeline.select(1)
+        with self.assertRaises(exceptions.TRedisException):
+            yield pipeline.quit()
+        self.assertEqual(len(pipeline), 0)
+        self.assertFalse(self.client._closing)
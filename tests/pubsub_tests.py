@@ -0,0 +1,130 @@
+import hiredis
+from tornado import concurrent, gen, testing
+
+from tredis import exceptions
+
+from . import base
+
+
+class PubSubTests(base.AsyncTestCase):
+
+    @gen.coroutine
+    def wait_for_subscribers(self, channel, count=1):
+        for _attempt in range(50):
+            result = yield self.client.pubsub_numsub(channel)
+            if result[channel] >= count:
+                return
+            yield gen.sleep(0.1)
+
+    @testing.gen_test
+    def test_publish_without_subscribers(self):
+        channel, message = self.uuid4(2)
+        result = yield self.client.publish(channel, message)
+        self.assertEqual(result, 0)
+
+    @testing.gen_test
+    def test_subscribe_with_callback_receives_batches(self):
+        channel = self.uuid4()
+        batches = []
+        subscription = yield self.client.subscribe(channel, batches.append)
+        self.assertSetEqual(subscription.channels, {channel})
+        messages = [self.uuid4() for _i in range(100)]
+        for message in messages:
+            self.client.publish(channel, message)
+        for _attempt in range(50):
+            if sum(len(batch) for batch in batches) == len(messages):
+                break
+            yield gen.sleep(0.1)
+        received = [m for batch in batches for m in batch]
+        self.assertListEqual([m.message for m in received], messages)
+        self.assertTrue(all(m.channel == channel for m in received))
+        self.assertLess(len(batches), len(messages))
+
+    @testing.gen_test
+    def test_subscription_next_returns_messages(self):
+        channel, message = self.uuid4(2)
+        subscription = yield self.client.subscribe([channel])
+        result = yield self.client.publish(channel, message)
+        self.assertEqual(result, 1)
+        messages = yield subscription.next()
+        self.assertEqual(messages[0].channel, channel)
+        self.assertEqual(messages[0].message, message)
+        self.assertIsNone(messages[0].pattern)
+
+    @testing.gen_test
+    def test_psubscribe_receives_matching_channels(self):
+        prefix, message = self.uuid4(2)
+        pattern = prefix + b'.*'
+        subscription = yield self.client.psubscribe(pattern)
+        yield self.client.publish(prefix + b'.foo', message)
+        messages = yield subscription.next()
+        self.assertEqual(messages[0].channel, prefix + b'.foo')
+        self.assertEqual(messages[0].pattern, pattern)
+        self.assertEqual(messages[0].message, message)
+        result = yield self.client.pubsub_numpat()
+        self.assertGreaterEqual(result, 1)
+        result = yield self.client.punsubscribe(pattern)
+        self.assertEqual(result, 0)
+        self.assertTrue(subscription.done())
+
+    @testing.gen_test
+    def test_unsubscribe_completes_the_subscription(self):
+        channel1, channel2 = self.uuid4(2)
+        subscription = yield self.client.subscribe([channel1, channel2])
+        future = subscription.next()
+        result = yield self.client.unsubscribe(channel1)
+        self.assertEqual(result, 1)
+        self.assertFalse(subscription.done())
+        result = yield subscription.unsubscribe()
+        self.assertEqual(result, 0)
+        messages = yield future
+        self.assertListEqual(messages, [])
+        self.assertTrue(subscription.done())
+
+    @testing.gen_test
+    def test_commands_execute_while_subscribed(self):
+        channel, key, value = self.uuid4(3)
+        yield self.client.subscribe(channel)
+        result = yield self.expiring_set(key, value)
+        self.assertTrue(result)
+        result = yield self.client.get(key)
+        self.assertEqual(result, value)
+
+    @testing.gen_test
+    def test_pubsub_channels_and_numsub(self):
+        channel = self.uuid4()
+        yield self.client.subscribe(channel)
+        result = yield self.client.pubsub_channels(channel)
+        self.assertListEqual(result, [channel])
+        result = yield self.client.pubsub_numsub(channel)
+        self.assertDictEqual(result, {channel: 1})
+
+    @testing.gen_test
+    def test_subscriptions_are_restored_when_the_connection_closes(self):
+        channel, message = self.uuid4(2)
+        subscription = yield self.client.subscribe(channel)
+        previous = self.client._subscriber
+        previous.close()
+        for _attempt in range(50):
+            if (self.client._subscriber not in (None, previous)
+                    and self.client._subscriber.connected):
+                break
+            yield gen.sleep(0.1)
+        yield self.wait_for_subscribers(channel)
+        yield self.client.publish(channel, message)
+        messages = yield subscription.next()
+        self.assertEqual(messages[0].message, message)
+
+    @testing.gen_test
+    def test_pipeline_subscribe_raises(self):
+        pipeline = self.client.pipeline()
+        with self.assertRaises(exceptions.SubscribedError):
+            yield pipeline.subscribe(self.uuid4())
+
+    def test_error_replies_fail_the_subscription_change(self):
+        future = concurrent.Future()
+        self.client._subscribe_waiters.append([2, future, None])
+        self.client._on_subscriber_messages(
+            [hiredis.ReplyError('ERR denied'), b'unexpected'])
+        self.assertIsInstance(future.exception(), exceptions.RedisError)
+        self.assertEqual(len(self.client._subscribe_waiters), 0)
@@ -0,0 +1,208 @@
+import os
+
+import mock
+from tornado import (concurrent, gen, iostream, netutil, tcpclient, tcpserver,
+                     testing)
+
+import tredis
+from tredis import client, exceptions
+
+from . import base
+
+
+class ReplicaProxy(tcpserver.TCPServer):
+    """Forwards connections to the replica, standing in for a replica that
+    becomes available after the client has connected.
+
+    """
+
+    def __init__(self, host, port):
+        super(ReplicaProxy, self).__init__()
+        self.host = host
+        self.port = port
+
+    @gen.coroutine
+    def handle_stream(self, stream, address):
+        upstream = yield tcpclient.TCPClient().connect(self.host, self.port)
+        self.pipe(stream, upstream)
+        self.pipe(upstream, stream)
+
+    @staticmethod
+    @gen.coroutine
+    def pipe(source, destination):
+        try:
+            while True:
+                destination.write(
+                    (yield source.read_bytes(65536, partial=True)))
+        except iostream.StreamClosedError:
+            destination.close()
+
+
+class ReplicaTests(base.AsyncTestCase):
+
+    AUTO_CONNECT = False
+
+    def setUp(self):
+        super(ReplicaTests, self).setUp()
+        self.reset_slave_relationship()
+
+    def get_client(self):
+        return tredis.Client(
+            [{'host': self.redis_host,
+              'port': self.redis_port,
+              'db': self.redis_db},
+             {'host': self.redis_host,
+              'port': int(os.environ['REDIS2_PORT'])}],
+            auto_connect=self.AUTO_CONNECT,
+            max_replica_lag=10)
+
+    @gen.coroutine
+    def wait_for_replicas(self):
+        for _attempt in range(50):
+            if all(r.connected for r in self.client._replicas):
+                return
+            yield gen.sleep(0.1)
+
+    @staticmethod
+    def info_future(info):
+        future = concurrent.Future()
+        future.set_result(info)
+        return future
+
+    def test_read_from_defaults_to_replica_preferred(self):
+        self.assertEqual(self.client._read_from,
+                         client.READ_FROM_REPLICA_PREFERRED)
+
+    def test_read_from_defaults_to_master_without_replicas(self):
+        redis_client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port}],
+            auto_connect=False)
+        self.assertEqual(redis_client._read_from, client.READ_FROM_MASTER)
+
+    @testing.gen_test
+    def test_writes_are_executed_on_the_master(self):
+        yield self.client.connect()
+        yield self.wait_for_replicas()
+        self.assertIs(self.client._pick_host([b'SET', b'foo', b'bar']),
+                      self.client._connection)
+
+    @testing.gen_test
+    def test_reads_are_executed_on_the_replica(self):
+        yield self.client.connect()
+        yield self.wait_for_replicas()
+        self.assertIs(self.client._pick_host([b'GET', b'foo']),
+                      self.client._replicas[0])
+        key, value = self.uuid4(2)
+        yield self.client.set(key, value, 10)
+        for _attempt in range(10):
+            result = yield self.client.get(key)
+            if result == value:
+                break
+            yield gen.sleep(0.1)
+        self.assertEqual(result, value)
+
+    @testing.gen_test
+    def test_lagging_replica_is_skipped(self):
+        yield self.client.connect()
+        yield self.wait_for_replicas()
+        replica = self.client._replicas[0]
+        self.client._on_replica_info(
+            replica, self.info_future({'master_link_status': 'down'}))
+        self.assertIs(self.client._pick_host([b'GET', b'foo']),
+                      self.client._connection)
+        self.client._on_replica_info(
+            replica, self.info_future({'master_link_status': 'up',
+                                       'slave_repl_offset': 100}))
+        self.assertIs(self.client._pick_host([b'GET', b'foo']), replica)
+
+    @testing.gen_test
+    def test_replica_lag_is_measured_with_replication_offsets(self):
+        yield self.client.connect()
+        yield self.wait_for_replicas()
+        replica = self.client._replicas[0]
+        now = self.io_loop.time()
+        self.client._master_offsets.extend([(now - 30, 100), (now - 20, 200),
+                                            (now, 500)])
+        # An idle master's heartbeat interval does not count as lag
+        self.client._on_replica_info(
+            replica, self.info_future({'master_link_status': 'up',
+                                       'master_last_io_seconds_ago': 10,
+                                       'slave_repl_offset': 200}))
+        self.assertNotIn(replica, self.client._lagging_replicas)
+        self.client._on_replica_info(
+            replica, self.info_future({'master_link_status': 'up',
+                                       'slave_repl_offset': 150}))
+        self.assertIn(replica, self.client._lagging_replicas)
+
+    @testing.gen_test
+    def test_master_offsets_are_trimmed(self):
+        yield self.client.connect()
+        now = self.io_loop.time()
+        self.client._master_offsets.extend([(now - 30, 100), (now - 20, 200),
+                                            (now - 5, 300)])
+        self.client._on_master_info(
+            self.info_future({'master_repl_offset': 400}))
+        self.assertListEqual([o for _t, o in self.client._master_offsets],
+                             [200, 300, 400])
+
+    @testing.gen_test
+    def test_replica_lag_is_read_from_info_replication(self):
+        yield self.client.connect()
+        yield self.wait_for_replicas()
+        replica = self.client._replicas[0]
+        self.client._lagging_replicas.add(replica)
+        self.client._check_replica_lag()
+        for _attempt in range(10):
+            if replica not in self.client._lagging_replicas:
+                break
+            yield gen.sleep(0.1)
+        self.assertNotIn(replica, self.client._lagging_replicas)
+
+    @testing.gen_test
+    def test_read_from_replica_without_replicas_raises(self):
+        self.client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port},
+             {'host': self.redis_host, 'port': 1}],
+            auto_connect=False, read_from=client.READ_FROM_REPLICA)
+        yield self.client.connect()
+        with self.assertRaises(exceptions.ConnectionError):
+            yield self.client.get(b'foo')
+
+    @testing.gen_test
+    def test_replica_that_is_down_is_connected_when_it_comes_up(self):
+        sock, port = testing.bind_unused_port()
+        sock.close()
+        self.client = tredis.Client(
+            [{'host': self.redis_host, 'port': self.redis_port},
+             {'host': '127.0.0.1', 'port': port}],
+            auto_connect=False)
+        proxy = ReplicaProxy(self.redis_host, int(os.environ['REDIS2_PORT']))
+        with mock.patch.object(client, 'REPLICA_RECONNECT_INTERVAL', 0.1):
+            yield self.client.connect()
+            replica = self.client._replicas[0]
+            yield gen.sleep(0.05)
+            self.assertFalse(replica.connected)
+            proxy.add_sockets(netutil.bind_sockets(port, '127.0.0.1'))
+            yield self.wait_for_replicas()
+        proxy.stop()
+        self.assertTrue(replica.connected)
+        self.assertEqual(len(replica.connections), 1)
+        self.assertIs(self.client._pick_host([b'GET', b'foo']), replica)
+
+    @testing.gen_test
+    def test_select_changes_the_replica_database(self):
+        yield self.client.connect()
+        yield self.wait_for_replicas()
+        key, value = self.uuid4(2)
+        yield self.client.select(1)
+        yield self.client.set(key, value, 10)
+        for _attempt in range(10):
+            result = yield self.client.get(key)
+            if result == value:
+                break
+            yield gen.sleep(0.1)
+        self.assertEqual(result, value)
+        self.assertEqual(self.client._replicas[0].database, 1)
+        yield self.client.select(self.redis_db)
+        result = yield self.client.get(key)
+        self.assertIsNone(result)
@@ -0,0 +1,200 @@
+import os
+
+import hiredis
+import mock
+from tornado import gen, iostream, tcpserver, testing
+
+import tredis
+from tredis import client, exceptions
+
+from . import base
+
+
+class FakeSentinel(tcpserver.TCPServer):
+    """A stand-in Redis Sentinel that knows a single master and lets the
+    tests publish ``+switch-master`` messages to its subscribers. When
+    ``drop`` is set, the connection is closed when a request is received.
+
+    """
+
+    def __init__(self, master, address):
+        super(FakeSentinel, self).__init__()
+        self.address = address
+        self.drop = False
+        self.master = master
+        self.subscribers = []
+
+    @gen.coroutine
+    def handle_stream(self, stream, address):
+        reader = hiredis.Reader()
+        try:
+            while True:
+                reader.feed((yield stream.read_bytes(65536, partial=True)))
+                request = reader.gets()
+                while request is not False:
+                    if self.drop:
+                        stream.close()
+                        return
+                    stream.write(self.reply(stream, request))
+                    request = reader.gets()
+        except iostream.StreamClosedError:
+            if stream in self.subscribers:
+                self.subscribers.remove(stream)
+
+    def reply(self, stream, request):
+        if request[0].upper() == b'SUBSCRIBE':
+            self.subscribers.append(stream)
+            return b''.join([b'*3\r\n$9\r\nsubscribe\r\n',
+                             self.bulk(request[1]), b':1\r\n'])
+        elif request[1:] == [b'get-master-addr-by-name', self.master]:
+            host, port = [value.encode('ascii') for value in self.address]
+            return b''.join([b'*2\r\n', self.bulk(host), self.bulk(port)])
+        return b'*-1\r\n'
+
+    def switch_master(self, host, port):
+        message = '{} 127.0.0.1 {} {} {}'.format(
+            self.master.decode('ascii'), self.address[1], host, port)
+        self.address = host, str(port)
+        for stream in self.subscribers:
+            stream.write(b''.join([b'*3\r\n$7\r\nmessage\r\n',
+                                   self.bulk(b'+switch-master'),
+                                   self.bulk(message.encode('ascii'))]))
+
+    @staticmethod
+    def bulk(value):
+        return b''.join([b'$', str(len(value)).encode('ascii'), b'\r\n',
+                         value, b'\r\n'])
+
+
+class SentinelTests(base.AsyncTestCase):
+
+    AUTO_CONNECT = False
+
+    def setUp(self):
+        # The client is created by the base class, so the ports are needed
+        # before the IOLoop that the sentinels listen on exists
+        sockets = [testing.bind_unused_port() for _offset in range(2)]
+        address = self.redis_host, os.environ['REDIS1_PORT']
+        self.sentinels = [(FakeSentinel(b'othermaster', address), sockets[0]),
+                          (FakeSentinel(b'mymaster', address), sockets[1])]
+        super(SentinelTests, self).setUp()
+        for sentinel, (socket, _port) in self.sentinels:
+            sentinel.add_socket(socket)
+        self.sentinel = self.sentinels[1][0]
+
+    def tearDown(self):
+        super(SentinelTests, self).tearDown()
+        for sentinel, _socket in self.sentinels:
+            sentinel.stop()
+
+    def get_client(self):
+        return tredis.Client(
+            [{'host': '127.0.0.1', 'port': port, 'db': self.redis_db}
+             for _sentinel, (_socket, port) in self.sentinels],
+            auto_connect=self.AUTO_CONNECT, sentinel_master='mymaster')
+
+    @gen.coroutine
+    def wait_for_port(self, port):
+        for _attempt in range(50):
+            if (self.client._connection.port == port
+                    and self.client._connection.connected):
+                return
+            yield gen.sleep(0.1)
+
+    @testing.gen_test
+    def test_connects_to_the_master_from_the_second_sentinel(self):
+        yield self.client.connect()
+        self.assertEqual(self.client._connection.port,
+                         int(os.environ['REDIS1_PORT']))
+        self.assertEqual(self.client._sentinel.port, self.sentinels[1][1][1])
+        key, value = self.uuid4(2)
+        result = yield self.client.set(key, value, 5)
+        self.assertTrue(result)
+
+    @testing.gen_test
+    def test_sentinel_that_drops_the_connection_is_skipped(self):
+        self.sentinels[0][0].drop = True
+        yield self.client.connect()
+        self.assertEqual(self.client._sentinel.port, self.sentinels[1][1][1])
+        result = yield self.client.time()
+        self.assertIsInstance(result, float)
+
+    @testing.gen_test
+    def test_unknown_master_raises_connect_error(self):
+        self.client = tredis.Client(
+            [{'host': '127.0.0.1', 'port': self.sentinels[0][1][1]}],
+            auto_connect=False, sentinel_master='mymaster')
+        with self.assertRaises(exceptions.ConnectError):
+            yield self.client.connect()
+
+    @testing.gen_test
+    def test_switch_master_reconnects_before_errors(self):
+        yield self.client.connect()
+        key, value = self.uuid4(2)
+        yield self.client.set(key, value, 5)
+        previous = self.client._connection
+        self.sentinel.switch_master(self.redis_host,
+                                    int(os.environ['REDIS2_PORT']))
+        yield self.wait_for_port(int(os.environ['REDIS2_PORT']))
+        self.assertEqual(self.client._connection.port,
+                         int(os.environ['REDIS2_PORT']))
+        yield gen.sleep(0.1)
+        self.assertFalse(previous.connected)
+
+    @testing.gen_test
+    def test_commands_are_queued_until_the_new_master_connects(self):
+        yield self.client.connect()
+        self.client._failover_to(self.redis_host,
+                                 int(os.environ['REDIS2_PORT']))
+        self.assertTrue(self.client._failing_over)
+        future = self.client.time()
+        self.assertEqual(len(self.client._failover_queue), 1)
+        result = yield future
+        self.assertIsInstance(result, float)
+        self.assertEqual(self.client._connection.port,
+                         int(os.environ['REDIS2_PORT']))
+        self.assertFalse(self.client._failing_over)
+
+    @testing.gen_test
+    def test_failover_keeps_the_selected_database(self):
+        yield self.client.connect()
+        yield self.client.select(2)
+        self.client._failover_to(self.redis_host,
+                                 int(os.environ['REDIS2_PORT']))
+        yield self.wait_for_port(int(os.environ['REDIS2_PORT']))
+        self.assertEqual(self.client._connection.database, 2)
+        self.assertTrue(all(c.database == 2
+                            for c in self.client._connection.connections))
+
+    @testing.gen_test
+    def test_queued_commands_fail_when_no_sentinel_knows_the_master(self):
+        yield self.client.connect()
+        for sentinel, _socket in self.sentinels:
+            sentinel.master = b'unknown'
+        with mock.patch.object(client, 'SENTINEL_RETRY_INTERVAL', 0.2):
+            self.client._connection.connections[0].close()
+            while not self.client._failing_over:
+                yield gen.sleep(0.01)
+            with self.assertRaises(exceptions.ConnectError):
+                yield self.client.time()
+            self.assertTrue(self.client._failing_over)
+            self.sentinel.master = b'mymaster'
+            yield self.wait_for_port(int(os.environ['REDIS1_PORT']))
+        result = yield self.client.time()
+        self.assertIsInstance(result, float)
+        self.assertEqual(self.client._sentinel_retries, 0)
+
+    @testing.gen_test
+    def test_switch_master_for_other_master_is_ignored(self):
+        yield self.client.connect()
+        previous = self.client._connection
+        self.client._on_sentinel_messages(
+            [[b'message', b'+switch-master',
+              b'othermaster 127.0.0.1 6379 127.0.0.1 6380']])
+        self.assertIs(self.client._connection, previous)
+
+    def test_clustering_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            tredis.Client([{'host': '127.0.0.1', 'port': 26379}],
+                          clustering=True, auto_connect=False,
+                          sentinel_master='mymaster')
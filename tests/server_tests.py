@@ -32,6 +32,19 @@ class ServerTests(base.AsyncTestCase):
             result = yield self.client.auth('password')
             self.assertTrue(result)
 
+    @testing.gen_test
+    def test_dbsize_and_flushdb(self):
+        yield self.client.select(9)
+        yield self.client.flushdb()
+        key, value = self.uuid4(2)
+        yield self.client.set(key, value, 10)
+        result = yield self.client.dbsize()
+        self.assertEqual(result, 1)
+        result = yield self.client.flushdb()
+        self.assertTrue(result)
+        result = yield self.client.dbsize()
+        self.assertEqual(result, 0)
+
     @testing.gen_test
     def test_echo_response(self):
         value = b'echo-test'
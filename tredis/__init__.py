@@ -4,7 +4,8 @@ TRedis
 An asynchronous Redis client for Tornado
 
 """
-from tredis.client import Client, RedisClient
+from tredis.client import (Client, Message, Pipeline, RedisClient,
+                           ScanIterator, Subscription)
 from tredis.exceptions import *
 from tredis.strings import BITOP_AND, BITOP_OR, BITOP_XOR, BITOP_NOT
 
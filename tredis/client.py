@@ -2,8 +2,11 @@
 Cluster Supporting Redis Client
 
 """
+import array
 import collections
+import functools
 import logging
+import random
 
 import hiredis
 from tornado import concurrent
@@ -13,7 +16,6 @@ from tornado import iostream
 from tornado import tcpclient
 
 from tredis import common
-from tredis import crc16
 from tredis import exceptions
 from tredis import cluster
 from tredis import connection
@@ -43,9 +45,119 @@ DEFAULT_PORT = 6379
 DEFAULT_DB = 0
 """The default database number to use"""
 
+DEFAULT_MAX_BATCH_BYTES = 65536
+"""The default maximum number of bytes to coalesce into a single write"""
+
+DEFAULT_MAX_BATCH_COMMANDS = 512
+"""The default maximum number of commands to coalesce into a single write"""
+
+DEFAULT_POOL_MIN_SIZE = 1
+"""The default minimum number of connections to each Redis server"""
+
+DEFAULT_POOL_MAX_SIZE = 1
+"""The default maximum number of connections to each Redis server"""
+
+DEFAULT_POOL_IDLE_TIMEOUT = 60
+"""The default number of seconds before idle pooled connections are closed"""
+
+DEFAULT_FAILOVER_QUEUE_SIZE = 1024
+"""The default maximum number of commands held while failing over to a new
+master"""
+
 HASH_SLOTS = 16384
 """Redis Cluster Hash Slots Value"""
 
+UNASSIGNED_SLOT = 0xffff
+"""Slot lookup table value for hash slots without a known cluster node"""
+
+REDIRECT_REFRESH_THRESHOLD = 16
+"""The number of ``MOVED`` redirects received since the last cluster topology
+refresh that trigger a full refresh"""
+
+REDIRECT_REFRESH_INTERVAL = 5
+"""The minimum number of seconds between redirect triggered cluster topology
+refreshes"""
+
+DROPPED_NODE_CLOSE_DELAY = 1
+"""The number of seconds to wait before re-checking a cluster node that was
+dropped from the topology, or a master replaced by a Sentinel failover, for
+outstanding commands prior to closing it"""
+
+REPLICA_LAG_CHECK_INTERVAL = 1
+"""The number of seconds between replica lag checks when ``max_replica_lag``
+is set"""
+
+REPLICA_RECONNECT_INTERVAL = 5
+"""The number of seconds to wait before reconnecting to a replica whose
+connection was closed or could not be established"""
+
+READ_FROM_MASTER = 'master'
+"""Execute all commands on the master serving the hash slot"""
+
+READ_FROM_REPLICA = 'replica'
+"""Execute read-only commands on a replica of the master serving the hash
+slot, failing them if the master does not have any replicas"""
+
+READ_FROM_REPLICA_PREFERRED = 'replica_preferred'
+"""Execute read-only commands on a replica of the master serving the hash
+slot, using the master if it does not have any replicas"""
+
+READ_FROM_NEAREST = 'nearest'
+"""Execute read-only commands on the master or replica serving the hash slot
+with the fewest outstanding commands"""
+
+CLUSTER_CONNECT_ALL = 'all'
+"""Connect to every cluster node when the cluster is discovered"""
+
+CLUSTER_CONNECT_MASTERS = 'masters'
+"""Connect to the cluster masters when the cluster is discovered, connecting
+to replicas when they are first used"""
+
+CLUSTER_CONNECT_LAZY = 'lazy'
+"""Connect to each cluster node when it is first used"""
+
+CLUSTER_CONNECT_POLICIES = (CLUSTER_CONNECT_ALL, CLUSTER_CONNECT_MASTERS,
+                            CLUSTER_CONNECT_LAZY)
+"""The valid ``cluster_connect`` policies"""
+
+CROSS_SLOT_COMMANDS = {b'DEL': 1, b'MGET': 1, b'MSET': 2}
+"""Multi-key commands that are split by hash slot in clustering mode, mapped
+to the number of command parts for each key"""
+
+READ_FROM_POLICIES = (READ_FROM_MASTER, READ_FROM_REPLICA,
+                      READ_FROM_REPLICA_PREFERRED, READ_FROM_NEAREST)
+"""The valid ``read_from`` policies"""
+
+SENTINEL_MAX_RETRY_INTERVAL = 30
+"""The maximum number of seconds to wait before asking the Redis Sentinels
+for the master again"""
+
+SENTINEL_RETRY_INTERVAL = 1
+"""The number of seconds to wait before asking the Redis Sentinels for the
+master again after none of them returned it, doubled on each attempt"""
+
+SENTINEL_SWITCH_MASTER = b'+switch-master'
+"""The Sentinel channel that master failovers are published to"""
+
+CACHED_COMMANDS = frozenset([b'GET', b'HGET', b'HGETALL', b'SMEMBERS'])
+"""The commands whose replies are cached when ``cache_size`` is set"""
+
+TRACKING_INVALIDATE_CHANNEL = b'__redis__:invalidate'
+"""The channel that ``CLIENT TRACKING`` invalidation messages are published
+to when they are redirected to another connection"""
+
+TRACKING_RECONNECT_INTERVAL = 1
+"""The number of seconds to wait before re-establishing client side caching
+when the invalidation connection could not be established"""
+
+SUBSCRIBER_RECONNECT_INTERVAL = 1
+"""The number of seconds to wait before re-establishing the subscriptions
+when the Pub/Sub connection could not be reconnected"""
+
+SUBSCRIPTION_REPLIES = frozenset([b'subscribe', b'psubscribe',
+                                  b'unsubscribe', b'punsubscribe'])
+"""The replies confirming subscription changes on the Pub/Sub connection"""
+
 # Python 2 support for ascii()
 if 'ascii' not in dir(__builtins__):  # pragma: nocover
     from tredis.compat import ascii
@@ -53,14 +165,138 @@ if 'ascii' not in dir(__builtins__):  # pragma: nocover
 Command = collections.namedtuple(
     'Command', ['command', 'connection', 'expectation', 'callback'])
 
+Message = collections.namedtuple('Message', ['channel', 'message', 'pattern'])
+""":class:`tredis.Message` is a :class:`~collections.namedtuple` that
+contains a message published to a channel the client is subscribed to.
+
+.. versionadded:: 0.9.0
+
+:param bytes channel: The channel the message was published to
+:param bytes message: The message
+:param bytes pattern: The pattern that matched the channel, or ``None`` if
+    the client is subscribed to the channel
+
+"""
+
+
+def _aggregate_all(responses):
+    """Return a list of ``1`` or ``0`` indicating if each value is ``1`` in
+    every node's response.
+
+    :param list responses: A list of ``(name, response)`` tuples
+    :rtype: list
+
+    """
+    return [min(values) for values in zip(*[r for _n, r in responses])]
+
+
+def _aggregate_by_node(responses):
+    """Return a dict of each node's response, keyed by the node name.
+
+    :param list responses: A list of ``(name, response)`` tuples
+    :rtype: dict
+
+    """
+    return dict(responses)
+
+
+def _aggregate_concatenate(responses):
+    """Return a list of the values in every node's response.
+
+    :param list responses: A list of ``(name, response)`` tuples
+    :rtype: list
+
+    """
+    return [value for _n, response in responses for value in response]
+
+
+def _aggregate_first(responses):
+    """Return the first node's response, used for commands that return the
+    same response from every node.
+
+    :param list responses: A list of ``(name, response)`` tuples
+    :rtype: mixed
+
+    """
+    return responses[0][1]
+
+
+def _aggregate_sum(responses):
+    """Return the sum of every node's response.
+
+    :param list responses: A list of ``(name, response)`` tuples
+    :rtype: int
+
+    """
+    return sum(response for _n, response in responses)
+
+
+BROADCAST_MASTERS = 'masters'
+"""Broadcast a command to every master serving hash slots"""
+
+BROADCAST_NODES = 'nodes'
+"""Broadcast a command to every master and replica"""
+
+BROADCAST_COMMANDS = {
+    b'DBSIZE': (BROADCAST_MASTERS, _aggregate_sum),
+    b'FLUSHDB': (BROADCAST_MASTERS, _aggregate_first),
+    b'INFO': (BROADCAST_NODES, _aggregate_by_node),
+    b'KEYS': (BROADCAST_MASTERS, _aggregate_concatenate),
+    b'SCRIPT EXISTS': (BROADCAST_NODES, _aggregate_all),
+    b'SCRIPT FLUSH': (BROADCAST_NODES, _aggregate_first),
+    b'SCRIPT LOAD': (BROADCAST_NODES, _aggregate_first)
+}
+"""Node-scoped commands that are executed on every cluster node in
+clustering mode, mapped to the nodes to execute them on and the function
+that merges the responses"""
+
+
+def _when_all(io_loop, futures, callback):
+    """Invoke the callback with the list of futures once all of them are
+    done.
+
+    :param io_loop: The IOLoop to add the futures to
+    :type io_loop: tornado.ioloop.IOLoop
+    :param list futures: The futures to wait on
+    :param method callback: The method to call with the list of futures
+
+    """
+    remaining = [len(futures)]
+
+    def on_done(_):
+        remaining[0] -= 1
+        if not remaining[0]:
+            callback(futures)
+
+    for future in futures:
+        io_loop.add_future(future, on_done)
+
 
 class _Connection(object):
-    """Manages the redis TCP connection.
+    """Manages the redis TCP connection. Commands submitted during the same
+    IOLoop iteration are buffered and coalesced into a single write, and the
+    ``(Command, Future)`` pairs are kept in a FIFO queue once written,
+    allowing multiple commands to be in-flight on the socket at the same
+    time. A single read loop runs for the life of the socket, feeding the
+    connection's reader and matching each reply to the oldest pending
+    command.
 
     :param str host: The hostname to connect to
     :param int port: The port to connect on
     :param int db: The database number to use
+    :param method on_response: The method to call with the command, future,
+        and reply for each reply that is received
     :param method on_close: The method to call if the connection is closed
+    :param int max_batch_bytes: The maximum number of bytes to coalesce into
+        a single write
+    :param int max_batch_commands: The maximum number of commands to
+        coalesce into a single write
+    :param method on_connect: The method to call with the connection when
+        the socket is connected, returning a future that is resolved when
+        the connection setup is complete
+    :param method on_message: The method to call with the list of replies
+        that are received when no command is waiting on a reply, such as the
+        messages published to a subscribed channel
 
     """
 
@@ -68,27 +304,43 @@ class _Connection(object):
                  host,
                  port,
                  db,
-                 on_written,
+                 on_response,
                  on_close,
                  io_loop,
                  cluster_node=False,
                  read_only=False,
-                 slots=None):
+                 slots=None,
+                 max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                 max_batch_commands=DEFAULT_MAX_BATCH_COMMANDS,
+                 on_connect=None,
+                 on_message=None):
         super(_Connection, self).__init__()
         self.connected = False
         self.io_loop = io_loop
         self.host = host
         self.port = port
         self.database = int(db or DEFAULT_DB)
+        self.last_used = io_loop.time()
 
+        self.pending = collections.deque()
+        self.reader = hiredis.Reader()
+
+        self._awaiting_connect = 0
+        self._buffer = []
+        self._buffer_size = 0
         self._client = tcpclient.TCPClient()
         self._cluster_node = cluster_node
+        self._connecting = None
+        self._flush_scheduled = False
+        self._max_batch_bytes = max_batch_bytes
+        self._max_batch_commands = max_batch_commands
         self._read_only = read_only
         self._slots = slots or []
         self._stream = None
-        self._on_connect = None
+        self._on_connect = on_connect
         self._on_close = on_close
-        self._on_written = on_written
+        self._on_message = on_message
+        self._on_response = on_response
 
     def close(self):
         """Close the stream.
@@ -109,11 +361,14 @@ class _Connection(object):
                  :class:`~tredis.exceptinos.RedisError`
 
         """
-        future = concurrent.Future()
-
-        if self.connected:
+        if self._connecting is not None:
+            return self._connecting
+        elif self.connected:
             raise exceptions.ConnectError('already connected')
 
+        future = concurrent.Future()
+        self._connecting = future
+
         LOGGER.debug('%s connecting', self.name)
         self.io_loop.add_future(
             self._client.connect(self.host, self.port),
@@ -121,24 +376,57 @@ class _Connection(object):
         return future
 
     def execute(self, command, future):
-        """Execute a command after connecting if necessary.
+        """Execute a command after connecting if necessary. Commands are not
+        written until the connection setup has completed.
 
         :param bytes command: command to execute after the connection
             is established
         :param tornado.concurrent.Future future:  future to resolve
-            when the command's response is received.
+            when the command's response is received, or ``None`` if the
+            replies to the command are passed to the message callback
 
         """
         LOGGER.debug('execute(%r, %r)', command, future)
-        if self.connected:
+        if self.connected and self._connecting is None:
             self._write(command, future)
         else:
 
             def on_connected(cfuture):
+                self._awaiting_connect -= 1
                 if cfuture.exception():
-                    return future.set_exception(cfuture.exception())
+                    if future is not None:
+                        future.set_exception(cfuture.exception())
+                    return
                 self._write(command, future)
 
+            self._awaiting_connect += 1
+            self.io_loop.add_future(self.connect(), on_connected)
+
+    def execute_many(self, commands):
+        """Execute multiple commands with a single write to the socket,
+        connecting if necessary.
+
+        :param list commands: A list of ``(Command, Future)`` tuples to
+            execute in order
+
+        """
+        LOGGER.debug('execute_many(%i commands)', len(commands))
+        if self.connected and self._connecting is None:
+            self._flush()
+            self._write_many(commands)
+        else:
+
+            def on_connected(cfuture):
+                self._awaiting_connect -= len(commands)
+                if cfuture.exception():
+                    for _command, future in commands:
+                        if future is not None:
+                            future.set_exception(cfuture.exception())
+                    return
+                self._flush()
+                self._write_many(commands)
+
+            self._awaiting_connect += len(commands)
             self.io_loop.add_future(self.connect(), on_connected)
 
     @property
@@ -151,14 +439,35 @@ class _Connection(object):
         """
         return '{}:{}'.format(self.host, self.port)
 
-    def read(self, callback):
-        """Issue a read on the stream, invoke callback when completed.
+    def setup(self, command, future):
+        """Execute a command that sets up the connection, such as ``SELECT``,
+        ahead of the commands that are waiting for the setup to complete.
 
-        :raises: :class:`tredis.exceptions.ConnectionError` if the
-            stream is not currently connected
+        :param bytes command: command to execute
+        :param tornado.concurrent.Future future:  future to resolve
+            when the command's response is received.
+
+        """
+        self._write(command, future)
+
+    @property
+    def outstanding(self):
+        """Return the number of commands that are buffered, waiting on the
+        connection to be established, or awaiting a reply.
+
+        :rtype: int
 
         """
-        self._stream.read_bytes(65536, callback, None, True)
+        return len(self.pending) + len(self._buffer) + self._awaiting_connect
+
+    @property
+    def read_only(self):
+        """Indicates the connection is to a cluster replica.
+
+        :rtype: bool
+
+        """
+        return self._read_only
 
     def set_read_only(self, read_only):
         """Change the connection's read-only flag in the client.
@@ -185,12 +494,56 @@ class _Connection(object):
         return self._slots
 
     def _on_closed(self):
-        """Invoked when the connection is closed"""
+        """Invoked when the connection is closed, failing any commands that
+        are still waiting on a reply. The reader is replaced so that a
+        partial reply from the closed socket can not corrupt the replies
+        received if the connection is re-established.
+
+        """
         LOGGER.error('Redis connection closed')
         self.connected = False
+        self.reader = hiredis.Reader()
+        commands, self._buffer, self._buffer_size = self._buffer, [], 0
+        commands = list(self.pending) + commands
+        self.pending.clear()
+        for _command, future in commands:
+            if future is not None and not future.done():
+                future.set_exception(
+                    exceptions.ConnectionError('connection closed'))
         self._on_close()
         self._stream = None
 
+    def _on_data(self, data):
+        """Invoked by the stream's read loop as data is received, feeding the
+        reader and dispatching every complete reply to the oldest pending
+        command. Replies received when no command is pending are passed to
+        the message callback if one is set, in a single batch for all of the
+        data that was received.
+
+        :param bytes data: The data that was received
+
+        """
+        self.reader.feed(data)
+        messages = []
+        while self.pending or self._on_message is not None:
+            response = self.reader.gets()
+            if response is False:
+                break
+            elif not self.pending:
+                messages.append(response)
+                continue
+            command, future = self.pending.popleft()
+            self._on_response(command, future, response)
+        if messages:
+            self._on_message(messages)
+
+    def _on_read_closed(self, _data):
+        """Invoked when the stream's read loop ends because the stream was
+        closed. Pending commands are failed by the close callback.
+
+        """
+        LOGGER.debug('%s read loop stopped', self.name)
+
     def _on_connected(self, stream_future, connect_future):
         """Invoked when the socket stream has connected, setting up the
         stream callbacks and invoking the on connect callback if set.
@@ -203,209 +556,1293 @@ class _Connection(object):
 
         """
         if stream_future.exception():
+            self._connecting = None
             connect_future.set_exception(
                 exceptions.ConnectError(stream_future.exception()))
-        else:
-            self._stream = stream_future.result()
-            self._stream.set_close_callback(self._on_closed)
-            self.connected = True
+            return
+
+        self._stream = stream_future.result()
+        self._stream.set_close_callback(self._on_closed)
+        self._stream.read_until_close(self._on_read_closed, self._on_data)
+        self.connected = True
+        if self._on_connect is None:
+            self._connecting = None
             connect_future.set_result(self)
+            return
+
+        def on_setup(setup_future):
+            self._connecting = None
+            if setup_future.exception():
+                connect_future.set_exception(setup_future.exception())
+            else:
+                connect_future.set_result(self)
+
+        self.io_loop.add_future(self._on_connect(self), on_setup)
+
+    def _flush(self):
+        """Write all of the buffered commands to the socket in a single
+        write.
+
+        """
+        self._flush_scheduled = False
+        if not self._buffer:
+            return
+        commands, self._buffer, self._buffer_size = self._buffer, [], 0
+        self._write_many(commands)
 
     def _write(self, command, future):
-        """Write a command to the socket
+        """Buffer a command to be written to the socket. The buffer is
+        flushed on the next IOLoop iteration, or immediately if writing the
+        command would exceed the maximum batch size in bytes or commands.
+        Commands larger than the maximum batch size are written on their own.
 
         :param Command command: the Command data structure
+        :param tornado.concurrent.Future future:  future to resolve
+            when the command's response is received.
 
         """
+        size = len(command.command)
+        if self._buffer and self._buffer_size + size > self._max_batch_bytes:
+            self._flush()
+        self._buffer.append((command, future))
+        self._buffer_size += size
+        self.last_used = self.io_loop.time()
+        if (len(self._buffer) >= self._max_batch_commands
+                or self._buffer_size >= self._max_batch_bytes):
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.io_loop.add_callback(self._flush)
+
+    def _write_many(self, commands):
+        """Write multiple commands to the socket in a single write, adding
+        the commands that have a future to the pending queue.
+
+        :param list commands: A list of ``(Command, Future)`` tuples
 
-        def on_written():
-            self._on_written(command, future)
-
+        """
+        if not self.connected:
+            for _command, future in commands:
+                if future is not None:
+                    future.set_exception(exceptions.ConnectionError('closed'))
+            return
         try:
-            self._stream.write(command.command, callback=on_written)
-        except iostream.StreamClosedError as error:
-            future.set_exception(exceptions.ConnectionError(error))
+            self._stream.write(b''.join([c.command for c, _f in commands]))
         except Exception as error:
-            LOGGER.exception('unhandled write failure - %r', error)
-            future.set_exception(exceptions.ConnectionError(error))
-
-
-class Client(server.ServerMixin, keys.KeysMixin, strings.StringsMixin,
-             geo.GeoMixin, hashes.HashesMixin, hyperloglog.HyperLogLogMixin,
-             lists.ListsMixin, sets.SetsMixin, sortedsets.SortedSetsMixin,
-             pubsub.PubSubMixin, connection.ConnectionMixin,
-             cluster.ClusterMixin, scripting.ScriptingMixin,
-             transactions.TransactionsMixin):
-    """Asynchronous Redis client that supports Redis with master/slave failover
-    and clustering. When ``clustering`` is ``True``, the client will
-    automatically discover all of the nodes in the cluster and connect to them.
-
-    The ``hosts`` argument should contain a list of Redis servers to connect
-    to. The connection information for the server should be a :class:`dict`. In
-    the following example, the client will connect to Redis running at
-    ``127.0.0.1`` on port ``6379`` using database # ``2``:
-
-    .. code:: python
-
-        class RequestHandler(web.RequestHandler):
-
-            @gen.coroutine
-            def connect_to_redis(self)
-                client = tredis.Client([{
-                        'host': '127.0.0.1', 'port': 6379, 'db': 2
-                    }], auto_connect=False, clustering=True)
-                yield client.connect()
-
-    When ``auto_connect`` is set to ``True``, the connection to the Redis
-    server or the Redis cluster starts on creation of the client. You should be
-    aware that this will not block on creation and the connection will be
-    established asynchronously in the background. Any requests made with the
-    client while it is connecting will block until the connection is available.
+            if not isinstance(error, iostream.StreamClosedError):
+                LOGGER.exception('unhandled write failure - %r', error)
+            for _command, future in commands:
+                if future is not None:
+                    future.set_exception(exceptions.ConnectionError(error))
+        else:
+            self.pending.extend([(c, f) for c, f in commands if f is not None])
 
-    When ``auto_connect`` is set to ``False``, you will need to invoke the
-    :meth:`~tredis.Client.connect` method, yielding to the
-    :class:`~tornado.concurrent.Future` that it returns.
 
-    .. added: 0.7.0
+class _Cache(object):
+    """A bounded least recently used cache of the replies to read-only
+    commands, grouped by key so that every cached reply for a key is evicted
+    when the key is invalidated.
 
-    :param hosts: A list of host connection values.
-    :type hosts: list(dict)
-    :param io_loop: Override the current Tornado IOLoop instance
-    :type io_loop: tornado.ioloop.IOLoop
-    :param method on_close: The method to call if the connection is closed
-    :param bool clustering: Toggle the cluster support in the client
-    :param bool auto_connect: Toggle the auto-connect on creation feature
+    Keys are reserved while the commands reading them are in-flight. If the
+    key is invalidated before the reply is received, the reply is not cached,
+    preventing a stale reply from being cached when the invalidation message
+    is received before it.
 
+    :param int max_size: The maximum number of keys to cache replies for
 
     """
 
-    def __init__(self,
-                 hosts,
-                 on_close=None,
-                 io_loop=None,
-                 clustering=False,
-                 auto_connect=True):
-        """Create a new instance of the ``Client`` class.
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._reserved = {}
 
-        :param hosts: A list of host connection values.
-        :type hosts: list(dict)
-        :param io_loop: Override the current Tornado IOLoop instance
-        :type io_loop: tornado.ioloop.IOLoop
-        :param method on_close: The method to call if the connection is closed
-        :param bool clustering: Toggle the cluster support in the client
-        :param bool auto_connect: Toggle the auto-connect on creation feature
+    def __len__(self):
+        return len(self._entries)
 
-        """
-        self._buffer = bytes()
-        self._busy = locks.Lock()
-        self._closing = False
-        self._cluster = {}
-        self._clustering = clustering
-        self._connected = locks.Event()
-        self._connect_future = concurrent.Future()
-        self._connection = None
-        self._discovery = False
-        self._hosts = hosts
-        self._on_close_callback = on_close
-        self._reader = hiredis.Reader()
-        self.io_loop = io_loop or ioloop.IOLoop.current()
-        if not self._clustering:
-            if len(hosts) > 1:
-                raise ValueError('Too many hosts for non-clustering mode')
-        if auto_connect:
-            LOGGER.debug('Auto-connecting')
-            self.connect()
+    def clear(self):
+        """Evict every key from the cache."""
+        self._entries.clear()
+        for token in self._reserved.values():
+            token[1] = False
 
-    def connect(self):
-        """Connect to the Redis server or Cluster.
+    def get(self, key, field):
+        """Return the cached reply for a key, marking the key as recently
+        used.
 
-        :rtype: tornado.concurrent.Future
+        :param bytes key: The key
+        :param tuple field: The command and arguments the reply is for
+        :rtype: mixed
+        :raises: :exc:`KeyError`
 
         """
-        LOGGER.debug('Creating a%s connection to %s:%s (db %s)',
-                     ' cluster node'
-                     if self._clustering else '', self._hosts[0]['host'],
-                     self._hosts[0]['port'], self._hosts[0].get(
-                         'db', DEFAULT_DB))
-        self._connect_future = concurrent.Future()
-        conn = _Connection(
-            self._hosts[0]['host'],
-            self._hosts[0]['port'],
-            self._hosts[0].get('db', DEFAULT_DB),
-            self._read,
-            self._on_closed,
-            self.io_loop,
-            cluster_node=self._clustering)
-        self.io_loop.add_future(conn.connect(), self._on_connected)
-        return self._connect_future
+        fields = self._entries.pop(key)
+        self._entries[key] = fields
+        return fields[field]
 
-    def close(self):
-        """Close any open connections to Redis.
+    def invalidate(self, key):
+        """Evict a key from the cache, preventing the replies for in-flight
+        commands reading the key from being cached.
 
-        :raises: :exc:`tredis.exceptions.ConnectionError`
+        :param bytes key: The key
 
         """
-        if not self._connected.is_set():
-            raise exceptions.ConnectionError('not connected')
-        self._closing = True
-        if self._clustering:
-            for host in self._cluster.keys():
-                self._cluster[host].close()
-        elif self._connection:
-            self._connection.close()
+        self._entries.pop(key, None)
+        if key in self._reserved:
+            self._reserved[key][1] = False
 
-    @property
-    def ready(self):
-        """Indicates that the client is connected to the Redis server or
-        cluster and is ready for use.
+    def release(self, key, token):
+        """Release the reservation of a key once the command reading it has
+        completed.
 
-        :rtype: bool
+        :param bytes key: The key
+        :param list token: The reservation returned by :meth:`reserve`
 
         """
-        if self._clustering:
-            return (all([c.connected for c in self._cluster.values()])
-                    and len(self._cluster))
-        return (self._connection and self._connection.connected)
+        token[0] -= 1
+        if not token[0] and self._reserved.get(key) is token:
+            del self._reserved[key]
 
-    def _build_command(self, parts):
-        """Build the command that will be written to Redis via the socket
+    def reserve(self, key):
+        """Reserve a key while a command reading it is in-flight.
 
-        :param list parts: The list of strings for building the command
-        :rtype: bytes
+        :param bytes key: The key
+        :rtype: list
 
         """
-        return self._encode_resp(parts)
+        token = self._reserved.get(key)
+        if token is None:
+            token = self._reserved[key] = [0, True]
+        token[0] += 1
+        return token
+
+    def store(self, key, field, token, response):
+        """Cache the reply to a command if the key was not invalidated while
+        the command was in-flight, evicting the least recently used keys when
+        the cache is full.
+
+        :param bytes key: The key
+        :param tuple field: The command and arguments the reply is for
+        :param list token: The reservation returned by :meth:`reserve`
+        :param mixed response: The reply
 
-    def _create_cluster_connection(self, node):
-        """Create a connection to a Redis server.
+        """
+        if not token[1]:
+            return
+        fields = self._entries.pop(key, {})
+        fields[field] = response
+        self._entries[key] = fields
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
 
-        :param node: The node to connect to
-        :type node: tredis.cluster.ClusterNode
 
-        """
-        LOGGER.debug('Creating a cluster connection to %s:%s', node.ip,
-                     node.port)
-        conn = _Connection(
-            node.ip,
-            node.port,
-            0,
-            self._read,
-            self._on_closed,
-            self.io_loop,
-            cluster_node=True,
-            read_only='slave' in node.flags,
-            slots=node.slots)
-        self.io_loop.add_future(conn.connect(), self._on_connected)
+class _ConnectionPool(object):
+    """Manages a pool of connections to a single Redis server, keeping at
+    least ``min_size`` connections open. Commands are executed on the
+    connection with the fewest outstanding commands. When every connection
+    has outstanding commands, new connections are opened until the pool
+    reaches ``max_size``. Connections above ``min_size`` that have been idle
+    for ``idle_timeout`` seconds are closed.
 
-    def _encode_resp(self, value):
-        """Dynamically build the RESP payload based upon the list provided.
+    :param str host: The hostname to connect to
+    :param int port: The port to connect on
+    :param int db: The database number to use
+    :param method on_response: The method to call with the command, future,
+        and reply for each reply that is received
+    :param method on_close: The method to call if a connection is closed
+    :param method on_connect: The method to call with each connection when
+        its socket is connected, returning a future that is resolved when
+        the connection setup is complete
+    :param method on_disconnect: The method to call with each connection
+        that is closed, including idle connections closed by the pool
+    :param int min_size: The minimum number of connections to keep open
+    :param int max_size: The maximum number of connections to open
+    :param int idle_timeout: Seconds before closing idle connections above
+        the minimum pool size
 
-        :param mixed value: The list of command parts to encode
-        :rtype: bytes
+    """
 
-        """
-        if isinstance(value, bytes):
-            return b''.join(
+    def __init__(self,
+                 host,
+                 port,
+                 db,
+                 on_response,
+                 on_close,
+                 io_loop,
+                 cluster_node=False,
+                 read_only=False,
+                 slots=None,
+                 on_connect=None,
+                 on_disconnect=None,
+                 min_size=DEFAULT_POOL_MIN_SIZE,
+                 max_size=DEFAULT_POOL_MAX_SIZE,
+                 idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+                 max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                 max_batch_commands=DEFAULT_MAX_BATCH_COMMANDS):
+        if not 0 < min_size <= max_size:
+            raise ValueError('Invalid pool size ({}, {})'.format(
+                min_size, max_size))
+        self.connections = []
+        self.io_loop = io_loop
+        self.host = host
+        self.port = port
+
+        self._cluster_node = cluster_node
+        self._database = int(db or DEFAULT_DB)
+        self._idle_timeout = idle_timeout
+        self._max_batch_bytes = max_batch_bytes
+        self._max_batch_commands = max_batch_commands
+        self._max_size = max_size
+        self._min_size = min_size
+        self._on_close = on_close
+        self._on_connect = on_connect
+        self._on_disconnect = on_disconnect
+        self._on_response = on_response
+        self._read_only = read_only
+        self._reap_timeout = None
+        self._reaped = set()
+        self._slots = slots or []
+
+    def close(self):
+        """Close all of the connections in the pool.
+
+        :raises: :class:`tredis.exceptions.ConnectionError` if the
+            pool has no open connections
+
+        """
+        if self._reap_timeout is not None:
+            self.io_loop.remove_timeout(self._reap_timeout)
+            self._reap_timeout = None
+        connections = [c for c in self.connections if c.connected]
+        if not connections:
+            raise exceptions.ConnectionError('Not connected')
+        for connection in connections:
+            self._reaped.add(connection)
+            connection.close()
+
+    def connect(self):
+        """Open the minimum number of connections for the pool, reconnecting
+        the connections in the pool that could not be established.
+
+        :rtype: :class:`~tornado.concurrent.Future`
+        :raises: :class:`~tredis.exceptions.ConnectError`
+                 :class:`~tredis.exceptinos.RedisError`
+
+        """
+        future = concurrent.Future()
+        connections = [c for c in self.connections if not c.connected]
+        connections += [self._add_connection()
+                        for _i in range(len(self.connections), self._min_size)]
+        remaining = [len(connections)]
+
+        def on_connected(cfuture):
+            remaining[0] -= 1
+            if cfuture.exception() and not future.done():
+                future.set_exception(cfuture.exception())
+            elif not remaining[0] and not future.done():
+                future.set_result(self)
+
+        for connection in connections:
+            self.io_loop.add_future(connection.connect(), on_connected)
+        if not connections:
+            future.set_result(self)
+        return future
+
+    @property
+    def connected(self):
+        """Indicates that at least one connection in the pool is connected.
+
+        :rtype: bool
+
+        """
+        return any(c.connected for c in self.connections)
+
+    @property
+    def database(self):
+        """Return the database number used by the pool's connections.
+
+        :rtype: int
+
+        """
+        return self._database
+
+    @database.setter
+    def database(self, value):
+        """Change the database used by the pool's connections. Connected
+        connections that are not already using the database have their
+        setup re-run, which selects the database.
+
+        :param int value: The database number
+
+        """
+        self._database = value
+        for connection in self.connections:
+            if connection.database != value:
+                connection.database = value
+                if connection.connected and self._on_connect:
+                    self.io_loop.add_future(
+                        self._on_connect(connection),
+                        common.maybe_raise_exception)
+
+    def execute(self, command, future):
+        """Execute a command on the connection with the fewest outstanding
+        commands, opening a new connection if necessary.
+
+        :param bytes command: command to execute after the connection
+            is established
+        :param tornado.concurrent.Future future:  future to resolve
+            when the command's response is received.
+
+        """
+        self._pick_connection().execute(command, future)
+
+    def execute_many(self, commands):
+        """Execute multiple commands with a single write on the connection
+        with the fewest outstanding commands.
+
+        :param list commands: A list of ``(Command, Future)`` tuples to
+            execute in order
+
+        """
+        self._pick_connection().execute_many(commands)
+
+    @property
+    def name(self):
+        """Return the connection name as it is returned in the cluster nodes
+        command.
+
+        :rtype: str
+
+        """
+        return '{}:{}'.format(self.host, self.port)
+
+    @property
+    def outstanding(self):
+        """Return the number of commands outstanding across the pool.
+
+        :rtype: int
+
+        """
+        return sum(c.outstanding for c in self.connections)
+
+    @property
+    def read_only(self):
+        """Indicates the pool's connections are to a cluster replica.
+
+        :rtype: bool
+
+        """
+        return self._read_only
+
+    def set_read_only(self, read_only):
+        """Change the pool's read-only flag in the client. Connected
+        connections that become read-only have their setup re-run.
+
+        :param bool read_only: Value to set
+        """
+        self._read_only = read_only
+        for connection in self.connections:
+            if connection.read_only != read_only:
+                connection.set_read_only(read_only)
+                if (read_only and connection.connected
+                        and self._on_connect):
+                    self.io_loop.add_future(
+                        self._on_connect(connection),
+                        common.maybe_raise_exception)
+
+    def set_slots(self, slots):
+        """Change the pool's slot list in the client.
+
+        :param list slots: The updated slot values
+
+        """
+        self._slots = slots
+
+    @property
+    def slots(self):
+        """Return the pool's slot values for clustering.
+
+        :rtype: list
+
+        """
+        return self._slots
+
+    def _add_connection(self):
+        """Create a new connection and add it to the pool.
+
+        :rtype: tredis.client._Connection
+
+        """
+        connection = _Connection(
+            self.host,
+            self.port,
+            self._database,
+            self._on_response,
+            lambda: self._on_closed(connection),
+            self.io_loop,
+            cluster_node=self._cluster_node,
+            read_only=self._read_only,
+            max_batch_bytes=self._max_batch_bytes,
+            max_batch_commands=self._max_batch_commands,
+            on_connect=self._on_connect)
+        self.connections.append(connection)
+        if (len(self.connections) > self._min_size
+                and self._reap_timeout is None):
+            self._reap_timeout = self.io_loop.call_later(
+                self._idle_timeout, self._reap_idle_connections)
+        return connection
+
+    def _on_closed(self, connection):
+        """Invoked when a connection in the pool is closed, removing it from
+        the pool. The pool's close callback is not invoked for connections
+        that were closed for being idle.
+
+        :param connection: The connection that was closed
+        :type connection: tredis.client._Connection
+
+        """
+        if connection in self.connections:
+            self.connections.remove(connection)
+        if self._on_disconnect is not None:
+            self._on_disconnect(connection)
+        if connection in self._reaped:
+            self._reaped.remove(connection)
+        else:
+            self._on_close()
+
+    def _pick_connection(self):
+        """Return the connection with the fewest outstanding commands,
+        adding a connection to the pool if they all have outstanding commands
+        and the pool is not at its maximum size.
+
+        :rtype: tredis.client._Connection
+
+        """
+        connection = None
+        if self.connections:
+            connection = min(self.connections, key=lambda c: c.outstanding)
+        if connection is None or (connection.outstanding
+                                  and len(self.connections) < self._max_size):
+            connection = self._add_connection()
+        return connection
+
+    def _reap_idle_connections(self):
+        """Close connections above the minimum pool size that have not been
+        used within the idle timeout.
+
+        """
+        self._reap_timeout = None
+        now = self.io_loop.time()
+        for connection in sorted(self.connections, key=lambda c: c.last_used):
+            if len(self.connections) - len(self._reaped) <= self._min_size:
+                break
+            elif (connection.connected and not connection.outstanding
+                  and now - connection.last_used >= self._idle_timeout):
+                LOGGER.debug('Closing idle connection to %s', self.name)
+                self._reaped.add(connection)
+                connection.close()
+        if len(self.connections) - len(self._reaped) > self._min_size:
+            self._reap_timeout = self.io_loop.call_later(
+                self._idle_timeout, self._reap_idle_connections)
+
+
+class Client(server.ServerMixin, keys.KeysMixin, strings.StringsMixin,
+             geo.GeoMixin, hashes.HashesMixin, hyperloglog.HyperLogLogMixin,
+             lists.ListsMixin, sets.SetsMixin, sortedsets.SortedSetsMixin,
+             pubsub.PubSubMixin, connection.ConnectionMixin,
+             cluster.ClusterMixin, scripting.ScriptingMixin,
+             transactions.TransactionsMixin):
+    """Asynchronous Redis client that supports Redis with master/slave failover
+    and clustering. When ``clustering`` is ``True``, the client will
+    automatically discover all of the nodes in the cluster and connect to them.
+
+    The ``hosts`` argument should contain a list of Redis servers to connect
+    to. The connection information for the server should be a :class:`dict`. In
+    the following example, the client will connect to Redis running at
+    ``127.0.0.1`` on port ``6379`` using database # ``2``:
+
+    .. code:: python
+
+        class RequestHandler(web.RequestHandler):
+
+            @gen.coroutine
+            def connect_to_redis(self)
+                client = tredis.Client([{
+                        'host': '127.0.0.1', 'port': 6379, 'db': 2
+                    }], auto_connect=False, clustering=True)
+                yield client.connect()
+
+    When ``auto_connect`` is set to ``True``, the connection to the Redis
+    server or the Redis cluster starts on creation of the client. You should be
+    aware that this will not block on creation and the connection will be
+    established asynchronously in the background. Any requests made with the
+    client while it is connecting will block until the connection is available.
+
+    When ``auto_connect`` is set to ``False``, you will need to invoke the
+    :meth:`~tredis.Client.connect` method, yielding to the
+    :class:`~tornado.concurrent.Future` that it returns.
+
+    Commands that are issued during the same IOLoop iteration are
+    automatically coalesced into a single write to each Redis server. The
+    size of each write is bounded by ``max_batch_bytes`` and
+    ``max_batch_commands``, preventing large values from delaying the
+    commands queued behind them. Setting ``max_batch_commands`` to ``1``
+    writes each command as it is issued.
+
+    The client maintains a pool of connections to each Redis server. By
+    default the pool contains a single connection. When ``pool_max_size`` is
+    greater than ``pool_min_size``, additional connections are opened when
+    every connection in the pool has commands outstanding, preventing a
+    slow command from blocking the commands issued behind it. Commands are
+    executed on the connection with the fewest outstanding commands, and
+    connections above ``pool_min_size`` that are idle for
+    ``pool_idle_timeout`` seconds are closed.
+
+    In clustering mode, setting ``cluster_refresh_interval`` will re-fetch the
+    cluster topology every ``cluster_refresh_interval`` seconds in the
+    background. New nodes are connected to, nodes that are no longer part of
+    the cluster are closed once their outstanding commands have completed,
+    and the hash slot routing is rebuilt without blocking in-flight commands.
+
+    In clustering mode, ``read_from`` controls where read-only commands such
+    as ``GET``, ``HGETALL``, ``ZRANGE``, and ``SMEMBERS`` are executed:
+
+    - ``master``: On the master serving the hash slot (default)
+    - ``replica``: On a replica of the master, failing if it has no replicas
+    - ``replica_preferred``: On a replica of the master, using the master if
+      it has no replicas
+    - ``nearest``: On the master or replica with the fewest outstanding
+      commands
+
+    ``READONLY`` is issued on the connections to replicas when a policy other
+    than ``master`` is used. All other commands are executed on the master.
+
+    In non-clustering mode, the first entry in ``hosts`` is the master and
+    any additional entries are its replicas. Writes are executed on the
+    master and ``read_from`` controls where read-only commands are executed,
+    with ``replica_preferred`` used by default when replicas are provided.
+    Replicas whose connection is closed are skipped until they reconnect.
+    When ``max_replica_lag`` is set, ``INFO REPLICATION`` is run on the
+    master and each replica every second. Replicas that are not connected to
+    the master, or whose replication offset has not reached the offset the
+    master had ``max_replica_lag`` seconds ago, are skipped until they catch
+    up. Commands buffered by a
+    :class:`~tredis.Pipeline` are always executed on the master.
+
+    .. code:: python
+
+        client = tredis.Client([{'host': '10.0.0.1', 'port': 6379},
+                                {'host': '10.0.0.2', 'port': 6379},
+                                {'host': '10.0.0.3', 'port': 6379}],
+                               max_replica_lag=5)
+
+    In clustering mode, commands are routed to the node serving the hash slot
+    of their first key, using :data:`tredis.cluster.KEY_POSITIONS` to find
+    the key. When ``command_info`` is ``True``, the key positions for every
+    command are fetched from Redis with ``COMMAND`` when the cluster is
+    discovered.
+
+    In clustering mode, ``cluster_connect`` controls which nodes are
+    connected to when the cluster is discovered:
+
+    - ``all``: Every master and replica (default)
+    - ``masters``: Only the masters, connecting to replicas when first used
+    - ``lazy``: None of the nodes, connecting to each node when first used
+
+    The client is ready for use once the nodes that are connected to when
+    the cluster is discovered are connected.
+
+    When ``sentinel_master`` is set, the ``hosts`` argument should contain a
+    list of Redis Sentinels instead. The sentinels are asked for the address
+    of the master named ``sentinel_master`` in order with
+    ``SENTINEL get-master-addr-by-name``, and the client connects to the
+    first address returned, using the ``db`` value of the first host. The
+    client subscribes to the sentinel's ``+switch-master`` channel,
+    connecting to the new master as soon as a failover is announced and
+    closing the connection to the old master once its outstanding commands
+    have completed. If none of the sentinels return the master after the
+    client has connected, the queued commands fail with a
+    :exc:`~tredis.exceptions.ConnectError` and the sentinels are asked again
+    with an exponential backoff.
+
+    .. code:: python
+
+        client = tredis.Client([{'host': '10.0.0.1', 'port': 26379, 'db': 2},
+                                {'host': '10.0.0.2', 'port': 26379}],
+                               sentinel_master='mymaster')
+
+    While the client fails over to a new master, either when a ``READONLY``
+    error is received or when Sentinel announces a failover, the commands
+    that are issued and the commands that failed with ``READONLY`` are held
+    in a queue of up to ``failover_queue_size`` commands. The queued commands
+    are executed on the new master in a single write once it is connected.
+    Commands issued when the queue is full fail with a
+    :exc:`~tredis.exceptions.ConnectionError`.
+
+    When ``cache_size`` is set, the replies to :meth:`~tredis.Client.get`,
+    :meth:`~tredis.Client.hget`, :meth:`~tredis.Client.hgetall`, and
+    :meth:`~tredis.Client.smembers` are cached in memory for up to
+    ``cache_size`` keys, evicting the least recently used keys. Redis
+    ``CLIENT TRACKING`` is enabled on each connection, with the invalidation
+    messages redirected to a dedicated connection that is subscribed to
+    ``__redis__:invalidate``, and cached keys are evicted when they are
+    modified. Writes issued by the client evict their keys immediately. The
+    cached commands are always executed on the master, and the cache is
+    cleared and bypassed while the invalidation connection is re-established,
+    when a connection that keys were read on closes, or when the client fails
+    over to a new master. Caching requires Redis 6.0 or later; if the server
+    rejects ``CLIENT TRACKING``, the error is logged and caching is disabled.
+    Caching is not supported in clustering mode.
+
+    .. added: 0.7.0
+
+    :param hosts: A list of host connection values.
+    :type hosts: list(dict)
+    :param io_loop: Override the current Tornado IOLoop instance
+    :type io_loop: tornado.ioloop.IOLoop
+    :param method on_close: The method to call if the connection is closed
+    :param bool clustering: Toggle the cluster support in the client
+    :param bool auto_connect: Toggle the auto-connect on creation feature
+    :param int max_batch_bytes: The maximum number of bytes to coalesce into
+        a single write
+    :param int max_batch_commands: The maximum number of commands to coalesce
+        into a single write
+    :param int pool_min_size: The minimum number of connections to keep open
+        to each Redis server
+    :param int pool_max_size: The maximum number of connections to open to
+        each Redis server
+    :param int pool_idle_timeout: The number of seconds before idle
+        connections above the minimum pool size are closed
+    :param int cluster_refresh_interval: The number of seconds between
+        background cluster topology refreshes
+    :param str read_from: Where to execute read-only commands in clustering
+        mode or when replicas are provided
+    :param str cluster_connect: Which cluster nodes to connect to when the
+        cluster is discovered
+    :param bool command_info: Fetch the key positions for every command with
+        ``COMMAND`` when the cluster is discovered
+    :param str sentinel_master: The name of the master to discover with the
+        Redis Sentinels in ``hosts``
+    :param int failover_queue_size: The maximum number of commands to hold
+        while failing over to a new master
+    :param int max_replica_lag: The maximum number of seconds a replica may
+        lag behind the master before read-only commands skip it
+    :param int cache_size: The maximum number of keys to cache replies for
+
+    """
+
+    def __init__(self,
+                 hosts,
+                 on_close=None,
+                 io_loop=None,
+                 clustering=False,
+                 auto_connect=True,
+                 max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                 max_batch_commands=DEFAULT_MAX_BATCH_COMMANDS,
+                 pool_min_size=DEFAULT_POOL_MIN_SIZE,
+                 pool_max_size=DEFAULT_POOL_MAX_SIZE,
+                 pool_idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT,
+                 cluster_refresh_interval=None,
+                 read_from=None,
+                 cluster_connect=CLUSTER_CONNECT_ALL,
+                 command_info=False,
+                 sentinel_master=None,
+                 failover_queue_size=DEFAULT_FAILOVER_QUEUE_SIZE,
+                 max_replica_lag=None,
+                 cache_size=None):
+        """Create a new instance of the ``Client`` class.
+
+        :param hosts: A list of host connection values.
+        :type hosts: list(dict)
+        :param io_loop: Override the current Tornado IOLoop instance
+        :type io_loop: tornado.ioloop.IOLoop
+        :param method on_close: The method to call if the connection is closed
+        :param bool clustering: Toggle the cluster support in the client
+        :param bool auto_connect: Toggle the auto-connect on creation feature
+        :param int max_batch_bytes: The maximum number of bytes to coalesce
+            into a single write
+        :param int max_batch_commands: The maximum number of commands to
+            coalesce into a single write
+        :param int pool_min_size: The minimum number of connections to keep
+            open to each Redis server
+        :param int pool_max_size: The maximum number of connections to open
+            to each Redis server
+        :param int pool_idle_timeout: The number of seconds before idle
+            connections above the minimum pool size are closed
+        :param int cluster_refresh_interval: The number of seconds between
+            background cluster topology refreshes
+        :param str read_from: Where to execute read-only commands in
+            clustering mode or when replicas are provided
+        :param str cluster_connect: Which cluster nodes to connect to when
+            the cluster is discovered
+        :param bool command_info: Fetch the key positions for every command
+            with ``COMMAND`` when the cluster is discovered
+        :param str sentinel_master: The name of the master to discover with
+            the Redis Sentinels in ``hosts``
+        :param int failover_queue_size: The maximum number of commands to
+            hold while failing over to a new master
+        :param int max_replica_lag: The maximum number of seconds a replica
+            may lag behind the master before read-only commands skip it
+        :param int cache_size: The maximum number of keys to cache replies
+            for
+
+        """
+        self._cache = _Cache(cache_size) if cache_size else None
+        self._closing = False
+        self._cluster = {}
+        self._cluster_connect = cluster_connect
+        self._cluster_refresh = None
+        self._cluster_refresh_interval = cluster_refresh_interval
+        self._cluster_replicas = {}
+        self._command_info = command_info
+        self._connecting_nodes = set()
+        self._clustering = clustering
+        self._connected = locks.Event()
+        self._connect_future = concurrent.Future()
+        self._connection = None
+        self._discovery = False
+        self._failing_over = False
+        self._failover_queue = collections.deque()
+        self._failover_queue_size = failover_queue_size
+        self._hosts = hosts
+        self._key_positions = cluster.KEY_POSITIONS
+        self._lagging_replicas = set()
+        self._master_offsets = collections.deque()
+        self._max_batch_bytes = max_batch_bytes
+        self._max_batch_commands = max_batch_commands
+        self._max_replica_lag = max_replica_lag
+        self._on_close_callback = on_close
+        self._pool_idle_timeout = pool_idle_timeout
+        self._pool_max_size = pool_max_size
+        self._pool_min_size = pool_min_size
+        self._read_from = read_from
+        self._redirects = 0
+        self._refreshed_at = 0
+        self._refreshing = False
+        self._replica_check = None
+        self._replicas = []
+        self._sentinel = None
+        self._sentinel_master = sentinel_master
+        self._sentinel_retries = 0
+        self._pattern_subscriptions = {}
+        self._slot_nodes = []
+        self._slot_replicas = []
+        self._subscribe_waiters = collections.deque()
+        self._subscriber = None
+        self._subscriptions = {}
+        self._tracker = None
+        self._tracker_id = None
+        self._tracking = False
+        self._slot_table = array.array('H', [UNASSIGNED_SLOT]) * HASH_SLOTS
+        self.io_loop = io_loop or ioloop.IOLoop.current()
+        if sentinel_master and self._clustering:
+            raise ValueError('Sentinel mode does not support clustering')
+        if cache_size is not None and (cache_size < 1 or self._clustering):
+            raise ValueError('Invalid cache_size for the client ({})'.format(
+                cache_size))
+        if read_from is None:
+            self._read_from = READ_FROM_MASTER
+            if not clustering and not sentinel_master and len(hosts) > 1:
+                self._read_from = READ_FROM_REPLICA_PREFERRED
+        if not 0 < pool_min_size <= pool_max_size:
+            raise ValueError('Invalid pool size ({}, {})'.format(
+                pool_min_size, pool_max_size))
+        if self._read_from not in READ_FROM_POLICIES:
+            raise ValueError('Invalid read_from policy: {}'.format(read_from))
+        if cluster_connect not in CLUSTER_CONNECT_POLICIES:
+            raise ValueError(
+                'Invalid cluster_connect policy: {}'.format(cluster_connect))
+        if auto_connect:
+            LOGGER.debug('Auto-connecting')
+            self.connect()
+
+    def connect(self):
+        """Connect to the Redis server or Cluster.
+
+        :rtype: tornado.concurrent.Future
+
+        """
+        if self._sentinel_master:
+            LOGGER.debug('Discovering the %s master with %i sentinel(s)',
+                         self._sentinel_master, len(self._hosts))
+            self._connect_future = concurrent.Future()
+            self._discover_master()
+            return self._connect_future
+        LOGGER.debug('Creating a%s connection to %s:%s (db %s)',
+                     ' cluster node'
+                     if self._clustering else '', self._hosts[0]['host'],
+                     self._hosts[0]['port'], self._hosts[0].get(
+                         'db', DEFAULT_DB))
+        self._connect_future = concurrent.Future()
+        conn = self._create_connection(
+            self._hosts[0]['host'],
+            self._hosts[0]['port'],
+            self._hosts[0].get('db', DEFAULT_DB),
+            cluster_node=self._clustering)
+        self.io_loop.add_future(conn.connect(), self._on_connected)
+        if not self._clustering and self._read_from != READ_FROM_MASTER:
+            self._connect_replicas()
+        return self._connect_future
+
+    def pipeline(self):
+        """Return a :class:`~tredis.Pipeline` that buffers commands until
+        :meth:`~tredis.Pipeline.execute` is invoked, writing all of the
+        buffered commands to Redis at once.
+
+        .. code:: python
+
+            pipeline = client.pipeline()
+            pipeline.set('foo', 'bar')
+            pipeline.get('foo')
+            results = yield pipeline.execute()
+
+        In clustering mode, the buffered commands are grouped by the node
+        serving their hash slot, and each node's commands are written to it
+        in a single write, in parallel.
+
+        :rtype: tredis.Pipeline
+
+        """
+        return Pipeline(self)
+
+    def scan_iter(self, pattern=None, count=None, concurrency=None):
+        """Return a :class:`~tredis.ScanIterator` that iterates over all of
+        the keys in Redis using ``SCAN``. In clustering mode, ``SCAN`` cursors
+        are run on every master in parallel, with at most ``concurrency``
+        ``SCAN`` commands in-flight at a time, and keys are returned as they
+        arrive.
+
+        .. code:: python
+
+            iterator = client.scan_iter(pattern='user:*')
+            while not iterator.done():
+                keys = yield iterator.next()
+
+        .. versionadded:: 0.9.0
+
+        :param pattern: An optional pattern to apply for key matching
+        :type pattern: :class:`str`, :class:`bytes`
+        :param int count: An optional amount of work to perform in each scan
+        :param int concurrency: The maximum number of nodes to scan at the
+            same time, defaults to all nodes
+        :rtype: tredis.ScanIterator
+
+        """
+        return ScanIterator(self, pattern, count, concurrency)
+
+    def close(self):
+        """Close any open connections to Redis.
+
+        :raises: :exc:`tredis.exceptions.ConnectionError`
+
+        """
+        if not self._connected.is_set():
+            raise exceptions.ConnectionError('not connected')
+        self._closing = True
+        self._connected.clear()
+        if self._cluster_refresh is not None:
+            self._cluster_refresh.stop()
+            self._cluster_refresh = None
+        if self._replica_check is not None:
+            self._replica_check.stop()
+            self._replica_check = None
+        if self._clustering:
+            for host in self._cluster.keys():
+                if self._cluster[host].connected:
+                    self._cluster[host].close()
+        elif self._connection:
+            self._connection.close()
+        for replica in self._replicas:
+            if replica.connected:
+                replica.close()
+        if self._sentinel is not None and self._sentinel.connected:
+            self._sentinel.close()
+        if self._subscriber is not None and self._subscriber.connected:
+            self._subscriber.close()
+        if self._tracker is not None and self._tracker.connected:
+            self._tracker.close()
+        self._stop_tracking()
+        for subscription in set(list(self._subscriptions.values()) +
+                                list(self._pattern_subscriptions.values())):
+            subscription._close()
+        self._subscriptions, self._pattern_subscriptions = {}, {}
+
+    @property
+    def ready(self):
+        """Indicates that the client is connected to the Redis server or
+        cluster and is ready for use. In clustering mode, only the nodes that
+        are connected to when the cluster is discovered need to be connected.
+
+        :rtype: bool
+
+        """
+        if self._clustering:
+            return (all([c.connected for c in self._cluster.values()
+                         if self._connect_on_discovery(c.read_only)])
+                    and len(self._cluster))
+        return (self._connection and self._connection.connected)
+
+    def _check_replica_lag(self):
+        """Run ``INFO REPLICATION`` on the master and each connected replica
+        in non-clustering mode, skipping the replicas that are lagging behind
+        the master when executing read-only commands.
+
+        """
+        if self._connection is not None and self._connection.connected:
+            self.io_loop.add_future(
+                self._execute_on_node(
+                    self._connection, [b'INFO', b'REPLICATION'],
+                    format_callback=common.format_info_response),
+                self._on_master_info)
+        for replica in self._replicas:
+            if replica.connected:
+                self.io_loop.add_future(
+                    self._execute_on_node(
+                        replica, [b'INFO', b'REPLICATION'],
+                        format_callback=common.format_info_response),
+                    functools.partial(self._on_replica_info, replica))
+
+    def _cache_key(self, parts):
+        """Return the key and the database, command, and arguments to cache
+        the reply to a cached command with. Invalidation messages do not
+        include the database, so replies are grouped by key across databases.
+
+        :param list parts: The list of command parts
+        :rtype: tuple(bytes, tuple)
+
+        """
+        parts = [p.encode('utf-8') if isinstance(p, str)
+                 else p if isinstance(p, bytes)
+                 else ascii(p).encode('ascii') for p in parts]
+        return parts[1], tuple([self._connection.database, parts[0]] +
+                               parts[2:])
+
+    def _cached_response(self, response, format_callback):
+        """Return a future resolved with a cached reply, formatting it with
+        the command's format callback.
+
+        :param mixed response: The cached reply
+        :param method format_callback: Optional response format callback
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        future = concurrent.TracebackFuture()
+        if isinstance(response, list):
+            response = list(response)
+        try:
+            future.set_result(format_callback(response)
+                              if format_callback else response)
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def _caching_callback(self, cached, format_callback):
+        """Return a format callback that caches the reply to a cached command
+        before formatting it. The key is reserved in the cache until the
+        command completes so that an invalidation received while the command
+        is in-flight prevents the reply from being cached.
+
+        :param tuple cached: The key and field to cache the reply with
+        :param method format_callback: Optional response format callback
+        :rtype: method
+
+        """
+        cache, (key, field) = self._cache, cached
+        token = cache.reserve(key)
+
+        def callback(response):
+            cache.store(key, field, token,
+                        list(response) if isinstance(response, list)
+                        else response)
+            return format_callback(response) if format_callback else response
+
+        callback.release = lambda _future: cache.release(key, token)
+        return callback
+
+    @staticmethod
+    def _broadcast_policy(parts):
+        """Return the nodes to execute a command on and the function that
+        merges the responses if the command is executed on every cluster
+        node, otherwise ``None``.
+
+        :param list parts: The list of command parts
+        :rtype: tuple(str, method) or None
+
+        """
+        if parts[0] == b'SCRIPT' and len(parts) > 1:
+            return BROADCAST_COMMANDS.get(b' '.join(parts[:2]))
+        return BROADCAST_COMMANDS.get(parts[0])
+
+    def _build_command(self, parts):
+        """Build the command that will be written to Redis via the socket
+
+        :param list parts: The list of strings for building the command
+        :rtype: bytes
+
+        """
+        return self._encode_resp(parts)
+
+    def _build_slot_table(self):
+        """Rebuild the lookup table that maps each cluster hash slot to the
+        index of the node serving it in the slot node list, along with the
+        list of replicas for each node in the slot node list.
+
+        """
+        nodes, replicas = [], []
+        table = array.array('H', [UNASSIGNED_SLOT]) * HASH_SLOTS
+        for name in sorted(self._cluster.keys()):
+            if not self._cluster[name].slots:
+                continue
+            index = len(nodes)
+            nodes.append(self._cluster[name])
+            replicas.append([
+                self._cluster[replica]
+                for replica in self._cluster_replicas.get(name, [])
+                if replica in self._cluster
+            ])
+            for start, end in self._cluster[name].slots:
+                table[start:end + 1] = array.array('H', [index]) * (
+                    end - start + 1)
+        LOGGER.debug('Built slot table for %i nodes', len(nodes))
+        self._slot_nodes, self._slot_table = nodes, table
+        self._slot_replicas = replicas
+
+    def _create_cluster_connection(self, host, port, slots, read_only=False):
+        """Create a connection to a Redis cluster node, adding it to the
+        cluster connections.
+
+        :param str host: The hostname to connect to
+        :param int port: The port to connect on
+        :param list slots: The hash slot ranges served by the node
+        :param bool read_only: The node is a replica
+        :rtype: tredis.client._ConnectionPool
+
+        """
+        LOGGER.debug('Creating a cluster connection to %s:%s', host, port)
+        conn = self._create_connection(
+            host,
+            port,
+            0,
+            cluster_node=True,
+            read_only=read_only,
+            slots=slots)
+        self._cluster[conn.name] = conn
+        if self._connect_on_discovery(read_only):
+            self._connecting_nodes.add(conn.name)
+            self.io_loop.add_future(
+                conn.connect(),
+                functools.partial(self._on_cluster_node_connected, conn.name))
+        return conn
+
+    def _connect_on_discovery(self, read_only):
+        """Returns ``True`` if a connection to a cluster node should be
+        established when the cluster is discovered, based upon the
+        ``cluster_connect`` policy.
+
+        :param bool read_only: The node is a replica
+        :rtype: bool
+
+        """
+        if self._cluster_connect == CLUSTER_CONNECT_MASTERS:
+            return not read_only
+        return self._cluster_connect == CLUSTER_CONNECT_ALL
+
+    def _connect_replica(self, replica):
+        """Connect to a replica in non-clustering mode, retrying after
+        :data:`REPLICA_RECONNECT_INTERVAL` seconds if it is unavailable.
+
+        :param replica: The connection to the replica
+        :type replica: tredis.client._ConnectionPool
+
+        """
+        if self._closing:
+            return
+
+        def on_connected(future):
+            if future.exception():
+                LOGGER.warning('Error connecting to replica %s: %s',
+                               replica.name, future.exception())
+                self.io_loop.call_later(REPLICA_RECONNECT_INTERVAL,
+                                        self._connect_replica, replica)
+
+        self.io_loop.add_future(replica.connect(), on_connected)
+
+    def _connect_replicas(self):
+        """Connect to the replicas in the hosts list in non-clustering mode,
+        starting the periodic replica lag check if ``max_replica_lag`` is set.
+        The client does not wait for the replicas to be connected.
+
+        """
+        db = self._hosts[0].get('db', DEFAULT_DB)
+        self._lagging_replicas = set()
+        self._master_offsets = collections.deque()
+        self._replicas = [self._create_replica(host['host'], host['port'], db)
+                          for host in self._hosts[1:]]
+        for replica in self._replicas:
+            self._connect_replica(replica)
+        if (self._max_replica_lag is not None and self._replicas
+                and self._replica_check is None):
+            self._replica_check = ioloop.PeriodicCallback(
+                self._check_replica_lag, REPLICA_LAG_CHECK_INTERVAL * 1000,
+                self.io_loop)
+            self._replica_check.start()
+
+    def _create_connection(self, host, port, db, on_close=None, **kwargs):
+        """Create the connection pool for a Redis server.
+
+        :param str host: The hostname to connect to
+        :param int port: The port to connect on
+        :param int db: The database number to use
+        :param method on_close: The method to call if a connection is
+            closed, defaults to the client's close handling
+        :rtype: tredis.client._ConnectionPool
+
+        """
+        return _ConnectionPool(
+            host,
+            port,
+            db,
+            self._on_response,
+            on_close or self._on_closed,
+            self.io_loop,
+            on_connect=self._setup_connection,
+            on_disconnect=self._on_disconnected,
+            min_size=self._pool_min_size,
+            max_size=self._pool_max_size,
+            idle_timeout=self._pool_idle_timeout,
+            max_batch_bytes=self._max_batch_bytes,
+            max_batch_commands=self._max_batch_commands,
+            **kwargs)
+
+    def _connect_subscriber(self):
+        """Connect the dedicated Pub/Sub connection if it is not connected,
+        using the Redis server in non-clustering mode or a connected node in
+        clustering mode.
+
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        future = concurrent.TracebackFuture()
+
+        def on_ready(_=None):
+            if self._subscriber is None:
+                if self._clustering:
+                    nodes = [self._cluster[name]
+                             for name in sorted(self._cluster.keys())
+                             if self._cluster[name].connected]
+                    node = nodes[0] if nodes else None
+                else:
+                    node = self._connection
+                if node is None:
+                    future.set_exception(
+                        exceptions.ConnectionError('not connected'))
+                    return
+                subscriber = _Connection(
+                    node.host, node.port, None, self._on_response,
+                    lambda: self._on_subscriber_closed(subscriber),
+                    self.io_loop, on_message=self._on_subscriber_messages)
+                self._subscriber = subscriber
+            if self._subscriber.connected:
+                future.set_result(self._subscriber)
+            else:
+                concurrent.chain_future(self._subscriber.connect(), future)
+
+        if not self.ready and not self._connected.is_set():
+            self.io_loop.add_future(self._connected.wait(), on_ready)
+        else:
+            on_ready()
+        return future
+
+    def _create_replica(self, host, port, db):
+        """Create the connection pool for a replica in non-clustering mode.
+
+        :param str host: The hostname to connect to
+        :param int port: The port to connect on
+        :param int db: The database number to use
+        :rtype: tredis.client._ConnectionPool
+
+        """
+        replica = self._create_connection(
+            host, port, db, on_close=lambda: self._on_replica_closed(replica),
+            read_only=True)
+        return replica
+
+    def _discover_master(self, offset=0):
+        """Ask the Redis Sentinel at ``offset`` in the hosts list for the
+        address of the master, trying the next sentinel if it is unavailable
+        or does not know the master. Once the address is known, the client
+        subscribes to the sentinel's ``+switch-master`` channel and connects
+        to the master.
+
+        :param int offset: The offset of the sentinel in the hosts list
+
+        """
+        if offset >= len(self._hosts):
+            error = exceptions.ConnectError(
+                'No sentinels available for {}'.format(self._sentinel_master))
+            if not self._connect_future.done():
+                self._connect_future.set_exception(error)
+                return
+            interval = min(
+                SENTINEL_RETRY_INTERVAL * 2 ** self._sentinel_retries,
+                SENTINEL_MAX_RETRY_INTERVAL)
+            LOGGER.error('%s, retrying in %s seconds', error, interval)
+            self._sentinel_retries += 1
+            self._fail_failover_queue(error)
+            # Keep queueing, bounded by the queue size, until the next attempt
+            self._failing_over = True
+            self.io_loop.call_later(interval, self._rediscover_master)
+            return
+
+        sentinel = _Connection(
+            self._hosts[offset]['host'],
+            self._hosts[offset]['port'],
+            None,
+            self._on_response,
+            lambda: self._on_sentinel_closed(sentinel),
+            self.io_loop,
+            on_message=self._on_sentinel_messages)
+
+        def on_master(future):
+            if future.exception() or not future.result():
+                LOGGER.warning('Sentinel %s did not return the %s master: %s',
+                               sentinel.name, self._sentinel_master,
+                               future.exception())
+                if sentinel.connected:
+                    sentinel.close()
+                self._discover_master(offset + 1)
+                return
+            self._sentinel_retries = 0
+            previous, self._sentinel = self._sentinel, sentinel
+            if previous is not None and previous.connected:
+                previous.close()
+            self._execute_on_node(
+                sentinel, [b'SUBSCRIBE', SENTINEL_SWITCH_MASTER])
+            host, port = future.result()
+            self._failover_to(host.decode('utf-8'), int(port))
+
+        def on_connected(future):
+            if future.exception():
+                LOGGER.warning('Error connecting to sentinel %s: %s',
+                               sentinel.name, future.exception())
+                self._discover_master(offset + 1)
+                return
+            self.io_loop.add_future(
+                self._execute_on_node(
+                    sentinel, [b'SENTINEL', b'get-master-addr-by-name',
+                               self._sentinel_master]), on_master)
+
+        self.io_loop.add_future(sentinel.connect(), on_connected)
+
+    def _encode_resp(self, value):
+        """Dynamically build the RESP payload based upon the list provided.
+
+        :param mixed value: The list of command parts to encode
+        :rtype: bytes
+
+        """
+        if isinstance(value, bytes):
+            return b''.join(
                 [b'$',
                  ascii(len(value)).encode('ascii'), CRLF, value, CRLF])
         elif isinstance(value, str):  # pragma: nocover
@@ -420,272 +1857,1811 @@ class Client(server.ServerMixin, keys.KeysMixin, strings.StringsMixin,
                 output.append(self._encode_resp(item))
             return b''.join(output)
         else:
-            raise ValueError('Unsupported type: {0}'.format(type(value)))
+            raise ValueError('Unsupported type: {0}'.format(type(value)))
+
+    @staticmethod
+    def _eval_expectation(command, response, future):
+        """Evaluate the response from Redis to see if it matches the expected
+        response.
+
+        :param command: The command that is being evaluated
+        :type command: tredis.client.Command
+        :param bytes response: The response value to check
+        :param future: The future representing the execution of the command
+        :type future: tornado.concurrent.Future
+        :return:
+        """
+        if isinstance(command.expectation, int) and command.expectation > 1:
+            future.set_result(response == command.expectation or response)
+        else:
+            future.set_result(response == command.expectation)
+
+    def _execute(self, parts, expectation=None, format_callback=None):
+        """Really execute a redis command
+
+        :param list parts: The list of command parts
+        :param mixed expectation: Optional response expectation
+
+        :rtype: :class:`~tornado.concurrent.Future`
+        :raises: :exc:`~tredis.exceptions.SubscribedError`
+
+        """
+        if self._clustering and parts[0] in CROSS_SLOT_COMMANDS:
+            groups = self._group_by_slot(parts)
+            if len(groups) > 1:
+                return self._execute_cross_slot(parts[0], groups, expectation,
+                                                format_callback)
+        elif self._clustering and self._broadcast_policy(parts):
+            return self._execute_broadcast(parts, expectation,
+                                           format_callback)
+
+        cached = None
+        if self._tracking:
+            if parts[0] in CACHED_COMMANDS:
+                cached = self._cache_key(parts)
+                try:
+                    response = self._cache.get(*cached)
+                except KeyError:
+                    format_callback = self._caching_callback(
+                        cached, format_callback)
+                else:
+                    return self._cached_response(response, format_callback)
+            elif not common.is_read_only(parts[0]):
+                self._invalidate_written_keys(parts)
+
+        future = concurrent.TracebackFuture()
+        if cached is not None:
+            self.io_loop.add_future(future, format_callback.release)
+
+        try:
+            command = self._build_command(parts)
+        except ValueError as error:
+            future.set_exception(error)
+            return future
+
+        def on_ready(_=None):
+            # Nodes added by a topology change connect when first used
+            if self._failing_over:
+                self._queue_command(
+                    Command(command, None, expectation, format_callback),
+                    future)
+            elif self.ready or (self._clustering and
+                                self._connected.is_set()):
+                try:
+                    if self._clustering:
+                        host = self._pick_cluster_host(parts)
+                    else:
+                        host = self._pick_host(parts)
+                except exceptions.ConnectionError as error:
+                    future.set_exception(error)
+                    return
+                cmd = Command(command, host, expectation, format_callback)
+                LOGGER.debug('_execute(%r, %r, %r) on %s', cmd.command,
+                             expectation, format_callback, cmd.connection.name)
+                cmd.connection.execute(cmd, future)
+            else:
+                LOGGER.critical('Connection not ready, aborting command')
+                future.set_exception(
+                    exceptions.ConnectionError('not connected'))
+
+        # Wait until the cluster is ready, letting cluster discovery through
+        if (not self.ready and not self._connected.is_set()
+                and not self._failing_over):
+            self.io_loop.add_future(self._connected.wait(), on_ready)
+        else:
+            on_ready()
+        return future
+
+    def _execute_broadcast(self, parts, expectation, format_callback):
+        """Execute a node-scoped command on every cluster master or node in
+        parallel, merging the responses once every node has responded.
+
+        :param list parts: The list of command parts
+        :param mixed expectation: Optional response expectation
+        :param method format_callback: Optional response format callback
+            that is applied to each node's response
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        future = concurrent.TracebackFuture()
+        targets, aggregate = self._broadcast_policy(parts)
+
+        def on_complete(futures):
+            errors = [f.exception() for f in futures if f.exception()]
+            if errors:
+                future.set_exception(errors[0])
+                return
+            response = aggregate([(node.name, f.result())
+                                  for node, f in zip(nodes, futures)])
+            self._on_response(Command(None, None, expectation, None), future,
+                              response)
+
+        def on_ready(_=None):
+            if targets == BROADCAST_MASTERS:
+                nodes.extend(self._slot_nodes)
+            else:
+                nodes.extend(self._cluster[name]
+                             for name in sorted(self._cluster.keys()))
+            if not nodes:
+                future.set_exception(
+                    exceptions.ConnectionError('not connected'))
+                return
+            _when_all(self.io_loop, [
+                self._execute_on_node(
+                    node, parts, format_callback=format_callback)
+                for node in nodes
+            ], on_complete)
+
+        nodes = []
+        if not self._connected.is_set():
+            self.io_loop.add_future(self._connected.wait(), on_ready)
+        else:
+            on_ready()
+        return future
+
+    def _execute_cross_slot(self, command, groups, expectation,
+                            format_callback):
+        """Execute a multi-key command whose keys hash to more than one
+        cluster hash slot, executing the command for each hash slot in
+        parallel and combining the responses in the original key order.
+
+        :param bytes command: The command name
+        :param list groups: A list of ``(offsets, parts)`` tuples for each
+            hash slot, as returned by :meth:`_group_by_slot`
+        :param mixed expectation: Optional response expectation
+        :param method format_callback: Optional response format callback
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        future = concurrent.TracebackFuture()
+
+        def on_complete(futures):
+            errors = [f.exception() for f in futures if f.exception()]
+            if errors:
+                future.set_exception(errors[0])
+                return
+            if command == b'MGET':
+                response = [None] * sum(len(o) for o, _p in groups)
+                for (offsets, _parts), values in zip(
+                        groups, [f.result() for f in futures]):
+                    for offset, value in zip(offsets, values):
+                        response[offset] = value
+            elif command == b'MSET':
+                response = b'OK'
+            else:
+                response = sum(f.result() for f in futures)
+            self._on_response(
+                Command(None, None, expectation, format_callback), future,
+                response)
+
+        _when_all(self.io_loop,
+                  [self._execute([command] + parts) for _o, parts in groups],
+                  on_complete)
+        return future
+
+    def _execute_cluster_pipeline(self, commands):
+        """Execute the commands buffered by a :class:`~tredis.Pipeline` in
+        clustering mode, grouping them by the node serving their hash slot
+        and writing each node's commands to it in a single write. Commands
+        that span hash slots or are executed on every node are executed
+        individually.
+
+        :param list commands: A list of ``(Command, Future, parts)`` tuples
+
+        """
+        batches = collections.OrderedDict()
+        for command, future, parts in commands:
+            if ((parts[0] in CROSS_SLOT_COMMANDS
+                 and len(self._group_by_slot(parts)) > 1)
+                    or self._broadcast_policy(parts)):
+                concurrent.chain_future(
+                    self._execute(parts, command.expectation,
+                                  command.callback), future)
+                continue
+            try:
+                node = self._pick_cluster_host(parts)
+            except exceptions.ConnectionError as error:
+                future.set_exception(error)
+                continue
+            batches.setdefault(node, []).append(
+                (command._replace(connection=node), future))
+        for node, batch in batches.items():
+            node.execute_many(batch)
+
+    def _execute_on_node(self, node, parts, expectation=None,
+                         format_callback=None):
+        """Execute a command on a specific Redis server or cluster node,
+        bypassing the hash slot routing.
+
+        :param node: The connection to execute the command on
+        :type node: tredis.client._ConnectionPool
+        :param list parts: The list of command parts
+        :param mixed expectation: Optional response expectation
+        :param method format_callback: Optional response format callback
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        future = concurrent.TracebackFuture()
+        try:
+            command = self._build_command(parts)
+        except ValueError as error:
+            future.set_exception(error)
+            return future
+        node.execute(Command(command, node, expectation, format_callback),
+                     future)
+        return future
+
+    def _execute_pipeline(self, commands):
+        """Execute the commands buffered by a :class:`~tredis.Pipeline`,
+        writing them to Redis in a single write.
+
+        :param list commands: A list of ``(Command, Future, parts)`` tuples
+
+        """
+        if self._tracking:
+            for _command, _future, parts in commands:
+                if not common.is_read_only(parts[0]):
+                    self._invalidate_written_keys(parts)
+
+        def on_ready(_=None):
+            if self._failing_over:
+                for command, future, _parts in commands:
+                    self._queue_command(command, future)
+            elif self._clustering and (self.ready or
+                                       self._connected.is_set()):
+                self._execute_cluster_pipeline(commands)
+            elif self.ready:
+                self._connection.execute_many([
+                    (command._replace(connection=self._connection), future)
+                    for command, future, _parts in commands
+                ])
+            else:
+                LOGGER.critical('Connection not ready, aborting pipeline')
+                for _command, future, _parts in commands:
+                    future.set_exception(
+                        exceptions.ConnectionError('not connected'))
+
+        if (not self.ready and not self._connected.is_set()
+                and not self._failing_over):
+            self.io_loop.add_future(self._connected.wait(), on_ready)
+        else:
+            on_ready()
+
+    def _failover_to(self, host, port):
+        """Connect to the Redis master at the specified address, replacing
+        the current connection once the new connection is established.
+
+        :param str host: The hostname of the master
+        :param int port: The port of the master
+
+        """
+        if (self._connection is not None and self._connection.connected
+                and (self._connection.host, self._connection.port) ==
+                (host, port)):
+            return
+        LOGGER.info('Connecting to the %s master at %s:%s',
+                    self._sentinel_master, host, port)
+        if self._connection is not None:
+            self._failing_over = True
+            db = self._connection.database
+        else:
+            db = self._hosts[0].get('db', DEFAULT_DB)
+        conn = self._create_connection(host, port, db)
+        self.io_loop.add_future(conn.connect(), self._on_connected)
+
+    def _close_when_idle(self, conn):
+        """Close the connection to a cluster node that is no longer part of
+        the cluster topology, or to a Redis master that was replaced by a
+        Sentinel failover, once its outstanding commands have completed.
+
+        :param conn: The connection to close
+        :type conn: tredis.client._ConnectionPool
+
+        """
+        if self._closing or not conn.connected:
+            return
+        elif conn.outstanding:
+            self.io_loop.call_later(DROPPED_NODE_CLOSE_DELAY,
+                                    self._close_when_idle, conn)
+        else:
+            LOGGER.debug('Closing idle connection to %s', conn.name)
+            conn.close()
+
+    def _fail_failover_queue(self, error):
+        """Fail the commands held in the failover queue when the client
+        could not connect to the new master.
+
+        :param Exception error: The error to fail the commands with
+
+        """
+        self._failing_over = False
+        commands, self._failover_queue = (self._failover_queue,
+                                          collections.deque())
+        for _command, future in commands:
+            if not future.done():
+                future.set_exception(error)
+
+    def _flush_failover_queue(self):
+        """Execute the commands held in the failover queue on the new master
+        in a single write, in the order they were queued.
+
+        """
+        self._failing_over = False
+        commands, self._failover_queue = (self._failover_queue,
+                                          collections.deque())
+        if commands:
+            LOGGER.debug('Executing %i commands queued during failover on %s',
+                         len(commands), self._connection.name)
+            self._connection.execute_many(
+                [(command._replace(connection=self._connection), future)
+                 for command, future in commands])
+
+    @staticmethod
+    def _group_by_slot(parts):
+        """Group the keys of a multi-key command by cluster hash slot,
+        returning a list of ``(offsets, parts)`` tuples where ``offsets`` are
+        the positions of the keys in the command and ``parts`` are the
+        command parts for the hash slot.
+
+        :param list parts: The list of command parts
+        :rtype: list
+
+        """
+        step, groups = CROSS_SLOT_COMMANDS[parts[0]], collections.OrderedDict()
+        for offset, index in enumerate(range(1, len(parts), step)):
+            offsets, values = groups.setdefault(
+                cluster.key_slot(parts[index]), ([], []))
+            offsets.append(offset)
+            values.extend(parts[index:index + step])
+        return list(groups.values())
+
+    def _on_cluster_discovery(self, future):
+        """Invoked when the Redis server has responded to the ``CLUSTER SLOTS``
+        command, creating connections to new cluster nodes, updating the
+        slot assignments of existing ones and dropping the nodes that are no
+        longer part of the cluster.
+
+        :param future: The future containing the response from Redis
+        :type future: tornado.concurrent.Future
+
+        """
+        LOGGER.debug('_on_cluster_discovery(%r)', future)
+        common.maybe_raise_exception(future)
+        nodes, replicas = collections.OrderedDict(), {}
+        for slot in future.result():
+            master = '{}:{}'.format(slot.master.ip, slot.master.port)
+            replicas.setdefault(master, [])
+            for node in [slot.master] + slot.replicas:
+                name = '{}:{}'.format(node.ip, node.port)
+                if name not in nodes:
+                    nodes[name] = node, node is not slot.master, []
+                if node is slot.master:
+                    nodes[name][2].append((slot.start, slot.end))
+                elif name not in replicas[master]:
+                    replicas[master].append(name)
+        for name, (node, read_only, slots) in nodes.items():
+            if name in self._cluster:
+                LOGGER.debug('Updating cluster connection info for %s', name)
+                self._cluster[name].set_slots(slots)
+                self._cluster[name].set_read_only(read_only)
+            else:
+                self._create_cluster_connection(node.ip, node.port, slots,
+                                                read_only)
+        for name in [n for n in self._cluster.keys() if n not in nodes]:
+            LOGGER.info('Dropping cluster node %s', name)
+            self._close_when_idle(self._cluster.pop(name))
+        self._cluster_replicas = replicas
+        if self._command_info and not self._discovery:
+            self._fetch_key_positions()
+        self._discovery = True
+        self._build_slot_table()
+        self._maybe_set_cluster_ready()
+        if self._cluster_refresh_interval and self._cluster_refresh is None:
+            self._cluster_refresh = ioloop.PeriodicCallback(
+                self._refresh_cluster_topology,
+                self._cluster_refresh_interval * 1000, self.io_loop)
+            self._cluster_refresh.start()
+
+    def _on_closed(self):
+        """Invoked by connections when they are closed. In clustering mode,
+        the client remains connected while any cluster node is connected so
+        that commands for the hash slots served by healthy nodes are not
+        blocked, and the cluster topology is refreshed to pick up failovers.
+
+        """
+        if (self._clustering and self._discovery and not self._closing
+                and any(c.connected for c in self._cluster.values())):
+            LOGGER.warning('Cluster node connection closed')
+            self._refresh_cluster_topology()
+            return
+        elif self._sentinel_master and not self._closing:
+            if self._connection is not None and self._connection.connected:
+                return  # A replaced master was closed
+            LOGGER.warning('Redis master connection closed')
+            self._connected.clear()
+            self._failing_over = True
+            self._discover_master()
+            return
+        self._connected.clear()
+        if not self._closing:
+            if self._on_close_callback:
+                self._on_close_callback()
+            else:
+                raise exceptions.ConnectionError('closed')
+
+    def _on_cluster_data_moved(self, response, command, future):
+        """Process the ``MOVED`` response from a Redis cluster node, updating
+        the slot lookup table with the node now serving the hash slot and
+        re-executing the command on it. When redirects accumulate, a full
+        cluster topology refresh is triggered.
+
+        :param bytes response: The response from the Redis server
+        :param command: The command that was being executed
+        :type command: tredis.client.Command
+        :param future: The execution future
+        :type future: tornado.concurrent.Future
+
+        """
+        LOGGER.debug('on_cluster_data_moved(%r, %r, %r)', response, command,
+                     future)
+        slot, conn = self._redirect_target(response)
+        LOGGER.debug('Slot %i moved to %r', slot, conn.name)
+        if conn not in self._slot_nodes:
+            self._slot_nodes.append(conn)
+            self._slot_replicas.append([])
+        self._slot_table[slot] = self._slot_nodes.index(conn)
+        self._redirects += 1
+        if (self._redirects >= REDIRECT_REFRESH_THRESHOLD
+                and self.io_loop.time() - self._refreshed_at >=
+                REDIRECT_REFRESH_INTERVAL):
+            self._refresh_cluster_topology()
+        conn.execute(command._replace(connection=conn), future)
+
+    def _on_cluster_data_ask(self, response, command, future):
+        """Process the ``ASK`` response from a Redis cluster node while a hash
+        slot is being migrated, sending ``ASKING`` and the command to the node
+        importing the hash slot. The slot lookup table is not changed.
+
+        :param bytes response: The response from the Redis server
+        :param command: The command that was being executed
+        :type command: tredis.client.Command
+        :param future: The execution future
+        :type future: tornado.concurrent.Future
+
+        """
+        LOGGER.debug('on_cluster_data_ask(%r, %r, %r)', response, command,
+                     future)
+        slot, conn = self._redirect_target(response)
+        LOGGER.debug('Slot %i is being migrated to %r', slot, conn.name)
+        asking_future = concurrent.Future()
+        self.io_loop.add_future(asking_future, lambda f: f.exception())
+        conn.execute_many([(Command(self._build_command([b'ASKING']), conn,
+                                    None, None), asking_future),
+                           (command._replace(connection=conn), future)])
+
+    def _fetch_key_positions(self):
+        """Fetch the position of the first key for every command with
+        ``COMMAND``, adding the commands that are not in
+        :data:`tredis.cluster.KEY_POSITIONS` to the key positions used to
+        route commands. Commands without keys are stored with a position of
+        ``0``. Commands whose keys depend upon their arguments, such as
+        ``ZUNIONSTORE``, are reported without a first key as well, so they are
+        skipped and keep the default routing.
+
+        """
+
+        def on_response(future):
+            if future.exception():
+                LOGGER.warning('Error fetching command info: %s',
+                               future.exception())
+                return
+            positions = dict(cluster.KEY_POSITIONS)
+            for row in future.result():
+                if b'movablekeys' not in row[2]:
+                    positions.setdefault(row[0].upper(), int(row[3]))
+            self._key_positions = positions
+
+        self.io_loop.add_future(
+            self._execute_on_node(self._pick_cluster_host([b'COMMAND']),
+                                  [b'COMMAND']), on_response)
+
+    def _maybe_set_cluster_ready(self):
+        """Mark the client as connected once the connections to the cluster
+        nodes opened on discovery have either been established or failed,
+        allowing the hash slots served by the connected nodes to be used
+        while other nodes are unavailable.
+
+        """
+        if self._connecting_nodes:
+            return
+        elif (self._cluster_connect == CLUSTER_CONNECT_LAZY
+              or any(c.connected for c in self._cluster.values())):
+            self._on_cluster_ready()
+        elif not self._connect_future.done():
+            self._connect_future.set_exception(
+                exceptions.ConnectionError('No cluster nodes available'))
+
+    def _on_cluster_node_connected(self, name, future):
+        """Invoked when a connection to a cluster node opened on discovery
+        has been established or has failed.
+
+        :param str name: The cluster node name
+        :param future: The connection future
+        :type future: tornado.concurrent.Future
+
+        """
+        self._connecting_nodes.discard(name)
+        self._on_connected(future)
+
+    def _on_cluster_ready(self):
+        """Invoked when the cluster has been discovered and the nodes that are
+        connected to on discovery are connected, marking the client as
+        connected.
+
+        """
+        LOGGER.debug('Cluster nodes all connected')
+        if not self._connect_future.done():
+            self._connect_future.set_result(True)
+        self._connected.set()
+
+    def _on_connected(self, future):
+        """Invoked when connections have been established. If the client is
+        in clustering mode, it will kick of the discovery step if needed. If
+        not, it will select the configured database.
+
+        :param future: The connection future
+        :type future: tornado.concurrent.Future
+
+        """
+        if future.exception():
+            if self._failing_over:
+                self._fail_failover_queue(future.exception())
+            if self._clustering and self._discovery:
+                LOGGER.warning('Error connecting to a cluster node: %s',
+                               future.exception())
+                self._maybe_set_cluster_ready()
+            elif not self._connect_future.done():
+                self._connect_future.set_exception(future.exception())
+            else:
+                LOGGER.warning('Error connecting: %s', future.exception())
+            return
+
+        conn = future.result()
+        LOGGER.debug('Connected to %s (%r, %r, %r)', conn.name,
+                     self._clustering, self._discovery, self._connected)
+        if self._clustering:
+            if not self._discovery:
+                self._cluster[conn.name] = conn
+                self.io_loop.add_future(self.cluster_slots(),
+                                        self._on_cluster_discovery)
+            else:
+                self._maybe_set_cluster_ready()
+        else:
+            LOGGER.debug('Initial setup and selection processed')
+            previous, self._connection = self._connection, conn
+            if previous is not None and previous is not conn:
+                self._close_when_idle(previous)
+            if self._cache is not None and previous is not conn:
+                self._start_tracking()
+            if self._failing_over:
+                self._flush_failover_queue()
+            if not self._connect_future.done():
+                self._connect_future.set_result(True)
+            self._connected.set()
+
+    def _on_read_only_error(self, command, future):
+        """Invoked when a Redis node returns an error indicating it's in
+        read-only mode. It will use the ``INFO REPLICATION`` command to
+        attempt to find the master server and failover to that. The command
+        is held in the failover queue along with the commands that are
+        issued or fail with the same error while the client reconnects, and
+        the queued commands are executed on the new master in a single write
+        once it is connected.
+
+        In clustering mode, the node is marked as read-only, the cluster
+        topology is refreshed, and the command fails with a
+        :exc:`~tredis.exceptions.ConnectionError`.
+
+        :param command: The command that was being executed
+        :type command: tredis.client.Command
+        :param future: The execution future
+        :type future: tornado.concurrent.Future
+
+        """
+        if self._clustering:
+            command.connection.set_read_only(True)
+            self._refresh_cluster_topology()
+            future.set_exception(exceptions.ConnectionError(
+                '{} is read-only'.format(command.connection.name)))
+            return
+        elif (command.connection is not self._connection
+              and not self._failing_over):
+            # The error is from the previous master after a failover
+            self._connection.execute(
+                command._replace(connection=self._connection), future)
+            return
+
+        self._queue_command(command, future)
+        if self._failing_over:
+            return
+        LOGGER.debug('%s is read-only, need to failover to new master',
+                     command.connection.name)
+        self._failing_over = True
+        self._connected.clear()
+        failover_future = concurrent.TracebackFuture()
+
+        def on_replication_info(_):
+            if failover_future.exception():
+                LOGGER.error('Failover failed: %s',
+                             failover_future.exception())
+                self._fail_failover_queue(failover_future.exception())
+                return
+            info = failover_future.result()
+            LOGGER.debug('Failover connecting to %s:%s', info['master_host'],
+                         info['master_port'])
+            conn = self._create_connection(
+                info['master_host'], info['master_port'],
+                self._connection.database)
+
+            # Use the normal connection processing flow when connecting
+            self.io_loop.add_future(conn.connect(), self._on_connected)
+
+        cmd = Command(
+            self._build_command(['INFO', 'REPLICATION']), command.connection,
+            None, common.format_info_response)
+
+        self.io_loop.add_future(failover_future, on_replication_info)
+        cmd.connection.execute(cmd, failover_future)
+
+    def _on_replica_closed(self, replica):
+        """Invoked when a connection to a replica is closed in non-clustering
+        mode, reconnecting to it after :data:`REPLICA_RECONNECT_INTERVAL`
+        seconds. Read-only commands are not executed on the replica while it
+        is not connected.
+
+        :param replica: The connection to the replica
+        :type replica: tredis.client._ConnectionPool
+
+        """
+        if self._closing:
+            return
+        LOGGER.warning('Replica connection %s closed', replica.name)
+        self.io_loop.call_later(REPLICA_RECONNECT_INTERVAL,
+                                self._connect_replica, replica)
+
+    def _on_master_info(self, future):
+        """Invoked with the ``INFO REPLICATION`` response of the master,
+        recording its replication offset. Only the samples needed to find
+        the offset the master had ``max_replica_lag`` seconds ago are kept.
+
+        :param future: The ``INFO REPLICATION`` future
+        :type future: tornado.concurrent.Future
+
+        """
+        if future.exception():
+            LOGGER.warning('Error checking the master replication offset: %s',
+                           future.exception())
+            return
+        now = self.io_loop.time()
+        self._master_offsets.append(
+            (now, future.result().get('master_repl_offset', 0)))
+        while (len(self._master_offsets) > 1 and self._master_offsets[1][0] <=
+               now - self._max_replica_lag):
+            self._master_offsets.popleft()
+
+    def _on_replica_info(self, replica, future):
+        """Invoked with the ``INFO REPLICATION`` response of a replica,
+        marking it as lagging if it is not connected to the master or its
+        replication offset has not reached the offset the master had
+        ``max_replica_lag`` seconds ago. The master's heartbeat interval does
+        not affect the check, so an idle master does not make its replicas
+        appear to lag.
+
+        :param replica: The connection to the replica
+        :type replica: tredis.client._ConnectionPool
+        :param future: The ``INFO REPLICATION`` future
+        :type future: tornado.concurrent.Future
+
+        """
+        if future.exception():
+            lagging = True
+        else:
+            info = future.result()
+            offset, since = None, self.io_loop.time() - self._max_replica_lag
+            for sampled_at, master_offset in self._master_offsets:
+                if sampled_at > since:
+                    break
+                offset = master_offset
+            lagging = (info.get('master_link_status') != 'up' or
+                       (offset is not None and
+                        info.get('slave_repl_offset', 0) < offset))
+        if lagging and replica not in self._lagging_replicas:
+            LOGGER.warning('Replica %s is lagging behind the master',
+                           replica.name)
+            self._lagging_replicas.add(replica)
+        elif not lagging and replica in self._lagging_replicas:
+            LOGGER.info('Replica %s caught up with the master', replica.name)
+            self._lagging_replicas.remove(replica)
+
+    def _invalidate_written_keys(self, parts):
+        """Evict the keys written by a command from the cache without waiting
+        for the invalidation message from Redis, so that the client reads
+        its own writes. Every argument of the command is treated as a key,
+        since the key positions of commands such as ``RENAME`` or
+        ``SUNIONSTORE`` vary.
+
+        :param list parts: The list of command parts
+
+        """
+        for key in parts[1:]:
+            if isinstance(key, str):
+                key = key.encode('utf-8')
+            if isinstance(key, bytes):
+                self._cache.invalidate(key)
+
+    def _is_tracked(self, connection):
+        """Indicates that ``CLIENT TRACKING`` is enabled on the connection,
+        redirecting its invalidation messages to the tracking connection.
+
+        :param connection: The connection to check
+        :type connection: tredis.client._Connection
+        :rtype: bool
+
+        """
+        return (self._tracker_id is not None and
+                (connection.host, connection.port) ==
+                (self._tracker.host, self._tracker.port))
+
+    def _on_disconnected(self, connection):
+        """Invoked when a connection in a pool is closed. Redis discards the
+        ``CLIENT TRACKING`` state of a closed connection, so the keys read on
+        it would no longer be invalidated. The cache is cleared and client
+        side caching is re-established when a tracked connection closes.
+
+        :param connection: The connection that was closed
+        :type connection: tredis.client._Connection
+
+        """
+        if (self._closing or self._cache is None
+                or not self._is_tracked(connection)):
+            return
+        LOGGER.warning('Tracked connection %s closed, re-establishing client '
+                       'side caching', connection.name)
+        self._start_tracking()
+
+    def _on_invalidations(self, messages):
+        """Invoked with the invalidation messages redirected to the tracking
+        connection, evicting the invalidated keys from the cache. A message
+        without keys is sent when the database is flushed, clearing the cache.
+
+        :param list messages: The invalidation messages
+
+        """
+        for message in messages:
+            if (message[0] != b'message'
+                    or message[1] != TRACKING_INVALIDATE_CHANNEL):
+                continue
+            elif message[2] is None:
+                self._cache.clear()
+            else:
+                for key in message[2]:
+                    self._cache.invalidate(key)
+
+    def _on_tracker_closed(self, tracker):
+        """Invoked when the tracking connection is closed. Invalidation
+        messages can no longer be received, so the cache is cleared and
+        bypassed until client side caching is re-established.
+
+        :param tracker: The tracking connection that was closed
+        :type tracker: tredis.client._Connection
+
+        """
+        if tracker is not self._tracker or self._closing:
+            return
+        LOGGER.warning('Client side caching connection closed')
+        self._tracker = None
+        self._stop_tracking()
+        self.io_loop.call_later(TRACKING_RECONNECT_INTERVAL,
+                                self._restart_tracking)
+
+    def _on_subscriber_closed(self, subscriber):
+        """Invoked when the Pub/Sub connection is closed, failing the pending
+        subscription changes and re-establishing the subscriptions on a new
+        connection.
+
+        :param subscriber: The Pub/Sub connection that was closed
+        :type subscriber: tredis.client._Connection
+
+        """
+        if subscriber is not self._subscriber:
+            return
+        self._subscriber = None
+        waiters, self._subscribe_waiters = (self._subscribe_waiters,
+                                            collections.deque())
+        for _remaining, future, _result in waiters:
+            if future is not None and not future.done():
+                future.set_exception(
+                    exceptions.ConnectionError('connection closed'))
+        if not self._closing and (self._subscriptions
+                                  or self._pattern_subscriptions):
+            LOGGER.warning('Pub/Sub connection closed, resubscribing')
+            self._resubscribe()
+
+    def _on_subscriber_messages(self, replies):
+        """Invoked with each batch of replies received on the Pub/Sub
+        connection, confirming subscription changes and dispatching the
+        messages in the batch to each subscription at once. Error replies
+        fail the oldest subscription change that has not been confirmed.
+
+        :param list replies: The replies that were received
+
+        """
+        batches = collections.OrderedDict()
+        for reply in replies:
+            if isinstance(reply, hiredis.ReplyError):
+                self._on_subscription_error(reply)
+                continue
+            elif not isinstance(reply, list) or not reply:
+                LOGGER.warning('Unexpected reply on the Pub/Sub connection: '
+                               '%r', reply)
+                continue
+            elif reply[0] == b'message':
+                subscription = self._subscriptions.get(reply[1])
+                message = Message(reply[1], reply[2], None)
+            elif reply[0] == b'pmessage':
+                subscription = self._pattern_subscriptions.get(reply[1])
+                message = Message(reply[2], reply[3], reply[1])
+            else:
+                if reply[0] in SUBSCRIPTION_REPLIES:
+                    self._on_subscription_reply(reply)
+                continue
+            if subscription is not None:
+                batches.setdefault(subscription, []).append(message)
+        for subscription, messages in batches.items():
+            subscription._dispatch(messages)
+
+    def _on_subscription_error(self, error):
+        """Invoked with an error reply to a subscription change, failing the
+        future for the change. Redis replies to the whole command with a
+        single error instead of a reply per channel or pattern.
+
+        :param error: The error reply
+        :type error: hiredis.ReplyError
+
+        """
+        if not self._subscribe_waiters:
+            LOGGER.error('Error on the Pub/Sub connection: %s', error)
+            return
+        _remaining, future, _result = self._subscribe_waiters.popleft()
+        if future is not None and not future.done():
+            future.set_exception(exceptions.RedisError(error))
+
+    def _on_subscription_reply(self, reply):
+        """Invoked with the replies confirming a subscription change,
+        resolving the future for the change once every channel or pattern
+        in it has been confirmed.
+
+        :param list reply: The confirmation reply
+
+        """
+        if not self._subscribe_waiters:
+            return
+        waiter = self._subscribe_waiters[0]
+        waiter[0] -= 1
+        if not waiter[0]:
+            self._subscribe_waiters.popleft()
+            remaining, future, result = waiter
+            if future is not None and not future.done():
+                future.set_result(reply[2] if result is None else result)
+
+    def _on_sentinel_closed(self, sentinel):
+        """Invoked when the connection to a Redis Sentinel is closed. If it
+        is the sentinel the client is subscribed to, the master is discovered
+        again, re-subscribing to ``+switch-master`` on an available sentinel.
+
+        :param sentinel: The sentinel connection that was closed
+        :type sentinel: tredis.client._Connection
+
+        """
+        if sentinel is self._sentinel and not self._closing:
+            LOGGER.warning('Sentinel connection %s closed', sentinel.name)
+            self._sentinel = None
+            self._discover_master()
+
+    def _on_sentinel_messages(self, messages):
+        """Invoked with the messages published to the ``+switch-master``
+        channel of the Redis Sentinel, connecting to the new master when it
+        is the master the client is using.
+
+        :param list messages: The published messages
+
+        """
+        name = self._sentinel_master
+        if isinstance(name, bytes):
+            name = name.decode('utf-8')
+        for message in messages:
+            if (not isinstance(message, list) or len(message) != 3
+                    or message[0] != b'message'
+                    or message[1] != SENTINEL_SWITCH_MASTER):
+                continue
+            parts = message[2].decode('utf-8').split(' ')
+            if len(parts) == 5 and parts[0] == name:
+                LOGGER.warning('Sentinel failover of %s from %s:%s to %s:%s',
+                               *parts)
+                self._failover_to(parts[3], int(parts[4]))
+
+    def _queue_command(self, command, future):
+        """Hold a command in the failover queue until the client is connected
+        to the new master, failing it if the queue is full.
+
+        :param command: The command to queue
+        :type command: tredis.client.Command
+        :param future: The execution future
+        :type future: tornado.concurrent.Future
+
+        """
+        if len(self._failover_queue) >= self._failover_queue_size:
+            future.set_exception(
+                exceptions.ConnectionError('Failover queue is full'))
+            return
+        self._failover_queue.append((command, future))
+
+    def _restart_tracking(self):
+        """Re-establish client side caching if it was not re-established by
+        a reconnection in the meantime.
+
+        """
+        if (self._tracker is None and not self._closing
+                and self._cache is not None and self._connection is not None):
+            self._start_tracking()
+
+    def _rediscover_master(self):
+        """Ask the Redis Sentinels for the master again after none of them
+        returned it, unless the client was closed or connected to the master
+        in the meantime.
+
+        """
+        if self._closing or (self._connection is not None
+                             and self._connection.connected):
+            return
+        self._discover_master()
+
+    def _resubscribe(self):
+        """Re-establish all of the subscriptions on a new Pub/Sub connection,
+        retrying after :data:`SUBSCRIBER_RECONNECT_INTERVAL` seconds if the
+        connection fails.
+
+        """
+        if self._closing:
+            return
+
+        def on_connected(future):
+            if future.exception():
+                LOGGER.warning('Error reconnecting the Pub/Sub connection: %s',
+                               future.exception())
+                self.io_loop.call_later(SUBSCRIBER_RECONNECT_INTERVAL,
+                                        self._resubscribe)
+                return
+            for command, names in [
+                    (b'SUBSCRIBE', list(self._subscriptions.keys())),
+                    (b'PSUBSCRIBE', list(self._pattern_subscriptions.keys()))]:
+                if names:
+                    self._write_subscription(command, names, None, None)
+
+        self.io_loop.add_future(self._connect_subscriber(), on_connected)
+
+    def _redirect_target(self, response):
+        """Return the hash slot and the cluster connection for the node a
+        ``MOVED`` or ``ASK`` response redirects to, creating a connection to
+        the node if it is not already known.
+
+        :param str response: The response from the Redis server
+        :rtype: tuple(int, tredis.client._ConnectionPool)
+
+        """
+        parts = response.split(' ')
+        host, port = common.split_connection_host_port(parts[2])
+        name = '{}:{}'.format(host, port)
+        if name not in self._cluster:
+            self._create_cluster_connection(host, port, [])
+        return int(parts[1]), self._cluster[name]
+
+    def _refresh_cluster_topology(self):
+        """Fetch the current cluster topology with ``CLUSTER SLOTS``,
+        updating the cluster connections and rebuilding the slot lookup table.
+        Only one refresh is run at a time.
+
+        """
+        if self._refreshing:
+            return
+        LOGGER.debug('Refreshing the cluster topology')
+        self._refreshing = True
+
+        def on_refreshed(future):
+            self._refreshing = False
+            self._redirects = 0
+            self._refreshed_at = self.io_loop.time()
+            if future.exception():
+                LOGGER.warning('Cluster topology refresh failed: %s',
+                               future.exception())
+            else:
+                self._on_cluster_discovery(future)
+
+        self.io_loop.add_future(self.cluster_slots(), on_refreshed)
+
+    def _start_tracking(self):
+        """Establish client side caching for the Redis server. A dedicated
+        connection is subscribed to the invalidation channel, ``CLIENT
+        TRACKING`` is enabled on each connection to the server with the
+        invalidation messages redirected to it, and the cache is enabled.
+
+        """
+        if self._tracker is not None and self._tracker.connected:
+            tracker, self._tracker = self._tracker, None
+            tracker.close()
+        self._stop_tracking()
+        tracker = _Connection(
+            self._connection.host, self._connection.port, None,
+            self._on_response, lambda: self._on_tracker_closed(tracker),
+            self.io_loop, on_message=self._on_invalidations)
+        self._tracker = tracker
+        pool = self._connection
+
+        def on_error(error):
+            if tracker is not self._tracker:
+                return
+            self._tracker = None
+            self._stop_tracking()
+            if tracker.connected:
+                tracker.close()
+            if isinstance(error, exceptions.RedisError):
+                LOGGER.error('Disabling client side caching, %s rejected '
+                             'CLIENT TRACKING: %s', tracker.name, error)
+                self._cache = None
+                return
+            LOGGER.warning('Error establishing client side caching: %s',
+                           error)
+            self.io_loop.call_later(TRACKING_RECONNECT_INTERVAL,
+                                    self._restart_tracking)
+
+        def on_tracking(futures):
+            errors = [f.exception() or exceptions.RedisError(
+                'Unexpected CLIENT TRACKING reply: {!r}'.format(f.result()))
+                for f in futures if f.exception() or not f.result()]
+            if errors:
+                on_error(errors[0])
+            elif tracker is self._tracker:
+                LOGGER.debug('Client side caching enabled for %s',
+                             tracker.name)
+                self._tracking = True
+
+        def on_subscribed(futures):
+            errors = [f.exception() for f in futures if f.exception()]
+            if errors:
+                return on_error(errors[0])
+            elif tracker is not self._tracker:
+                return
+            self._tracker_id = futures[0].result()
+            futures = []
+            for connection in pool.connections:
+                if connection.connected:
+                    futures.append(concurrent.TracebackFuture())
+                    connection.execute(self._tracking_command(connection),
+                                       futures[-1])
+            _when_all(self.io_loop, futures, on_tracking)
+            if not futures:
+                on_tracking(futures)
+
+        def on_connected(future):
+            if future.exception():
+                return on_error(future.exception())
+            _when_all(self.io_loop, [
+                self._execute_on_node(tracker, [b'CLIENT', b'ID']),
+                self._execute_on_node(
+                    tracker, [b'SUBSCRIBE', TRACKING_INVALIDATE_CHANNEL])
+            ], on_subscribed)
+
+        self.io_loop.add_future(tracker.connect(), on_connected)
+
+    def _stop_tracking(self):
+        """Disable and clear the cache until client side caching is
+        re-established.
+
+        """
+        self._tracking = False
+        self._tracker_id = None
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _subscribe(self, command, names, callback=None):
+        """Change the subscriptions of the dedicated Pub/Sub connection,
+        connecting it if needed. Subscribing returns a
+        :class:`~tredis.Subscription` for the channels or patterns, and
+        unsubscribing returns the number of channels and patterns the client
+        is still subscribed to.
+
+        :param bytes command: The subscription command to execute
+        :param names: The channels or patterns to change the subscription of
+        :type names: :class:`str`, :class:`bytes`, :class:`list`
+        :param method callback: The method to call with each batch of
+            messages
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        future = concurrent.TracebackFuture()
+        if names is None:
+            names = []
+        elif not isinstance(names, (list, tuple, set)):
+            names = [names]
+        names = [n if isinstance(n, bytes) else n.encode('utf-8')
+                 for n in names]
+        pattern = command in (b'PSUBSCRIBE', b'PUNSUBSCRIBE')
+        registry = (self._pattern_subscriptions
+                    if pattern else self._subscriptions)
+
+        if command in (b'SUBSCRIBE', b'PSUBSCRIBE'):
+            if not names:
+                future.set_exception(
+                    ValueError('No channels or patterns to subscribe to'))
+                return future
+            result = Subscription(self, callback)
+            for name in names:
+                if name in registry:
+                    registry[name]._remove(name, pattern)
+                registry[name] = result
+                result._add(name, pattern)
+        elif self._subscriber is None:
+            future.set_result(0)
+            return future
+        else:
+            result, names = None, names or list(registry.keys())
+            for name in names:
+                if name in registry:
+                    registry.pop(name)._remove(name, pattern)
+
+        def on_connected(cfuture):
+            if cfuture.exception():
+                if result is not None:
+                    for name in names:
+                        if registry.get(name) is result:
+                            del registry[name]
+                    result._close()
+                future.set_exception(cfuture.exception())
+            else:
+                self._write_subscription(command, names, future, result)
 
-    @staticmethod
-    def _eval_expectation(command, response, future):
-        """Evaluate the response from Redis to see if it matches the expected
-        response.
+        self.io_loop.add_future(self._connect_subscriber(), on_connected)
+        return future
 
-        :param command: The command that is being evaluated
+    def _tracking_command(self, connection):
+        """Return the command enabling ``CLIENT TRACKING`` on a connection,
+        redirecting the invalidation messages to the tracking connection.
+
+        :param connection: The connection to enable tracking on
+        :type connection: tredis.client._Connection
+        :rtype: tredis.client.Command
+
+        """
+        return Command(
+            self._build_command([b'CLIENT', b'TRACKING', b'ON', b'REDIRECT',
+                                 ascii(self._tracker_id).encode('ascii')]),
+            connection, b'OK', None)
+
+    def _write_subscription(self, command, names, future, result):
+        """Write a subscription command to the Pub/Sub connection, resolving
+        the future with ``result`` or the subscription count once every
+        channel or pattern has been confirmed.
+
+        :param bytes command: The subscription command to execute
+        :param list names: The channels or patterns
+        :param future: The future to resolve, if any
+        :type future: :class:`~tornado.concurrent.Future`
+        :param mixed result: The value to resolve the future with
+
+        """
+        self._subscribe_waiters.append([max(len(names), 1), future, result])
+        self._subscriber.execute(
+            Command(self._build_command([command] + names), self._subscriber,
+                    None, None), None)
+
+    def _scan_nodes(self):
+        """Return the connections to scan the keyspace with, the masters
+        serving hash slots in clustering mode.
+
+        :rtype: list(tredis.client._ConnectionPool)
+
+        """
+        if self._clustering:
+            return list(self._slot_nodes)
+        return [self._connection]
+
+    def _setup_connection(self, connection):
+        """Invoked when a connection's socket is connected, selecting the
+        configured database before any other command is executed on it. In
+        clustering mode, ``READONLY`` is issued on connections to replicas
+        when read-only commands may be executed on them.
+
+        :param connection: The connection that was established
+        :type connection: tredis.client._Connection
+        :rtype: tornado.concurrent.Future
+
+        """
+        future = concurrent.Future()
+        if self._clustering:
+            if connection.read_only and self._read_from != READ_FROM_MASTER:
+                connection.setup(
+                    Command(self._build_command([b'READONLY']), connection,
+                            None, None), future)
+            else:
+                future.set_result(True)
+            return future
+        cmd = Command(
+            self._build_command(['SELECT', str(connection.database)]),
+            connection, None, None)
+        if not self._is_tracked(connection):
+            connection.setup(cmd, future)
+            return future
+
+        def on_tracking(tracking_future):
+            if tracking_future.exception() or not tracking_future.result():
+                LOGGER.warning('Error enabling CLIENT TRACKING on %s: %s',
+                               connection.name, tracking_future.exception())
+                if not self._closing and self._cache is not None:
+                    self._start_tracking()
+            concurrent.chain_future(select_future, future)
+
+        select_future = concurrent.TracebackFuture()
+        tracking_future = concurrent.TracebackFuture()
+        self.io_loop.add_future(tracking_future, on_tracking)
+        connection.setup(cmd, select_future)
+        connection.setup(self._tracking_command(connection), tracking_future)
+        return future
+
+    def _on_response(self, command, future, response):
+        """Invoked by a connection's read loop with the reply for a command,
+        handling cluster redirection and read-only errors and setting the
+        value of the response in the execution future.
+
+        :param command: The command that was being executed
         :type command: tredis.client.Command
-        :param bytes response: The response value to check
-        :param future: The future representing the execution of the command
+        :param future: The execution future
         :type future: tornado.concurrent.Future
-        :return:
+        :param mixed response: The reply from Redis
+
         """
-        if isinstance(command.expectation, int) and command.expectation > 1:
-            future.set_result(response == command.expectation or response)
+        if isinstance(response, hiredis.ReplyError):
+            if response.args[0].startswith('MOVED '):
+                self._on_cluster_data_moved(response.args[0], command, future)
+            elif response.args[0].startswith('ASK '):
+                self._on_cluster_data_ask(response.args[0], command, future)
+            elif response.args[0].startswith('READONLY '):
+                self._on_read_only_error(command, future)
+            else:
+                future.set_exception(exceptions.RedisError(response))
+        elif command.callback is not None:
+            try:
+                future.set_result(command.callback(response))
+            except Exception as error:
+                LOGGER.exception('Error formatting the response: %r', error)
+                future.set_exception(error)
+        elif command.expectation is not None:
+            self._eval_expectation(command, response, future)
         else:
-            future.set_result(response == command.expectation)
+            future.set_result(response)
+
+    def _pick_cluster_host(self, value):
+        """Selects the Redis cluster host for the specified value, using the
+        ``read_from`` policy for read-only commands.
+
+        :param mixed value: The value to use when looking for the host
+        :rtype: tredis.client._ConnectionPool
+        :raises: :exc:`~tredis.exceptions.ConnectionError`
+
+        """
+        index, key = UNASSIGNED_SLOT, cluster.command_key(
+            value, self._key_positions)
+        if key is not None:
+            index = self._slot_table[cluster.key_slot(key)]
+        if index != UNASSIGNED_SLOT:
+            if (self._read_from == READ_FROM_MASTER
+                    or not common.is_read_only(value[0])):
+                return self._slot_nodes[index]
+            return self._pick_replica(self._slot_nodes[index],
+                                      self._slot_replicas[index])
+        LOGGER.debug('Host not found for %r, returning first connection',
+                     value)
+        connected = [n for n, c in self._cluster.items() if c.connected]
+        return self._cluster[min(connected or self._cluster.keys())]
+
+    def _pick_host(self, parts):
+        """Selects the Redis server for a command in non-clustering mode,
+        using the ``read_from`` policy to execute read-only commands on the
+        connected replicas that are not lagging behind the master.
+
+        :param list parts: The list of command parts
+        :rtype: tredis.client._ConnectionPool
+        :raises: :exc:`~tredis.exceptions.ConnectionError`
+
+        """
+        if (self._replicas and self._read_from != READ_FROM_MASTER
+                and common.is_read_only(parts[0])
+                and (self._cache is None or parts[0] not in CACHED_COMMANDS)):
+            return self._pick_replica(
+                self._connection,
+                [r for r in self._replicas
+                 if r.connected and r not in self._lagging_replicas])
+        return self._connection
+
+    def _pick_replica(self, master, replicas):
+        """Selects the node to execute a read-only command on from a master
+        and its replicas, based upon the ``read_from`` policy.
+
+        :param master: The master serving the hash slot, or the master in
+            non-clustering mode
+        :type master: tredis.client._ConnectionPool
+        :param list replicas: The replicas of the master
+        :rtype: tredis.client._ConnectionPool
+        :raises: :exc:`~tredis.exceptions.ConnectionError`
+
+        """
+        if self._read_from == READ_FROM_NEAREST:
+            return min([master] + replicas, key=lambda c: c.outstanding)
+        elif replicas:
+            return random.choice(replicas)
+        elif self._read_from == READ_FROM_REPLICA:
+            raise exceptions.ConnectionError(
+                'No replicas available for {}'.format(master.name))
+        return master
+
+
+class Pipeline(server.ServerMixin, keys.KeysMixin, strings.StringsMixin,
+               geo.GeoMixin, hashes.HashesMixin,
+               hyperloglog.HyperLogLogMixin, lists.ListsMixin, sets.SetsMixin,
+               sortedsets.SortedSetsMixin, pubsub.PubSubMixin,
+               scripting.ScriptingMixin):
+    """Buffers commands, writing them to Redis in a single write when
+    :meth:`~tredis.Pipeline.execute` is invoked. Pipelines are created with
+    :meth:`tredis.Client.pipeline` and expose the same command methods as
+    the :class:`~tredis.Client`.
+
+    Each command method returns a :class:`~tornado.concurrent.Future` that is
+    resolved when the pipeline is executed and the response for the command
+    has been received.
+
+    In clustering mode, the commands are grouped by the node serving their
+    hash slot and written to each node in parallel. Commands that are
+    redirected with ``MOVED`` or ``ASK`` are retried individually, and the
+    responses are returned in the order the commands were buffered.
+
+    Messages can be published in a pipeline, but subscribing or
+    unsubscribing fails with a :exc:`~tredis.exceptions.SubscribedError`.
+    :meth:`~tredis.Client.select` and :meth:`~tredis.Client.quit` change the
+    state of the client's connections and fail with a
+    :exc:`~tredis.exceptions.TRedisException` when used in a pipeline.
+
+    .. versionadded:: 0.9.0
+
+    :param client: The client to execute the pipeline with
+    :type client: tredis.Client
+
+    """
+
+    def __init__(self, client):
+        self.io_loop = client.io_loop
+        self._client = client
+        self._clustering = client._clustering
+        self._commands = []
+
+    def __len__(self):
+        return len(self._commands)
+
+    def execute(self):
+        """Write all of the buffered commands to Redis, returning a future
+        that resolves to the list of responses in the order the commands
+        were buffered. If any command raises an error, the future will raise
+        the first error that was received.
+
+        :rtype: :class:`~tornado.concurrent.Future`
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        future = concurrent.TracebackFuture()
+        commands, self._commands = self._commands, []
+        if not commands:
+            future.set_result([])
+            return future
+
+        def on_complete(futures):
+            errors = [f.exception() for f in futures if f.exception()]
+            if errors:
+                future.set_exception(errors[0])
+            else:
+                future.set_result([f.result() for f in futures])
+
+        _when_all(self.io_loop, [f for _c, f, _p in commands], on_complete)
+        self._client._execute_pipeline(commands)
+        return future
+
+    def quit(self):
+        """``QUIT`` closes the client's connection and can not be buffered in
+        a pipeline.
+
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        return self._unsupported(b'QUIT')
+
+    def select(self, index=0):
+        """``SELECT`` changes the database of the client's connections and
+        can not be buffered in a pipeline.
+
+        :param int index: The database to select
+        :rtype: :class:`~tornado.concurrent.Future`
+
+        """
+        return self._unsupported(b'SELECT')
 
     def _execute(self, parts, expectation=None, format_callback=None):
-        """Really execute a redis command
+        """Buffer a command for execution when the pipeline is executed.
 
         :param list parts: The list of command parts
         :param mixed expectation: Optional response expectation
 
         :rtype: :class:`~tornado.concurrent.Future`
-        :raises: :exc:`~tredis.exceptions.SubscribedError`
 
         """
         future = concurrent.TracebackFuture()
-
         try:
-            command = self._build_command(parts)
+            command = self._client._build_command(parts)
         except ValueError as error:
             future.set_exception(error)
             return future
+        self._commands.append((Command(command, None, expectation,
+                                       format_callback), future, parts))
+        return future
 
-        def on_locked(_):
-            if self.ready:
-                if self._clustering:
-                    cmd = Command(command, self._pick_cluster_host(parts),
-                                  expectation, format_callback)
-                else:
-                    LOGGER.debug('Connection: %r', self._connection)
-                    cmd = Command(command, self._connection, expectation,
-                                  format_callback)
-                LOGGER.debug('_execute(%r, %r, %r) on %s', cmd.command,
-                             expectation, format_callback, cmd.connection.name)
-                cmd.connection.execute(cmd, future)
-            else:
-                LOGGER.critical('Lock released & not ready, aborting command')
+    def _subscribe(self, command, names, callback=None):
+        """Subscriptions use a dedicated connection and can not be buffered
+        in a pipeline.
 
-        # Wait until the cluster is ready, letting cluster discovery through
-        if not self.ready and not self._connected.is_set():
-            self.io_loop.add_future(
-                self._connected.wait(),
-                lambda f: self.io_loop.add_future(self._busy.acquire(), on_locked)
-            )
-        else:
-            self.io_loop.add_future(self._busy.acquire(), on_locked)
+        :rtype: :class:`~tornado.concurrent.Future`
 
-        # Release the lock when the future is complete
-        self.io_loop.add_future(future, lambda r: self._busy.release())
+        """
+        future = concurrent.TracebackFuture()
+        future.set_exception(exceptions.SubscribedError(
+            'Subscriptions can not be executed in a pipeline'))
         return future
 
-    def _on_cluster_discovery(self, future):
-        """Invoked when the Redis server has responded to the ``CLUSTER_NODES``
-        command.
+    @staticmethod
+    def _unsupported(command):
+        """Return a future that fails for a command that can not be buffered
+        in a pipeline.
 
-        :param future: The future containing the response from Redis
-        :type future: tornado.concurrent.Future
+        :param bytes command: The command name
+        :rtype: :class:`~tornado.concurrent.Future`
 
         """
-        LOGGER.debug('_on_cluster_discovery(%r)', future)
-        common.maybe_raise_exception(future)
-        nodes = future.result()
-        for node in nodes:
-            name = '{}:{}'.format(node.ip, node.port)
-            if name in self._cluster:
-                LOGGER.debug('Updating cluster connection info for %s:%s',
-                             node.ip, node.port)
-                self._cluster[name].set_slots(node.slots)
-                self._cluster[name].set_read_only('slave' in node.flags)
-            else:
-                self._create_cluster_connection(node)
-        self._discovery = True
+        future = concurrent.TracebackFuture()
+        future.set_exception(exceptions.TRedisException(
+            '{} can not be executed in a pipeline'.format(
+                command.decode('ascii'))))
+        return future
 
-    def _on_closed(self):
-        """Invoked by connections when they are closed."""
-        self._connected.clear()
-        if not self._closing:
-            if self._on_close_callback:
-                self._on_close_callback()
-            else:
-                raise exceptions.ConnectionError('closed')
 
-    def _on_cluster_data_moved(self, response, command, future):
-        """Process the ``MOVED`` response from a Redis cluster node.
+class ScanIterator(object):
+    """Iterates over all of the keys in Redis using ``SCAN``, returning
+    batches of keys as they arrive. Scan iterators are created with
+    :meth:`tredis.Client.scan_iter`.
 
-        :param bytes response: The response from the Redis server
-        :param command: The command that was being executed
-        :type command: tredis.client.Command
-        :param future: The execution future
-        :type future: tornado.concurrent.Future
+    In clustering mode, a ``SCAN`` cursor is run on every master, with at
+    most ``concurrency`` ``SCAN`` commands in-flight at a time. A full
+    iteration takes as long as the largest node instead of the sum of all of
+    the nodes. As with ``SCAN``, a key may be returned more than once.
+
+    .. code:: python
+
+        iterator = client.scan_iter(pattern='user:*', count=1000)
+        while not iterator.done():
+            keys = yield iterator.next()
+            for key in keys:
+                process(key)
+
+    .. versionadded:: 0.9.0
+
+    :param client: The client to scan the keyspace with
+    :type client: tredis.Client
+    :param pattern: An optional pattern to apply for key matching
+    :type pattern: :class:`str`, :class:`bytes`
+    :param int count: An optional amount of work to perform in each scan
+    :param int concurrency: The maximum number of nodes to scan at the same
+        time, defaults to all nodes
+
+    """
+
+    def __init__(self, client, pattern=None, count=None, concurrency=None):
+        if concurrency is not None and concurrency < 1:
+            raise ValueError('Invalid concurrency ({})'.format(concurrency))
+        self.io_loop = client.io_loop
+        self._batches = collections.deque()
+        self._client = client
+        self._concurrency = concurrency
+        self._count = count
+        self._error = None
+        self._failed = False
+        self._nodes = collections.deque()
+        self._pattern = pattern
+        self._running = 0
+        self._started = False
+        self._waiting = None
+
+    def done(self):
+        """Returns ``True`` when every key has been returned by
+        :meth:`~tredis.ScanIterator.next`.
+
+        :rtype: bool
 
         """
-        LOGGER.debug('on_cluster_data_moved(%r, %r, %r)', response, command,
-                     future)
-        parts = response.split(' ')
-        name = '{}:{}'.format(*common.split_connection_host_port(parts[2]))
-        LOGGER.debug('Moved to %r', name)
-        if name not in self._cluster:
-            raise exceptions.ConnectionError(
-                '{} is not connected'.format(name))
-        self._cluster[name].execute(
-            command._replace(connection=self._cluster[name]), future)
+        return (self._started and not self._nodes and not self._running
+                and not self._batches and self._error is None)
 
-    def _on_connected(self, future):
-        """Invoked when connections have been established. If the client is
-        in clustering mode, it will kick of the discovery step if needed. If
-        not, it will select the configured database.
+    def next(self):
+        """Returns a :class:`~tornado.concurrent.Future` that resolves to the
+        next batch of keys. The last batch may be empty when the final
+        ``SCAN`` commands do not return any keys.
 
-        :param future: The connection future
-        :type future: tornado.concurrent.Future
+        :rtype: :class:`~tornado.concurrent.Future`
+        :raises: :exc:`~tredis.exceptions.RedisError`
 
         """
-        if future.exception():
-            self._connect_future.set_exception(future.exception())
+        if self._waiting is not None:
+            raise ValueError('The previous batch has not been returned')
+        self._waiting = concurrent.TracebackFuture()
+        future = self._waiting
+        if not self._started:
+            self._started = True
+            self.io_loop.add_future(self._client._connected.wait(),
+                                    self._on_ready)
+        else:
+            self._maybe_return_batch()
+        return future
+
+    def _maybe_return_batch(self):
+        """Resolve the future returned by :meth:`next` if a batch of keys or
+        an error is available, or if the iteration is complete.
+
+        """
+        if self._waiting is None:
             return
+        future = self._waiting
+        if self._error is not None:
+            self._waiting, error, self._error = None, self._error, None
+            future.set_exception(error)
+        elif self._batches:
+            self._waiting = None
+            future.set_result(self._batches.popleft())
+        elif not self._nodes and not self._running:
+            self._waiting = None
+            future.set_result([])
 
-        conn = future.result()
-        LOGGER.debug('Connected to %s (%r, %r, %r)', conn.name,
-                     self._clustering, self._discovery, self._connected)
-        if self._clustering:
-            self._cluster[conn.name] = conn
-            if not self._discovery:
-                self.io_loop.add_future(self.cluster_nodes(),
-                                        self._on_cluster_discovery)
-            elif self.ready:
-                LOGGER.debug('Cluster nodes all connected')
-                if not self._connect_future.done():
-                    self._connect_future.set_result(True)
-                self._connected.set()
-        else:
+    def _on_ready(self, _):
+        """Invoked when the client is connected, starting the scan of each
+        node.
 
-            def on_selected(sfuture):
-                LOGGER.debug('Initial setup and selection processed')
-                if sfuture.exception():
-                    self._connect_future.set_exception(sfuture.exception())
-                else:
-                    self._connect_future.set_result(True)
-                self._connected.set()
+        """
+        self._nodes.extend((node, 0) for node in self._client._scan_nodes())
+        self._scan()
+        self._maybe_return_batch()
 
-            select_future = concurrent.Future()
-            self.io_loop.add_future(select_future, on_selected)
-            self._connection = conn
-            cmd = Command(
-                self._build_command(['SELECT', str(conn.database)]),
-                self._connection, None, None)
-            cmd.connection.execute(cmd, select_future)
+    def _on_scanned(self, node, future):
+        """Invoked when a ``SCAN`` command has completed, queueing the next
+        ``SCAN`` for the node if its cursor has not returned to ``0``.
 
-    def _on_read_only_error(self, command, future):
-        """Invoked when a Redis node returns an error indicating it's in
-        read-only mode. It will use the ``INFO REPLICATION`` command to
-        attempt to find the master server and failover to that, reissuing
-        the command to that server.
+        :param node: The node that was scanned
+        :type node: tredis.client._ConnectionPool
+        :param future: The ``SCAN`` command future
+        :type future: :class:`~tornado.concurrent.Future`
 
-        :param command: The command that was being executed
-        :type command: tredis.client.Command
-        :param future: The execution future
-        :type future: tornado.concurrent.Future
+        """
+        self._running -= 1
+        if future.exception():
+            if not self._failed:
+                self._error = future.exception()
+            self._failed = True
+            self._nodes.clear()
+        elif not self._failed:
+            cursor, keys = future.result()
+            if cursor:
+                self._nodes.append((node, cursor))
+            if keys:
+                self._batches.append(keys)
+            self._scan()
+        self._maybe_return_batch()
+
+    def _scan(self):
+        """Start ``SCAN`` commands on the queued nodes, up to the concurrency
+        limit.
 
         """
-        failover_future = concurrent.TracebackFuture()
+        while self._nodes and (self._concurrency is None
+                               or self._running < self._concurrency):
+            node, cursor = self._nodes.popleft()
+            command = [b'SCAN', ascii(cursor).encode('ascii')]
+            if self._pattern:
+                command += [b'MATCH', self._pattern]
+            if self._count:
+                command += [b'COUNT', ascii(self._count).encode('ascii')]
+            self._running += 1
+            self.io_loop.add_future(
+                self._client._execute_on_node(
+                    node, command,
+                    format_callback=lambda value: (int(value[0]), value[1])),
+                functools.partial(self._on_scanned, node))
 
-        def on_replication_info(_):
-            common.maybe_raise_exception(failover_future)
-            LOGGER.debug('Failover closing current read-only connection')
-            self._closing = True
-            database = self._connection.database
-            self._connection.close()
-            self._connected.clear()
-            self._connect_future = concurrent.Future()
 
-            info = failover_future.result()
-            LOGGER.debug('Failover connecting to %s:%s', info['master_host'],
-                         info['master_port'])
-            self._connection = _Connection(
-                info['master_host'], info['master_port'], database, self._read,
-                self._on_closed, self.io_loop, self._clustering)
+class Subscription(object):
+    """The channels or patterns subscribed to in a single call to
+    :meth:`tredis.Client.subscribe` or :meth:`tredis.Client.psubscribe`.
 
-            # When the connection is re-established, re-run the command
-            self.io_loop.add_future(
-                self._connect_future,
-                lambda f: self._connection.execute(
-                    command._replace(connection=self._connection), future))
+    When the subscription has a callback, the messages received in each read
+    from the Pub/Sub connection are passed to the callback as a list of
+    :class:`~tredis.Message` values. Otherwise they are buffered until they
+    are retrieved with :meth:`~tredis.Subscription.next`, which returns all
+    of the messages received since it was last invoked:
 
-            # Use the normal connection processing flow when connecting
-            self.io_loop.add_future(self._connection.connect(),
-                                    self._on_connected)
+    .. code:: python
 
-        if self._clustering:
-            command.connection.set_readonly(True)
+        subscription = yield client.subscribe('events')
+        while not subscription.done():
+            messages = yield subscription.next()
+            for message in messages:
+                process(message.channel, message.message)
 
-        LOGGER.debug('%s is read-only, need to failover to new master',
-                     command.connection.name)
+    The subscription is done once it has been unsubscribed from every channel
+    and pattern and the buffered messages have been returned.
 
-        cmd = Command(
-            self._build_command(['INFO', 'REPLICATION']), self._connection,
-            None, common.format_info_response)
+    .. versionadded:: 0.9.0
 
-        self.io_loop.add_future(failover_future, on_replication_info)
-        cmd.connection.execute(cmd, failover_future)
+    :param client: The client that is subscribed
+    :type client: tredis.Client
+    :param method callback: The method to call with each batch of messages
 
-    def _read(self, command, future):
-        """Invoked when a command is executed to read and parse its results.
-        It will loop on the IOLoop until the response is complete and then
-        set the value of the response in the execution future.
+    """
 
-        :param command: The command that was being executed
-        :type command: tredis.client.Command
-        :param future: The execution future
-        :type future: tornado.concurrent.Future
+    def __init__(self, client, callback=None):
+        self._callback = callback
+        self._channels = set()
+        self._client = client
+        self._closed = False
+        self._messages = []
+        self._patterns = set()
+        self._waiting = None
+
+    @property
+    def channels(self):
+        """The channels that are subscribed to.
+
+        :rtype: set
 
         """
-        response = self._reader.gets()
-        if response is not False:
-            if isinstance(response, hiredis.ReplyError):
-                if response.args[0].startswith('MOVED '):
-                    self._on_cluster_data_moved(response.args[0], command,
-                                                future)
-                elif response.args[0].startswith('READONLY '):
-                    self._on_read_only_error(command, future)
-                else:
-                    future.set_exception(exceptions.RedisError(response))
-            elif command.callback is not None:
-                future.set_result(command.callback(response))
-            elif command.expectation is not None:
-                self._eval_expectation(command, response, future)
-            else:
-                future.set_result(response)
+        return set(self._channels)
+
+    @property
+    def patterns(self):
+        """The patterns that are subscribed to.
+
+        :rtype: set
+
+        """
+        return set(self._patterns)
+
+    def done(self):
+        """Returns ``True`` when the subscription has been unsubscribed from
+        every channel and pattern and every message has been returned by
+        :meth:`~tredis.Subscription.next`.
+
+        :rtype: bool
+
+        """
+        return self._closed and not self._messages
+
+    def next(self):
+        """Returns a :class:`~tornado.concurrent.Future` that resolves to the
+        list of messages received since the last invocation, waiting for a
+        message if none have been received. The list is empty once the
+        subscription is done.
+
+        :rtype: :class:`~tornado.concurrent.Future`
+        :raises: :exc:`ValueError`
+
+        """
+        if self._waiting is not None:
+            raise ValueError('The previous messages have not been returned')
+        future = concurrent.TracebackFuture()
+        if self._messages or self._closed:
+            messages, self._messages = self._messages, []
+            future.set_result(messages)
         else:
+            self._waiting = future
+        return future
 
-            def on_data(data):
-                # LOGGER.debug('Read %r', data)
-                self._reader.feed(data)
-                self._read(command, future)
+    def unsubscribe(self):
+        """Unsubscribe from all of the channels and patterns in the
+        subscription.
 
-            command.connection.read(on_data)
+        :rtype: :class:`~tornado.concurrent.Future`
 
-    def _pick_cluster_host(self, value):
-        """Selects the Redis cluster host for the specified value.
+        """
+        futures = []
+        if self._channels:
+            futures.append(self._client.unsubscribe(list(self._channels)))
+        if self._patterns:
+            futures.append(self._client.punsubscribe(list(self._patterns)))
+        if not futures:
+            future = concurrent.TracebackFuture()
+            future.set_result(None)
+            return future
+        future = concurrent.TracebackFuture()
 
-        :param mixed value: The value to use when looking for the host
-        :rtype: tredis.client._Connection
+        def on_complete(_futures):
+            errors = [f.exception() for f in futures if f.exception()]
+            if errors:
+                future.set_exception(errors[0])
+            else:
+                future.set_result(futures[-1].result())
+
+        _when_all(self._client.io_loop, futures, on_complete)
+        return future
+
+    def _add(self, name, pattern):
+        """Add a channel or pattern to the subscription.
+
+        :param bytes name: The channel or pattern
+        :param bool pattern: ``True`` if ``name`` is a pattern
 
         """
-        crc = crc16.crc16(self._encode_resp(value[1])) % HASH_SLOTS
-        for host in self._cluster.keys():
-            for slot in self._cluster[host].slots:
-                if slot[0] <= crc <= slot[1]:
-                    return self._cluster[host]
-        LOGGER.debug('Host not found for %r, returning first connection',
-                     value)
-        host_keys = sorted(list(self._cluster.keys()))
-        return self._cluster[host_keys[0]]
+        (self._patterns if pattern else self._channels).add(name)
+
+    def _close(self):
+        """Mark the subscription as closed, resolving a pending
+        :meth:`next` with the buffered messages.
+
+        """
+        self._closed = True
+        if self._waiting is not None:
+            future, self._waiting = self._waiting, None
+            messages, self._messages = self._messages, []
+            future.set_result(messages)
+
+    def _dispatch(self, messages):
+        """Pass a batch of messages to the callback, or buffer them for
+        :meth:`next`.
+
+        :param list messages: The :class:`~tredis.Message` values
+
+        """
+        if self._callback is not None:
+            try:
+                self._callback(messages)
+            except Exception as error:
+                LOGGER.exception('Error in subscription callback: %r', error)
+            return
+        self._messages.extend(messages)
+        if self._waiting is not None:
+            future, self._waiting = self._waiting, None
+            messages, self._messages = self._messages, []
+            future.set_result(messages)
+
+    def _remove(self, name, pattern):
+        """Remove a channel or pattern from the subscription, closing it
+        once it has no channels or patterns left.
+
+        :param bytes name: The channel or pattern
+        :param bool pattern: ``True`` if ``name`` is a pattern
+
+        """
+        (self._patterns if pattern else self._channels).discard(name)
+        if not self._channels and not self._patterns:
+            self._close()
 
 
 class RedisClient(Client):
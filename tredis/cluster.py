@@ -2,6 +2,11 @@
 import collections
 
 from tredis import common
+from tredis import crc16
+
+# Python 2 support for ascii()
+if 'ascii' not in dir(__builtins__):  # pragma: nocover
+    from tredis.compat import ascii
 
 ClusterNode = collections.namedtuple('ClusterNode', [
     'id', 'ip', 'port', 'flags', 'master', 'ping_sent', 'pong_recv',
@@ -41,6 +46,142 @@ that contains the attributes for a single node returned by the
 """
 
 
+ClusterSlot = collections.namedtuple(
+    'ClusterSlot', ['start', 'end', 'master', 'replicas'])
+""":class:`tredis.cluster.ClusterSlot` is a :class:`~collections.namedtuple`
+that contains the attributes for a single hash slot range returned by the
+``CLUSTER SLOTS`` command.
+
+.. versionadded: 0.9.0
+
+:param int start: The first hash slot in the range
+:param int end: The last hash slot in the range
+:param master: The master node serving the hash slot range
+:type master: :class:`~tredis.cluster.ClusterSlotNode`
+:param replicas: The replica nodes for the hash slot range
+:type replicas: list(:class:`~tredis.cluster.ClusterSlotNode`)
+
+"""
+
+ClusterSlotNode = collections.namedtuple('ClusterSlotNode',
+                                         ['ip', 'port', 'id'])
+""":class:`tredis.cluster.ClusterSlotNode` is a :class:`~collections.namedtuple`
+that contains the network endpoint of a node returned by the
+``CLUSTER SLOTS`` command.
+
+.. versionadded: 0.9.0
+
+:param str ip: The IP address of the node
+:param int port: The node TCP port
+:param str id: The node ID, or ``None`` if it was not returned by the
+    Redis server
+
+"""
+
+KEY_POSITIONS = {
+    b'ASKING': 0, b'AUTH': 0, b'BITOP': 2, b'CLIENT': 0, b'CLUSTER': 0,
+    b'COMMAND': 0, b'CONFIG': 0, b'DBSIZE': 0, b'DISCARD': 0, b'ECHO': 0,
+    b'EXEC': 0, b'FLUSHALL': 0, b'FLUSHDB': 0, b'INFO': 0, b'KEYS': 0,
+    b'MULTI': 0, b'OBJECT': 2, b'PING': 0, b'PSUBSCRIBE': 0, b'PUBLISH': 0,
+    b'PUBSUB': 0, b'PUNSUBSCRIBE': 0, b'QUIT': 0, b'RANDOMKEY': 0,
+    b'READONLY': 0, b'READWRITE': 0, b'SCAN': 0, b'SCRIPT': 0, b'SELECT': 0,
+    b'SUBSCRIBE': 0, b'TIME': 0, b'UNSUBSCRIBE': 0, b'UNWATCH': 0, b'WAIT': 0
+}
+"""The position of the first key in the commands where it is not the first
+argument, or ``0`` for commands that do not have keys. The key positions for
+``EVAL``, ``EVALSHA`` and ``MIGRATE`` depend upon their arguments."""
+
+KEY_SLOT_CACHE_SIZE = 1024
+"""The number of recently used keys to cache the hash slot values for"""
+
+_key_slot_cache = collections.OrderedDict()
+
+
+def key_slot(key):
+    """Return the Redis Cluster hash slot for a key. The CRC16 is calculated
+    on the raw key value, unless the key contains a hash tag, in which case
+    only the value between the first ``{`` and the first ``}`` after it is
+    hashed, provided that value is not empty.
+
+    The hash slots for the most recently used keys are cached by their
+    encoded value, bounded by :data:`~tredis.cluster.KEY_SLOT_CACHE_SIZE`.
+
+    .. versionadded:: 0.9.0
+
+    :param key: The key to return the hash slot for
+    :type key: :class:`str`, :class:`bytes`
+    :rtype: int
+
+    """
+    key = _encode_key(key)
+    try:
+        slot = _key_slot_cache.pop(key)
+    except KeyError:
+        slot = _calculate_key_slot(key)
+        if len(_key_slot_cache) >= KEY_SLOT_CACHE_SIZE:
+            _key_slot_cache.popitem(last=False)
+    _key_slot_cache[key] = slot
+    return slot
+
+
+def command_key(parts, positions=None):
+    """Return the key that a command is routed to a Redis Cluster node by,
+    or ``None`` if the command does not have any keys.
+
+    .. versionadded:: 0.9.0
+
+    :param list parts: The list of command parts
+    :param dict positions: Optional key positions to use instead of
+        :data:`~tredis.cluster.KEY_POSITIONS`
+    :rtype: :class:`str`, :class:`bytes` or ``None``
+
+    """
+    name = parts[0] if isinstance(parts[0], bytes) else parts[0].encode(
+        'ascii')
+    name = name.upper()
+    if name in (b'EVAL', b'EVALSHA'):
+        return parts[3] if len(parts) > 3 and int(parts[2]) else None
+    elif name == b'MIGRATE':
+        if len(parts) > 3 and parts[3]:
+            return parts[3]
+        for offset in range(6, len(parts) - 1):
+            if parts[offset] in (b'KEYS', 'KEYS'):
+                return parts[offset + 1]
+        return None
+    position = (KEY_POSITIONS if positions is None else positions).get(name, 1)
+    return parts[position] if 0 < position < len(parts) else None
+
+
+def _calculate_key_slot(key):
+    """Calculate the Redis Cluster hash slot for an encoded key.
+
+    :param bytes key: The key to return the hash slot for
+    :rtype: int
+
+    """
+    start = key.find(b'{')
+    if start > -1:
+        end = key.find(b'}', start + 1)
+        if end > start + 1:
+            key = key[start + 1:end]
+    return crc16.crc16(key) & 0x3fff
+
+
+def _encode_key(key):
+    """Encode a key as the bytes that are sent to Redis and hashed.
+
+    :param key: The key to encode
+    :type key: :class:`str`, :class:`bytes`, :class:`int`, :class:`float`
+    :rtype: bytes
+
+    """
+    if isinstance(key, (int, float)):
+        key = ascii(key)
+    if not isinstance(key, bytes):
+        key = key.encode('utf-8')
+    return key
+
+
 class ClusterMixin(object):
     """Redis Cluster Commands Mixin"""
 
@@ -117,7 +258,24 @@ class ClusterMixin(object):
             [b'CLUSTER', 'INFO'], format_callback=common.format_info_response)
 
     def cluster_key_slot(self, key):
-        pass
+        """Returns an integer identifying the hash slot the specified key
+        hashes to. This command may be useful for debugging and testing, since
+        it exposes via an API the underlying Redis implementation of the
+        hashing algorithm. :func:`tredis.cluster.key_slot` performs the same
+        calculation without a round-trip to Redis.
+
+        .. versionadded:: 0.9.0
+
+        .. note:: **Time complexity**: ``O(N)`` where ``N`` is the number of
+           bytes in the key
+
+        :param key: The key to return the hash slot for
+        :type key: :class:`str`, :class:`bytes`
+        :rtype: int
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'CLUSTER', b'KEYSLOT', key])
 
     def cluster_meet(self, ip, port):
         pass
@@ -155,12 +313,15 @@ class ClusterMixin(object):
                 parts = row.split(' ')
                 slots = []
                 for slot in parts[8:]:
-                    if '-' in slot:
+                    if slot.startswith('['):  # Migrating or importing
+                        continue
+                    elif '-' in slot:
                         sparts = slot.split('-')
                         slots.append((int(sparts[0]), int(sparts[1])))
                     else:
                         slots.append((int(slot), int(slot)))
-                ip_port = common.split_connection_host_port(parts[1])
+                ip_port = common.split_connection_host_port(
+                    parts[1].split('@')[0])
                 values.append(
                     ClusterNode(parts[0], ip_port[0], ip_port[1], parts[2],
                                 parts[3], int(parts[4]), int(parts[5]),
@@ -189,10 +350,67 @@ class ClusterMixin(object):
         pass
 
     def cluster_slots(self):
-        pass
+        """``CLUSTER SLOTS`` returns details about which cluster slots map to
+        which Redis instances. This is the mapping clients use to route
+        commands to the node serving each hash slot, and requires far less
+        parsing than the output of :meth:`~tredis.Client.cluster_nodes`.
+
+        .. versionadded:: 0.9.0
+
+        .. note:: **Time complexity**: ``O(N)`` where ``N`` is the total
+           number of cluster nodes
+
+        :rtype: list(:class:`~tredis.cluster.ClusterSlot`)
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+
+        def format_node(value):
+            return ClusterSlotNode(
+                value[0].decode('utf-8'), int(value[1]),
+                value[2].decode('utf-8') if len(value) > 2 else None)
+
+        def format_response(result):
+            return [
+                ClusterSlot(
+                    int(row[0]), int(row[1]), format_node(row[2]),
+                    [format_node(node) for node in row[3:]]) for row in result
+            ]
+
+        return self._execute(
+            [b'CLUSTER', b'SLOTS'], format_callback=format_response)
 
     def cluster_readonly(self):
-        pass
+        """Enables read queries for a connection to a Redis Cluster replica
+        node. Normally replica nodes will redirect clients to the
+        authoritative master for the hash slot involved in a given command,
+        however clients can use replicas in order to scale reads using the
+        ``READONLY`` command.
+
+        The client issues ``READONLY`` on its connections to replicas when
+        it is created with a ``read_from`` policy other than ``master``.
+
+        .. versionadded:: 0.9.0
+
+        .. note:: **Time complexity**: ``O(1)``
+
+        :rtype: bool
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'READONLY'], b'OK')
 
     def cluster_readwrite(self):
-        pass
+        """Disables read queries for a connection to a Redis Cluster replica
+        node, which is the default for connections. Read queries will be
+        redirected to the master serving the hash slot.
+
+        .. versionadded:: 0.9.0
+
+        .. note:: **Time complexity**: ``O(1)``
+
+        :rtype: bool
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'READWRITE'], b'OK')
@@ -6,12 +6,39 @@ import logging
 
 LOGGER = logging.getLogger(__name__)
 
+READ_ONLY_COMMANDS = frozenset([
+    b'BITCOUNT', b'BITPOS', b'DUMP', b'EXISTS', b'GEODIST', b'GEOHASH',
+    b'GEOPOS', b'GEORADIUS_RO', b'GEORADIUSBYMEMBER_RO', b'GET', b'GETBIT',
+    b'GETRANGE', b'HEXISTS', b'HGET', b'HGETALL', b'HKEYS', b'HLEN', b'HMGET',
+    b'HSCAN', b'HSTRLEN', b'HVALS', b'LINDEX', b'LLEN', b'LRANGE', b'MGET',
+    b'PTTL', b'SCARD', b'SDIFF', b'SINTER', b'SISMEMBER', b'SMEMBERS',
+    b'SRANDMEMBER', b'SSCAN', b'STRLEN', b'SUNION', b'TTL', b'TYPE', b'ZCARD',
+    b'ZCOUNT', b'ZLEXCOUNT', b'ZRANGE', b'ZRANGEBYLEX', b'ZRANGEBYSCORE',
+    b'ZRANK', b'ZREVRANGE', b'ZREVRANGEBYLEX', b'ZREVRANGEBYSCORE', b'ZREVRANK',
+    b'ZSCAN', b'ZSCORE'
+])
+"""Keyed commands that do not modify data and may be executed on a replica"""
+
 
 def maybe_raise_exception(future):
     if future.exception():
         raise future.exception()
 
 
+def is_read_only(command):
+    """Returns ``True`` if the command does not modify data and may be
+    executed on a replica.
+
+    :param command: The command name
+    :type command: :class:`str`, :class:`bytes`
+    :rtype: bool
+
+    """
+    if not isinstance(command, bytes):
+        command = command.encode('ascii')
+    return command.upper() in READ_ONLY_COMMANDS
+
+
 def split_connection_host_port(value):
     parts = value.split(':')
     LOGGER.debug('Returning %r', (parts[0], int(parts[1])))
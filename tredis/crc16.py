@@ -2,6 +2,7 @@
 XModem CRC 16 (CRC-CCITT) algorithm used by Redis Cluster to hash keys
 
 """
+import binascii
 import sys
 
 _CRC16_LOOKUP = [
@@ -64,5 +65,20 @@ def _py3_crc16(value):
     return crc
 
 
-crc16 = _py2_crc16 if sys.version_info < (3, 0, 0) else _py3_crc16
-"""Pick the right method based upon the Python version"""
+def _binascii_crc16(value):
+    """Calculate the CRC for the value using the C implementation in the
+    standard library's :mod:`binascii` module
+
+    :param bytes value: The value to return for the CRC Checksum
+    :rtype: int
+
+    """
+    return binascii.crc_hqx(value, 0)
+
+
+if hasattr(binascii, 'crc_hqx'):
+    crc16 = _binascii_crc16
+else:  # pragma: nocover
+    crc16 = _py2_crc16 if sys.version_info < (3, 0, 0) else _py3_crc16
+"""Use :func:`binascii.crc_hqx` when available, otherwise pick the right
+pure-Python method based upon the Python version"""
@@ -43,14 +43,12 @@ class RedisError(TRedisException):
 
 
 class SubscribedError(TRedisException):
-    """Raised when a client is subscribed via
-    :meth:`~tredis.RedisClient.subscribe` or
-    :meth:`~tredis.RedisClient.psubscribe` and a command other than
-    :meth:`~tredis.RedisClient.subscribe`,
+    """Raised when :meth:`~tredis.RedisClient.subscribe`,
     :meth:`~tredis.RedisClient.unsubscribe`,
     :meth:`~tredis.RedisClient.psubscribe`, or
-    :meth:`~tredis.RedisClient.punsubscribe` was requested. Once the client
-    enters the subscribed state it is not supposed to issue any other commands.
+    :meth:`~tredis.RedisClient.punsubscribe` is requested somewhere other than
+    the client, such as in a :class:`~tredis.Pipeline`. Subscriptions use a
+    dedicated connection that is not supposed to issue any other commands.
 
     """
     pass
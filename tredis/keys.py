@@ -13,6 +13,9 @@ class KeysMixin(object):
         """Removes the specified keys. A key is ignored if it does not exist.
         Returns :data:`True` if all keys are removed.
 
+        In clustering mode, keys that hash to different hash slots are removed
+        with a command per hash slot, executed in parallel.
+
         .. note::
 
            **Time complexity**: ``O(N)`` where ``N`` is the number of keys that
@@ -176,6 +179,9 @@ class KeysMixin(object):
         Use a backslash (``\``) to escape special characters if you want to
         match them verbatim.
 
+        In clustering mode, the keys matching the pattern on every master are
+        returned.
+
         .. note::
 
            **Time complexity**: ``O(N)``
@@ -518,6 +524,10 @@ class KeysMixin(object):
         For more information on :meth:`~tredis.RedisClient.scan`,
         visit the `Redis docs on scan <http://redis.io/commands/scan>`_.
 
+        In clustering mode, ``SCAN`` only iterates the keys of a single node.
+        Use :meth:`~tredis.Client.scan_iter` to iterate the keys of every
+        node in the cluster.
+
         .. note::
 
            **Time complexity**: ``O(1)`` for every call. ``O(N)`` for a
@@ -3,4 +3,208 @@
 
 class PubSubMixin(object):
     """Redis PubSub Commands Mixin"""
-    pass
+
+    def psubscribe(self, patterns, callback=None):
+        """Subscribes the client to the given patterns.
+
+        Supported glob-style patterns:
+
+        - ``h?llo`` subscribes to ``hello``, ``hallo`` and ``hxllo``
+        - ``h*llo`` subscribes to ``hllo`` and ``heeeello``
+        - ``h[ae]llo`` subscribes to ``hello`` and ``hallo``, but not
+          ``hillo``
+
+        Subscriptions use a dedicated connection, so the client can continue
+        to execute other commands while it is subscribed. The messages
+        received in each read from the connection are passed to ``callback``
+        as a list of :class:`~tredis.Message` values. If ``callback`` is not
+        set, the messages are buffered in the returned
+        :class:`~tredis.Subscription` until they are retrieved with
+        :meth:`~tredis.Subscription.next`.
+
+        .. note::
+
+           **Time complexity**: ``O(N)`` where ``N`` is the number of patterns
+           the client is already subscribed to.
+
+        .. versionadded:: 0.9.0
+
+        :param patterns: One or more patterns to subscribe to
+        :type patterns: :class:`str`, :class:`bytes`, :class:`list`
+        :param method callback: The method to call with each batch of
+            messages
+        :rtype: tredis.Subscription
+        :raises: :exc:`~tredis.exceptions.SubscribedError`
+
+        """
+        return self._subscribe(b'PSUBSCRIBE', patterns, callback)
+
+    def publish(self, channel, message):
+        """Posts a message to the given channel.
+
+        .. note::
+
+           **Time complexity**: ``O(N+M)`` where ``N`` is the number of
+           clients subscribed to the receiving channel and ``M`` is the total
+           number of subscribed patterns (by any client).
+
+        .. versionadded:: 0.9.0
+
+        :param channel: The channel to publish to
+        :type channel: :class:`str`, :class:`bytes`
+        :param message: The message to publish
+        :type message: :class:`str`, :class:`bytes`
+        :returns: The number of clients that received the message
+        :rtype: int
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'PUBLISH', channel, message])
+
+    def pubsub_channels(self, pattern=None):
+        """Lists the currently active channels. An active channel is a Pub/Sub
+        channel with one or more subscribers (not including clients
+        subscribed to patterns).
+
+        If no ``pattern`` is specified, all the channels are listed,
+        otherwise if ``pattern`` is specified only channels matching the
+        specified glob-style pattern are listed.
+
+        .. note::
+
+           **Time complexity**: ``O(N)`` where ``N`` is the number of active
+           channels, and assuming constant time pattern matching (relatively
+           short channels and patterns)
+
+        .. versionadded:: 0.9.0
+
+        :param pattern: An optional pattern to apply for channel matching
+        :type pattern: :class:`str`, :class:`bytes`
+        :rtype: list
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        command = [b'PUBSUB', b'CHANNELS']
+        if pattern is not None:
+            command.append(pattern)
+        return self._execute(command)
+
+    def pubsub_numpat(self):
+        """Returns the number of subscriptions to patterns (that are performed
+        using :meth:`~tredis.RedisClient.psubscribe`). Note that this is not
+        just the count of clients subscribed to patterns but the total number
+        of patterns all the clients are subscribed to.
+
+        .. note::
+
+           **Time complexity**: ``O(1)``
+
+        .. versionadded:: 0.9.0
+
+        :rtype: int
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'PUBSUB', b'NUMPAT'])
+
+    def pubsub_numsub(self, *channels):
+        """Returns the number of subscribers (not counting clients subscribed
+        to patterns) for the specified channels.
+
+        .. note::
+
+           **Time complexity**: ``O(N)`` for the ``NUMSUB`` subcommand, where
+           ``N`` is the number of requested channels
+
+        .. versionadded:: 0.9.0
+
+        :param channels: One or more channels to count the subscribers of
+        :type channels: :class:`str`, :class:`bytes`
+        :returns: The number of subscribers by channel
+        :rtype: dict
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+
+        def format_response(value):
+            return dict(zip(value[::2], value[1::2]))
+
+        return self._execute([b'PUBSUB', b'NUMSUB'] + list(channels),
+                             format_callback=format_response)
+
+    def punsubscribe(self, patterns=None):
+        """Unsubscribes the client from the given patterns, or from all of
+        them if none is given.
+
+        .. note::
+
+           **Time complexity**: ``O(N+M)`` where ``N`` is the number of
+           patterns the client is already subscribed and ``M`` is the number
+           of total patterns subscribed in the system (by any client).
+
+        .. versionadded:: 0.9.0
+
+        :param patterns: One or more patterns to unsubscribe from
+        :type patterns: :class:`str`, :class:`bytes`, :class:`list`
+        :returns: The number of channels and patterns the client is still
+            subscribed to
+        :rtype: int
+        :raises: :exc:`~tredis.exceptions.SubscribedError`
+
+        """
+        return self._subscribe(b'PUNSUBSCRIBE', patterns)
+
+    def subscribe(self, channels, callback=None):
+        """Subscribes the client to the specified channels.
+
+        Subscriptions use a dedicated connection, so the client can continue
+        to execute other commands while it is subscribed. The messages
+        received in each read from the connection are passed to ``callback``
+        as a list of :class:`~tredis.Message` values. If ``callback`` is not
+        set, the messages are buffered in the returned
+        :class:`~tredis.Subscription` until they are retrieved with
+        :meth:`~tredis.Subscription.next`.
+
+        .. code:: python
+
+            subscription = yield client.subscribe(['news', 'weather'])
+            while not subscription.done():
+                messages = yield subscription.next()
+
+        .. note::
+
+           **Time complexity**: ``O(N)`` where ``N`` is the number of channels
+           to subscribe to.
+
+        .. versionadded:: 0.9.0
+
+        :param channels: One or more channels to subscribe to
+        :type channels: :class:`str`, :class:`bytes`, :class:`list`
+        :param method callback: The method to call with each batch of
+            messages
+        :rtype: tredis.Subscription
+        :raises: :exc:`~tredis.exceptions.SubscribedError`
+
+        """
+        return self._subscribe(b'SUBSCRIBE', channels, callback)
+
+    def unsubscribe(self, channels=None):
+        """Unsubscribes the client from the given channels, or from all of
+        them if none is given.
+
+        .. note::
+
+           **Time complexity**: ``O(N)`` where ``N`` is the number of clients
+           already subscribed to a channel.
+
+        .. versionadded:: 0.9.0
+
+        :param channels: One or more channels to unsubscribe from
+        :type channels: :class:`str`, :class:`bytes`, :class:`list`
+        :returns: The number of channels and patterns the client is still
+            subscribed to
+        :rtype: int
+        :raises: :exc:`~tredis.exceptions.SubscribedError`
+
+        """
+        return self._subscribe(b'UNSUBSCRIBE', channels)
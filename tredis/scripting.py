@@ -72,6 +72,9 @@ class ScriptingMixin(object):
            **Time complexity**: ``O(N)`` with ``N`` being the number of scripts
            to check (so checking a single script is an ``O(1)`` operation).
 
+        In clustering mode, a script is only reported as existing if it
+        exists in the cache of every node in the cluster.
+
         :param str hashes: One or more sha1 hashes to check for in the cache
         :rtype: list
         :return: Returns a list of ``1`` or ``0`` indicating if the specified
@@ -81,7 +84,8 @@ class ScriptingMixin(object):
         return self._execute([b'SCRIPT', b'EXISTS'] + list(hashes))
 
     def script_flush(self):
-        """Flush the Lua scripts cache.
+        """Flush the Lua scripts cache. In clustering mode, the cache of every
+        node in the cluster is flushed.
 
         Please refer to the :meth:`~tredis.RedisClient.eval` documentation for
         detailed information about Redis Lua scripting.
@@ -137,6 +141,9 @@ class ScriptingMixin(object):
         The command works in the same way even if the script was already
         present in the script cache.
 
+        In clustering mode, the script is loaded on every node in the
+        cluster.
+
         Please refer to the :meth:`~tredis.RedisClient.eval` documentation for
         detailed information about Redis Lua scripting.
 
@@ -50,6 +50,20 @@ class ServerMixin(object):
         self.io_loop.add_future(execute_future, on_response)
         return future
 
+    def dbsize(self):
+        """Return the number of keys in the currently-selected database. In
+        clustering mode, the number of keys on every master is returned.
+
+        .. versionadded:: 0.9.0
+
+        .. note:: **Time complexity**: ``O(1)``
+
+        :rtype: int
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'DBSIZE'])
+
     def echo(self, message):
         """Returns the message that was sent to the Redis server.
 
@@ -61,6 +75,22 @@ class ServerMixin(object):
         """
         return self._execute([b'ECHO', message])
 
+    def flushdb(self):
+        """Delete all the keys of the currently selected database. This
+        command never fails. In clustering mode, the keys on every master are
+        deleted.
+
+        .. versionadded:: 0.9.0
+
+        .. note:: **Time complexity**: ``O(N)`` where ``N`` is the number of
+           keys in the selected database
+
+        :rtype: bool
+        :raises: :exc:`~tredis.exceptions.RedisError`
+
+        """
+        return self._execute([b'FLUSHDB'], b'OK')
+
     def info(self, section=None):
         """The INFO command returns information and statistics about the server
         in a format that is simple to parse by computers and easy to read by
@@ -87,6 +117,9 @@ class ServerMixin(object):
 
         When no parameter is provided, the default option is assumed.
 
+        In clustering mode, a :class:`dict` of the information for every node
+        in the cluster is returned, keyed by the node's ``host:port``.
+
         :param str section: Optional
         :return: dict
 
@@ -125,7 +158,9 @@ class ServerMixin(object):
 
     def select(self, index=0):
         """Select the DB with having the specified zero-based numeric index.
-        New connections always use DB ``0``.
+        New connections always use DB ``0``. The database is also selected on
+        the replicas that read-only commands are executed on, and the client
+        side cache is cleared.
 
         :param int index: The database to select
         :rtype: bool
@@ -140,6 +175,10 @@ class ServerMixin(object):
 
         def on_selected(f):
             self._connection.database = index
+            for replica in self._replicas:
+                replica.database = index
+            if self._cache is not None:
+                self._cache.clear()
 
         self.io_loop.add_future(future, on_selected)
         return future
@@ -424,6 +424,10 @@ class StringsMixin(object):
         not hold a string value or does not exist, the special value nil is
         returned. Because of this, the operation never fails.
 
+        In clustering mode, keys that hash to different hash slots are
+        retrieved with a command per hash slot, executed in parallel, and the
+        values are returned in the order of the keys.
+
         .. versionadded:: 0.2.0
 
         .. note:: **Time complexity**: ``O(N)`` where ``N`` is the number of
@@ -448,6 +452,10 @@ class StringsMixin(object):
         at once. It is not possible for clients to see that some of the keys
         were updated while others are unchanged.
 
+        In clustering mode, keys that hash to different hash slots are set
+        with a command per hash slot, executed in parallel. Each command is
+        atomic, but the keys in different hash slots are not set at once.
+
         .. versionadded:: 0.2.0
 
         .. note:: **Time complexity**: ``O(N)`` where ``N`` is the number of
@@ -477,6 +485,12 @@ class StringsMixin(object):
         at once. It is not possible for clients to see that some of the keys
         were updated while others are unchanged.
 
+        In clustering mode, all of the keys must hash to the same hash slot,
+        for example by sharing a ``{hash tag}``. Keys in different hash slots
+        raise a :exc:`~tredis.exceptions.RedisError` with a ``CROSSSLOT``
+        error, since splitting the command would break its all-or-nothing
+        guarantee.
+
         .. versionadded:: 0.2.0
 
         .. note:: **Time complexity**: ``O(N)`` where ``N`` is the number of